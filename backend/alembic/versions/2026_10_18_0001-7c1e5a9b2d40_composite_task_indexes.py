@@ -0,0 +1,68 @@
+"""composite task indexes
+
+Revision ID: 7c1e5a9b2d40
+Revises: 464e4a3e46e4
+Create Date: 2026-10-18 00:01:00.000000
+
+Replaces the single-column ix_tasks_user_id with indexes shaped after the
+queries we actually run:
+  - GET /tasks                 → (user_id, created_at, id)
+  - GET /tasks?status=...      → (user_id, status, created_at, id)
+  - digest "completed"         → (user_id, completed_at) WHERE status = 'completed'
+  - digest / overdue detection → (user_id, deadline) WHERE status IN ('planned', 'in_progress')
+
+Indexes are built CONCURRENTLY on Postgres so the tasks table stays
+writable while the migration runs.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e5a9b2d40'
+down_revision: Union[str, None] = '464e4a3e46e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COMPLETED = sa.text("status = 'completed'")
+OPEN = sa.text("status IN ('planned', 'in_progress')")
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_user_id_created_at', 'tasks',
+                        ['user_id', 'created_at', 'id'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_tasks_user_id_status_created_at', 'tasks',
+                        ['user_id', 'status', 'created_at', 'id'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_tasks_completed_by_user', 'tasks',
+                        ['user_id', 'completed_at'],
+                        postgresql_where=COMPLETED, sqlite_where=COMPLETED,
+                        postgresql_concurrently=True)
+        op.create_index('ix_tasks_open_by_deadline', 'tasks',
+                        ['user_id', 'deadline'],
+                        postgresql_where=OPEN, sqlite_where=OPEN,
+                        postgresql_concurrently=True)
+        # Every new index leads with user_id, so this one is now redundant
+        op.drop_index('ix_tasks_user_id', table_name='tasks',
+                      postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_user_id', 'tasks', ['user_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index('ix_tasks_open_by_deadline', table_name='tasks',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_tasks_completed_by_user', table_name='tasks',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_tasks_user_id_status_created_at', table_name='tasks',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_tasks_user_id_created_at', table_name='tasks',
+                      postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""add users.tasks_version
+
+Revision ID: 2b8f0d6e41a3
+Revises: 7c1e5a9b2d40
+Create Date: 2026-10-18 00:02:00.000000
+
+Per-user counter bumped by every task write; the task routes derive
+their ETag from it.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b8f0d6e41a3'
+down_revision: Union[str, None] = '7c1e5a9b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    op.add_column('users', sa.Column('tasks_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    op.drop_column('users', 'tasks_version')
@@ -0,0 +1,54 @@
+"""promote notifications_enabled / timezone to users columns
+
+Revision ID: 5d2a7c9e1f64
+Revises: 2b8f0d6e41a3
+Create Date: 2026-10-18 00:03:00.000000
+
+The digest job filtered users on preferences->notifications_enabled in
+Python after loading all of them. Both settings become typed columns,
+backfilled from the JSON, and a partial index covers exactly the
+digest recipients.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a7c9e1f64'
+down_revision: Union[str, None] = '2b8f0d6e41a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    op.add_column('users', sa.Column('notifications_enabled', sa.Boolean(), server_default=sa.text('true'), nullable=False))
+    op.add_column('users', sa.Column('timezone', sa.String(), server_default='UTC', nullable=False))
+
+    # Backfill from the JSON preferences (missing/null keys keep the defaults).
+    # Read the flag like models/user.py preference_flag(): a ::boolean cast would fail
+    # the migration on any value it can't parse, so those count as true.
+    op.execute("""
+        UPDATE users SET
+            notifications_enabled = lower(trim(preferences->>'notifications_enabled'))
+                NOT IN ('false', '0', 'no', 'off') OR preferences->>'notifications_enabled' IS NULL,
+            timezone = COALESCE(NULLIF(preferences->>'timezone', ''), 'UTC')
+        WHERE preferences IS NOT NULL
+    """)
+
+    # CONCURRENTLY so the users table stays writable during the build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_digest_recipients', 'users', ['id'],
+            postgresql_where=sa.text('is_active AND notifications_enabled'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_digest_recipients', table_name='users', postgresql_concurrently=True)
+    op.drop_column('users', 'timezone')
+    op.drop_column('users', 'notifications_enabled')
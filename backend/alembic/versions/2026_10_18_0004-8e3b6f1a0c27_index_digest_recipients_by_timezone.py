@@ -0,0 +1,69 @@
+"""index digest recipients by timezone
+
+Revision ID: 8e3b6f1a0c27
+Revises: 5d2a7c9e1f64
+Create Date: 2026-10-18 00:04:00.000000
+
+The digest job now runs every 15 minutes for the timezones whose local
+time just reached the send hour, so its recipient scan is per timezone:
+(timezone, id) replaces the id-only partial index.
+
+Recipients now match on the exact timezone name, so stored names are
+backfilled to pytz's canonical spelling ("utc" -> "UTC"), and names pytz
+doesn't know become UTC — otherwise those users would never be due.
+"""
+from typing import Sequence, Union
+from alembic import op
+import pytz
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b6f1a0c27'
+down_revision: Union[str, None] = '5d2a7c9e1f64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    connection = op.get_bind()
+    stored = connection.execute(sa.text("SELECT DISTINCT timezone FROM users")).scalars().all()
+    for name in stored:
+        if name in pytz.all_timezones_set:
+            continue
+        try:
+            canonical = pytz.timezone(name).zone
+        except pytz.UnknownTimeZoneError:
+            canonical = 'UTC'
+        # Both the column and the JSON copy, so a later preferences write keeps it
+        connection.execute(
+            sa.text("""
+                UPDATE users SET
+                    timezone = :canonical,
+                    preferences = CASE WHEN preferences::jsonb ? 'timezone'
+                        THEN jsonb_set(preferences::jsonb, '{timezone}', to_jsonb(CAST(:canonical AS text)))::json
+                        ELSE preferences END
+                WHERE timezone = :name
+            """),
+            {"canonical": canonical, "name": name},
+        )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_digest_timezone', 'users', ['timezone', 'id'],
+            postgresql_where=sa.text('is_active AND notifications_enabled'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_users_digest_recipients', table_name='users', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_digest_recipients', 'users', ['id'],
+            postgresql_where=sa.text('is_active AND notifications_enabled'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index('ix_users_digest_timezone', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,53 @@
+"""add jobs table
+
+Revision ID: 3f9c1d7a5b82
+Revises: 8e3b6f1a0c27
+Create Date: 2026-10-18 00:05:00.000000
+
+Durable job queue shared by every worker (services/job_queue.py): the
+digest scheduler enqueues one job per user, JobWorkers claim them with
+FOR UPDATE SKIP LOCKED under a lease.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d7a5b82'
+down_revision: Union[str, None] = '8e3b6f1a0c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('dedupe_key', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('queued', 'running', 'succeeded', 'failed', name='jobstatus'), server_default='queued', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='3', nullable=False),
+    sa.Column('run_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dedupe_key')
+    )
+    op.create_index('ix_jobs_claimable', 'jobs', ['kind', 'run_at'],
+                    postgresql_where=sa.text("status = 'queued'"))
+    op.create_index('ix_jobs_leased', 'jobs', ['kind', 'lease_expires_at'],
+                    postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    op.drop_index('ix_jobs_leased', table_name='jobs')
+    op.drop_index('ix_jobs_claimable', table_name='jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=False)
@@ -0,0 +1,45 @@
+"""online user pattern statistics
+
+Revision ID: 6a4e2c8b9d13
+Revises: 3f9c1d7a5b82
+Create Date: 2026-10-18 00:06:00.000000
+
+UserPattern rows are now updated on every task completion with an
+upsert keyed on (user_id, task_type), which needs that pair to be
+unique. bias_m2 (Welford) and decay_weight (decayed mean) are the
+running accumulators behind systematic_bias and calibration_factor.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a4e2c8b9d13'
+down_revision: Union[str, None] = '3f9c1d7a5b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    op.add_column('user_patterns', sa.Column('bias_m2', sa.Float(), server_default='0', nullable=False))
+    op.add_column('user_patterns', sa.Column('decay_weight', sa.Float(), server_default='0', nullable=False))
+
+    # Nothing wrote these rows before, but make sure the unique index can build:
+    # keep the oldest row of any duplicated (user_id, task_type)
+    op.execute("""
+        DELETE FROM user_patterns p
+        USING user_patterns keep
+        WHERE p.user_id = keep.user_id AND p.task_type = keep.task_type AND p.id > keep.id
+    """)
+    op.create_index('uq_user_patterns_user_task_type', 'user_patterns', ['user_id', 'task_type'], unique=True)
+    op.drop_index('ix_user_patterns_user_id', table_name='user_patterns')
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    op.create_index('ix_user_patterns_user_id', 'user_patterns', ['user_id'], unique=False)
+    op.drop_index('uq_user_patterns_user_task_type', table_name='user_patterns')
+    op.drop_column('user_patterns', 'decay_weight')
+    op.drop_column('user_patterns', 'bias_m2')
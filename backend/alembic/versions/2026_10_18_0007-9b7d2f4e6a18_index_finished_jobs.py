@@ -0,0 +1,36 @@
+"""index finished jobs
+
+Revision ID: 9b7d2f4e6a18
+Revises: 6a4e2c8b9d13
+Create Date: 2026-10-18 00:07:00.000000
+
+Finished jobs are now deleted after JOB_RETENTION_DAYS by a daily purge
+(job_queue.purge_finished); this partial index lets it find them by age
+without scanning the queue.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b7d2f4e6a18'
+down_revision: Union[str, None] = '6a4e2c8b9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Apply this migration — runs on `alembic upgrade head`"""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_jobs_finished', 'jobs', ['finished_at'],
+            postgresql_where=sa.text("status IN ('succeeded', 'failed')"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Undo this migration — runs on `alembic downgrade -1`"""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_jobs_finished', table_name='jobs', postgresql_concurrently=True)
@@ -0,0 +1,90 @@
+"""
+auth/cache.py — Authenticated User Cache
+
+get_current_user runs on every authenticated request, so "load the user
+for this token" was our single most frequent query. This caches a small
+snapshot of each active user, keyed by user id.
+
+SYSTEM DESIGN CONCEPT — Invalidate on Write, Bound by TTL:
+  - Any ORM update or delete of a User (preferences change, deactivation)
+    drops that user's entry once the transaction commits — see the
+    session events at the bottom of this file. Dropping before commit
+    would let a concurrent request re-cache the old row.
+  - The shared tier (CACHE_REDIS_URL) is deleted too, but other workers'
+    local tiers only let go at their TTL, so USER_CACHE_TTL_SECONDS is
+    the upper bound on how stale another worker can be. Keep it short.
+  - The snapshot never contains hashed_password.
+Code that bulk-updates users with a bare UPDATE statement (no ORM
+objects) must call invalidate_user() itself.
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache, TieredCache, shared_cache_from_env
+from app.models.user import User
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10_000))
+
+# Columns get_current_user's callers read. tasks_version is deliberately
+# left out: it changes on every task write and is always read fresh.
+SNAPSHOT_FIELDS = (
+    "id", "email", "full_name", "preferences", "notifications_enabled", "timezone",
+    "is_active", "is_verified",
+)
+
+user_cache = TieredCache(
+    "users",
+    LRUCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS),
+    shared=shared_cache_from_env("users", ttl=USER_CACHE_TTL_SECONDS),
+)
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def snapshot(user: User) -> dict:
+    return {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+
+
+def from_snapshot(data: dict) -> User:
+    """
+    A transient (session-less) User built from a snapshot. Fine for reading;
+    to change the user, load the real row with db.get(User, id).
+    """
+    return User(**data)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.delete(user_key(user_id))
+
+
+# ─── Invalidation ─────────────────────────────────────────────────────────────
+# Mapper events collect the ids of changed users on the session; the
+# session's after_commit drops them. Registered on the Session class, so
+# this also covers AsyncSession (which runs a sync Session underneath).
+
+_PENDING = "invalidate_user_ids"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target: User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop(_PENDING, None)
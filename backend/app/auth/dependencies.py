@@ -1,19 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.replicas import get_read_db
 from app.models.user import User
 from app.auth.utils import decode_access_token
+from app.auth.cache import user_cache, user_key, snapshot, from_snapshot
 
 http_bearer = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
-
+async def _authenticate(token: str, db: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or expired token",
@@ -28,8 +25,39 @@ def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        raise credentials_exception
+
+    # Served from the user cache when we can (see auth/cache.py). Only
+    # active users are cached, so a hit is always a valid user.
+    cached = user_cache.get(user_key(user_id))
+    if cached is not None:
+        return from_snapshot(cached)
+
+    user = await db.get(User, user_id)
     if user is None or not user.is_active:
         raise credentials_exception
 
-    return user
\ No newline at end of file
+    user_cache.set(user_key(user_id), snapshot(user))
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    return await _authenticate(credentials.credentials, db)
+
+
+async def get_current_reader(
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """
+    get_current_user for read-only routes: a user-cache miss is looked up
+    on a replica (db/replicas.py). Route handlers that also take
+    Depends(get_read_db) share the same session.
+    """
+    return await _authenticate(credentials.credentials, db)
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+auth/passwords.py — Async Password Hashing
+
+WHAT THIS FILE DOES:
+Async versions of hash_password / verify_password (auth/utils.py) that
+run bcrypt on a dedicated process pool instead of in the request handler.
+
+SYSTEM DESIGN CONCEPT — Isolate CPU-Bound Work, Shed Load Early:
+bcrypt is deliberately slow (~50-250 ms of pure CPU per call). Run inline
+in an async handler it blocks the event loop; run in a thread it still
+holds the GIL for most of that time. Either way a login storm (Monday
+9am, or right after tokens expire) stalls every task endpoint.
+
+  - A small process pool (PASSWORD_POOL_WORKERS) does the hashing, so it
+    runs on other cores and the API process keeps serving reads.
+  - The pool is bounded on both sides: at most PASSWORD_QUEUE_LIMIT
+    hashes may be running or waiting. Past that we answer 503 with
+    Retry-After straight away — a fast "try again" beats a login that
+    sits in a queue until the client times out anyway.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+
+from fastapi import HTTPException, status
+
+from app.auth import utils
+
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", min(2, os.cpu_count() or 1)))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", PASSWORD_POOL_WORKERS * 8))
+RETRY_AFTER_SECONDS = 1
+
+_pool: ProcessPoolExecutor | None = None
+_in_flight = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Created on first use. "spawn" so workers don't inherit the server's threads/sockets."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_password_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn, *args):
+    global _in_flight
+    if _in_flight >= PASSWORD_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins right now, please retry",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    _in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _in_flight -= 1
+
+
+async def hash_password(plain_password: str) -> str:
+    return await _run(utils.hash_password, plain_password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(utils.verify_password, plain_password, hashed_password)
+
+
+def stats() -> dict:
+    return {"workers": PASSWORD_POOL_WORKERS, "queue_limit": PASSWORD_QUEUE_LIMIT, "in_flight": _in_flight}
@@ -20,22 +20,25 @@ SECURITY DESIGN DECISIONS:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.user import User
 from app.auth.schemas import RegisterRequest, LoginRequest, TokenResponse, UserResponse, PreferencesUpdate
-from app.auth.utils import hash_password, verify_password, create_access_token
-from app.auth.dependencies import get_current_user
-from app.limiter import limiter
+from app.auth.utils import create_access_token
+from app.auth import passwords
+from app.auth.dependencies import get_current_user, get_current_reader
+from app.db.replicas import mark_write
+from app.limiter import limiter, AUTH_LIMIT
 from fastapi import Request
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=201)
-@limiter.limit("5/minute")
-def register(request: Request, payload: RegisterRequest, db: Session = Depends(get_db)):
+@limiter.limit(AUTH_LIMIT)
+async def register(request: Request, payload: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user account.
 
@@ -51,15 +54,16 @@ def register(request: Request, payload: RegisterRequest, db: Session = Depends(g
     You could return a token here too if you prefer auto-login on register.
     """
     # Step 1: Check for duplicate email
-    existing = db.query(User).filter(User.email == payload.email).first()
+    existing = await db.scalar(select(User).where(User.email == payload.email))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    # Step 2: Hash password — never store plain text
-    hashed = hash_password(payload.password)
+    # Step 2: Hash password — never store plain text.
+    # Runs on the password process pool (auth/passwords.py); 503 if it's saturated.
+    hashed = await passwords.hash_password(payload.password)
 
     # Step 3: Create and save user
     user = User(
@@ -68,15 +72,16 @@ def register(request: Request, payload: RegisterRequest, db: Session = Depends(g
         full_name=payload.full_name
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)  # Reloads user from DB so we get the auto-generated id
+    await db.commit()
+    await db.refresh(user)  # Reloads user from DB so we get the auto-generated id
+    mark_write(user.id)     # so /auth/me right after sign-up doesn't miss on a lagging replica
 
     return user
 
 
 @router.post("/login", response_model=TokenResponse)
-@limiter.limit("5/minute")
-def login(request: Request, payload: LoginRequest, db: Session = Depends(get_db)):
+@limiter.limit(AUTH_LIMIT)
+async def login(request: Request, payload: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate and return a JWT token.
 
@@ -91,8 +96,8 @@ def login(request: Request, payload: LoginRequest, db: Session = Depends(get_db)
     This prevents user enumeration (attacker can't tell if email exists).
     """
     # Step 1: Find user — use same error as wrong password (enumeration prevention)
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == payload.email))
+    if not user or not await passwords.verify_password(payload.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -105,7 +110,7 @@ def login(request: Request, payload: LoginRequest, db: Session = Depends(get_db)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_reader)):
     """
     Returns the currently logged-in user's profile.
     This route is protected — requires a valid JWT.
@@ -117,20 +122,25 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 
 @router.patch("/preferences", response_model=UserResponse)
-def update_preferences(
+async def update_preferences(
     payload: PreferencesUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Updates the user's preferences dictionary.
     """
+    # current_user may be a cached snapshot, so load the real row to change it.
+    # Committing the change drops the user's cache entry (auth/cache.py).
+    user = await db.get(User, current_user.id)
+
     # Merge existing preferences with new ones
-    current_prefs = current_user.preferences or {}
+    current_prefs = user.preferences or {}
     updated_prefs = {**current_prefs, **payload.preferences}
     
-    current_user.preferences = updated_prefs
-    db.commit()
-    db.refresh(current_user)
+    user.preferences = updated_prefs
+    await db.commit()
+    mark_write(user.id)
+    await db.refresh(user)
     
-    return current_user
\ No newline at end of file
+    return user
\ No newline at end of file
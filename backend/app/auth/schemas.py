@@ -16,7 +16,9 @@ This separation means:
   ✅ FastAPI auto-validates and auto-documents everything via Swagger
 """
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
+
+from app.models.user import canonical_timezone, preference_flag
 
 
 # ─── Request Schemas (what users send to us) ──────────────────────────────────
@@ -41,9 +43,32 @@ class LoginRequest(BaseModel):
 class PreferencesUpdate(BaseModel):
     """
     What we expect when a user updates their preferences.
+    A timezone must be one pytz knows; it's stored under its canonical name.
+    notifications_enabled must be a boolean ("false" and the like are read
+    as one).
     """
     preferences: dict
 
+    @field_validator("preferences")
+    @classmethod
+    def _check_notifications_enabled(cls, preferences: dict) -> dict:
+        if "notifications_enabled" not in preferences:
+            return preferences
+        enabled = preference_flag(preferences["notifications_enabled"])
+        if enabled is None:
+            raise ValueError(f"notifications_enabled must be a boolean, got {preferences['notifications_enabled']!r}")
+        return {**preferences, "notifications_enabled": enabled}
+
+    @field_validator("preferences")
+    @classmethod
+    def _check_timezone(cls, preferences: dict) -> dict:
+        if preferences.get("timezone") is None:
+            return preferences
+        timezone = canonical_timezone(preferences["timezone"])
+        if timezone is None:
+            raise ValueError(f"unknown timezone: {preferences['timezone']!r}")
+        return {**preferences, "timezone": timezone}
+
 
 # ─── Response Schemas (what we send back) ─────────────────────────────────────
 
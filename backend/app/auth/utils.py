@@ -18,9 +18,13 @@ Even if they intercept a token, it expires after 30 minutes.
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import hashlib
 import os
+import time
 from dotenv import load_dotenv
 
+from app.cache import LRUCache
+
 load_dotenv()
 
 # ─── Password Hashing ─────────────────────────────────────────────────────────
@@ -83,6 +87,21 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# ─── Verified-Token Cache ─────────────────────────────────────────────────────
+# A client sends the same token on every request for its whole 30-minute
+# life, and we'd re-parse and re-check its HMAC every time. Once a token
+# has verified, we remember its claims under the SHA-256 of the token
+# (so the cache never holds usable credentials) until its exp.
+# Process-local on purpose: a shared store would let whoever can write to
+# it mint "verified" tokens.
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", 10_000))
+_verified_tokens = LRUCache(max_entries=VERIFIED_TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def decode_access_token(token: str) -> dict | None:
     """
     Verifies a JWT token's signature and expiry.
@@ -91,9 +110,39 @@ def decode_access_token(token: str) -> dict | None:
     The jose library automatically checks:
       - Signature matches (wasn't tampered with)
       - Token hasn't expired (exp claim)
+
+    Tokens that already verified are answered from _verified_tokens.
+    Entries expire at the token's exp, and exp is re-checked on every hit,
+    so a cached token is never accepted after it has expired.
     """
+    digest = _token_digest(token)
+    cached = _verified_tokens.get(digest)
+    if cached is not None:
+        if cached["exp"] > time.time():
+            return dict(cached)
+        _verified_tokens.delete(digest)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _verified_tokens.set(digest, payload, ttl=exp - time.time())
+    return dict(payload)
+
+
+def user_id_from_authorization(authorization: str | None) -> str | None:
+    """
+    The "sub" of a valid "Bearer <token>" header value, else None.
+    For code that needs to know who's calling before the auth dependency
+    runs (rate limit keys, replica routing); it doesn't check the user exists.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return str(payload["sub"])
\ No newline at end of file
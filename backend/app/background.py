@@ -0,0 +1,162 @@
+"""
+background.py — Where Scheduled Work Runs
+
+WHAT THIS FILE DOES:
+Runs the scheduler (scheduler.py) and the job worker (services/job_worker.py)
+somewhere other than the event loop that serves requests. SCHEDULER_MODE:
+  thread   (default) a dedicated thread with its own event loop
+  process  a child process with its own engines and pools
+  inline   on the API's event loop — the old behaviour
+  off      not in this process; run `python -m app.background` instead
+           (e.g. as its own container next to the API)
+
+SYSTEM DESIGN CONCEPT — Keep Batch Work Off the Request Loop:
+An async job on the API's event loop shares it with every request. Any
+synchronous step in it — a SQLAlchemy query, rendering 200 emails — is
+a stretch during which no request makes progress, so the 9am digest
+run shows up as a latency spike on every endpoint. On a loop of its own
+(thread) the jobs only compete for the GIL, which Python hands over
+every few milliseconds, and in a process of its own they don't even
+share that. Jobs open their sessions per operation from the sync
+session factories, which are safe to use from any thread; the async
+engine stays with the API loop that owns its connections.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+
+from app import scheduler
+from app.scheduler import setup_scheduler, shutdown_scheduler
+from app.services.job_worker import JobWorker
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_MODES = ("thread", "process", "inline", "off")
+
+
+def scheduler_mode() -> str:
+    mode = os.getenv("SCHEDULER_MODE", "thread").lower()
+    if mode not in SCHEDULER_MODES:
+        raise ValueError(f"SCHEDULER_MODE must be one of {SCHEDULER_MODES}, got {mode!r}")
+    return mode
+
+
+def job_worker_enabled() -> bool:
+    """JOB_WORKER_ENABLED=false runs the scheduler (which only enqueues) without a worker."""
+    return os.getenv("JOB_WORKER_ENABLED", "true").lower() == "true"
+
+
+async def serve(stop: asyncio.Event, worker: JobWorker | None, with_scheduler: bool = True) -> None:
+    """Runs the scheduler and `worker` on the current loop until `stop` is set."""
+    if with_scheduler:
+        setup_scheduler()
+    if worker is not None:
+        worker.start()
+    try:
+        await stop.wait()
+    finally:
+        if worker is not None:
+            await worker.stop()
+        if with_scheduler:
+            shutdown_scheduler()
+            await asyncio.sleep(0)      # the scheduler shuts down via call_soon
+
+
+class BackgroundRunner:
+    """
+    Usage (see main.lifespan):
+        runner = BackgroundRunner(scheduler_mode(), job_worker)
+        runner.start()
+        ...
+        await runner.stop()
+    """
+
+    def __init__(self, mode: str, worker: JobWorker | None, with_scheduler: bool = True):
+        self.mode = mode
+        self.worker = worker
+        self.with_scheduler = with_scheduler
+        self._stop: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._process: multiprocessing.Process | None = None
+
+    def start(self) -> None:
+        if self.mode == "inline":
+            self._stop = asyncio.Event()
+            self._task = asyncio.create_task(serve(self._stop, self.worker, self.with_scheduler))
+        elif self.mode == "thread":
+            started = threading.Event()
+            self._thread = threading.Thread(target=self._run_thread, args=(started,),
+                                            name="calibrate-background", daemon=True)
+            self._thread.start()
+            started.wait()
+        elif self.mode == "process":
+            # spawn, not fork: a forked child would inherit the parent's pooled connections
+            context = multiprocessing.get_context("spawn")
+            self._process = context.Process(target=main, name="calibrate-background", daemon=True)
+            self._process.start()
+        logger.info(f"Background jobs: {self.mode}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stop.set()
+            await self._task
+            self._task = None
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        if self._process is not None:
+            self._process.terminate()       # SIGTERM: main() stops cleanly
+            await asyncio.to_thread(self._process.join, 30)
+            self._process = None
+
+    @property
+    def runs_here(self) -> bool:
+        """Whether the scheduler and worker run in this process (thread/inline)."""
+        return self.mode in ("thread", "inline")
+
+    def stats(self) -> dict:
+        """
+        For /metrics. The worker's counters and the last digest delivery
+        live in whichever process runs them, so in process/off mode they're
+        None here — that process logs them, and the jobs table has the
+        queue's state (job_queue.queue_stats).
+        """
+        here = self.runs_here
+        return {
+            "scheduler_mode": self.mode,
+            "job_worker": self.worker.stats() if here and self.worker is not None else None,
+            "digest_delivery": scheduler.last_digest_delivery if here else None,
+        }
+
+    def _run_thread(self, started: threading.Event) -> None:
+        async def run() -> None:
+            self._loop = asyncio.get_running_loop()
+            self._stop = asyncio.Event()
+            started.set()
+            await serve(self._stop, self.worker, self.with_scheduler)
+        asyncio.run(run())
+
+
+def main() -> None:
+    """Entry point of the background process (`python -m app.background`, or SCHEDULER_MODE=process)."""
+    logging.basicConfig(level=logging.INFO)
+
+    async def run() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await serve(stop, JobWorker.from_env() if job_worker_enabled() else None)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
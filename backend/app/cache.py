@@ -0,0 +1,182 @@
+"""
+cache.py — Shared Caching Primitives
+
+WHAT THIS FILE DOES:
+Small building blocks for read-through caches:
+  - LRUCache:    in-process, bounded, per-entry TTL
+  - RedisCache:  optional shared backend (any Redis-compatible client)
+  - TieredCache: LRUCache in front of an optional shared backend, with
+                 hit/miss counters
+
+SYSTEM DESIGN CONCEPT — Tiered Caching:
+The in-process tier answers in microseconds but each uvicorn worker has
+its own copy. The shared tier (Redis) is one network hop away but is
+shared by every worker, so a value computed by worker 1 is a hit on
+worker 2. Reads go local → shared → source; writes fill both.
+
+The shared tier is optional and never required for correctness: if it's
+unreachable we log, count the error and fall back to the local tier.
+"""
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Any
+import json
+import logging
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Bounded in-process cache. Least recently used entries are evicted once
+    max_entries is reached; entries also expire ttl seconds after being set.
+    Thread-safe (sync routes and the scheduler run outside the event loop).
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCache:
+    """
+    Shared cache backend. `client` is anything with Redis' get/set(ex=)/delete
+    — a redis.Redis in production, a dict-backed stand-in in tests.
+    Values are stored as JSON so every worker can read what another wrote.
+    """
+
+    def __init__(self, client, prefix: str = "calibrate:", ttl: float = 60.0):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> Any | None:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        seconds = max(1, math.ceil(self.ttl if ttl is None else ttl))
+        self.client.set(self.prefix + key, json.dumps(value), ex=seconds)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+def shared_cache_from_env(namespace: str, ttl: float = 60.0) -> RedisCache | None:
+    """
+    Builds the shared tier from CACHE_REDIS_URL, or returns None when it isn't
+    set (single worker / local dev). The redis client (requirements.txt) is
+    only imported when configured.
+    """
+    url = os.getenv("CACHE_REDIS_URL")
+    if not url:
+        return None
+    import redis
+    return RedisCache(redis.Redis.from_url(url), prefix=f"calibrate:{namespace}:", ttl=ttl)
+
+
+class TieredCache:
+    """
+    Read-through cache: local LRU first, then the shared backend (if any).
+    Keeps hit/miss counters so we can see whether the cache is earning its keep.
+    """
+
+    def __init__(self, name: str, local: LRUCache, shared: RedisCache | None = None):
+        self.name = name
+        self.local = local
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+
+    def get(self, key: str) -> Any | None:
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"{self.name} cache: shared get failed: {e}")
+            if value is not None:
+                self.hits += 1
+                self.shared_hits += 1
+                self.local.set(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"{self.name} cache: shared set failed: {e}")
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                self.shared.delete(key)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"{self.name} cache: shared delete failed: {e}")
+
+    def clear(self) -> None:
+        """Clears the local tier only — shared entries age out via their TTL."""
+        self.local.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "local_entries": len(self.local),
+            "shared_errors": self.shared_errors,
+        }
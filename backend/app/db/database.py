@@ -1,18 +1,30 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from typing import Generator
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import Generator, AsyncGenerator
 import os
 from dotenv import load_dotenv
 
+from app.db.pool import instrumented_pool, pool_settings_from_env
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# ─── Sync Engine ──────────────────────────────────────────────────────────────
+# Used by the scheduler, scripts and alembic — code that runs outside the
+# request/response cycle and is fine holding a thread while it waits.
+
+# Pool size, overflow, timeout, recycle and pre-ping come from DB_POOL_*
+# (see db/pool.py); the instrumented pool feeds checkout stats to /metrics.
+POOL_SETTINGS = pool_settings_from_env()
+
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,       # Detects stale connections
-    pool_size=10,             # Max persistent connections
-    max_overflow=20,          # Extra connections under load
+    poolclass=instrumented_pool(QueuePool),
+    **POOL_SETTINGS,
 )
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
@@ -32,4 +44,74 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# ─── Async Engine ─────────────────────────────────────────────────────────────
+# SYSTEM DESIGN — Why async:
+# A sync route runs in FastAPI's threadpool (40 threads by default) and holds
+# its thread for the whole time it waits on Postgres, so 40 slow queries can
+# stall the worker. Async routes give the event loop back while waiting,
+# so one worker can keep many more requests in flight.
+
+# Sync driver → async driver for the same database
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """postgresql://user@host/db → postgresql+asyncpg://user@host/db"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool),
+    **POOL_SETTINGS,
+)
+
+# expire_on_commit=False: attributes stay readable after commit. With async
+# sessions an expired attribute can't lazy-load on access, so the default
+# (expire everything) would make every returned object unusable.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False, autoflush=False)
+
+
+# ─── Read Replicas ────────────────────────────────────────────────────────────
+# REPLICA_DATABASE_URLS: comma-separated URLs of streaming replicas of
+# DATABASE_URL (same format). Empty = no replicas, all reads hit the primary.
+# Which reads go where is decided in db/replicas.py.
+
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+
+replica_engines = [
+    create_engine(url, poolclass=instrumented_pool(QueuePool), **POOL_SETTINGS)
+    for url in REPLICA_DATABASE_URLS
+]
+async_replica_engines = [
+    create_async_engine(to_async_url(url), poolclass=instrumented_pool(AsyncAdaptedQueuePool), **POOL_SETTINGS)
+    for url in REPLICA_DATABASE_URLS
+]
+ReplicaSessionLocals = [sessionmaker(bind=e, autocommit=False, autoflush=False) for e in replica_engines]
+AsyncReplicaSessionLocals = [
+    async_sessionmaker(bind=e, expire_on_commit=False, autoflush=False) for e in async_replica_engines
+]
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async version of get_db(), used by the task and auth routes.
+    Usage in a route:
+        @app.get("/tasks")
+        async def get_tasks(db: AsyncSession = Depends(get_async_db)):
+            ...
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,176 @@
+"""
+db/pool.py — Connection Pool Settings & Instrumentation
+
+WHAT THIS FILE DOES:
+  - pool_settings_from_env(): pool sizing per environment (DB_POOL_*)
+  - instrumented_pool(): a QueuePool subclass that records how long each
+    checkout waited, and how many gave up (pool timeout)
+  - pool_stats(): histogram + live gauges (in use, overflow, idle) for /metrics
+  - validate_idle_connections(): the background alternative to pre_ping
+
+SYSTEM DESIGN CONCEPT — Measure the Queue, Not Just the Queries:
+When the pool is too small, requests don't fail, they wait for a
+connection — and that wait shows up as "slow queries" that are really
+pool exhaustion. The checkout latency histogram and the overflow gauge
+tell those two apart.
+
+SYSTEM DESIGN CONCEPT — Pre-Ping vs Background Validation:
+pool_pre_ping runs a "SELECT 1" on every checkout: safe, but one extra
+round trip per request. With DB_POOL_VALIDATION_INTERVAL set, we turn
+pre_ping off and instead check idle connections every N seconds in the
+background (plus pool_recycle for age). A connection that died since
+the last sweep can still reach one request, which then fails and is
+retried by the client — trading a rare error for a round trip saved on
+every request.
+"""
+
+from time import perf_counter
+import asyncio
+import bisect
+import logging
+import os
+import threading
+
+from sqlalchemy import exc, text
+from sqlalchemy.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the checkout latency histogram buckets; the last is +Inf
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_settings_from_env() -> dict:
+    """
+    create_engine() pool keyword arguments for this environment:
+      DB_POOL_SIZE                 persistent connections (default 10)
+      DB_MAX_OVERFLOW              extra connections under load (default 20)
+      DB_POOL_TIMEOUT              seconds to wait for a connection (default 30)
+      DB_POOL_RECYCLE              replace connections older than this, -1 = never
+      DB_POOL_PRE_PING             ping on every checkout (default on, unless
+                                   DB_POOL_VALIDATION_INTERVAL is set)
+    Remember every worker process has its own pool: workers x (size + overflow)
+    must stay under Postgres' max_connections.
+    """
+    background_validation = validation_interval() > 0
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", -1)),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", not background_validation),
+    }
+
+
+def validation_interval() -> float:
+    """Seconds between background sweeps of idle connections; 0 = disabled."""
+    return float(os.getenv("DB_POOL_VALIDATION_INTERVAL", 0))
+
+
+class PoolMetrics:
+    """Checkout latency histogram and timeout counter. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.timeouts = 0
+
+    def observe(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.buckets[bisect.bisect_left(CHECKOUT_BUCKETS_MS, elapsed_ms)] += 1
+            self.checkouts += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+
+def instrumented_pool(base: type[Pool]) -> type[Pool]:
+    """
+    Subclass of `base` (QueuePool / AsyncAdaptedQueuePool) that times every
+    checkout — queue wait, connect and pre-ping included, i.e. what the
+    request actually waited. The metrics live on the class so they survive
+    pool.recreate() (engine.dispose()), which builds a new pool of the same class.
+    """
+    metrics = PoolMetrics()
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            metrics.timed_out()
+            raise
+        metrics.observe((perf_counter() - start) * 1000)
+        return connection
+
+    return type(f"Instrumented{base.__name__}", (base,), {"connect": connect, "metrics": metrics})
+
+
+def pool_stats(pool: Pool) -> dict:
+    metrics: PoolMetrics | None = getattr(pool, "metrics", None)
+    stats = {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    if metrics is not None:
+        labels = [f"le_{bound}ms" for bound in CHECKOUT_BUCKETS_MS] + ["le_inf"]
+        stats.update({
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "checkout_avg_ms": round(metrics.total_ms / metrics.checkouts, 3) if metrics.checkouts else None,
+            "checkout_max_ms": round(metrics.max_ms, 3),
+            "checkout_histogram": dict(zip(labels, metrics.buckets)),
+        })
+    return stats
+
+
+async def sweep_idle_connections(async_engines: list, sync_engines: list) -> None:
+    """Runs "SELECT 1" once per idle connection of every engine given."""
+    def sweep_sync() -> None:
+        for sync_engine in sync_engines:
+            for _ in range(sync_engine.pool.checkedin()):
+                try:
+                    with sync_engine.connect() as conn:
+                        conn.execute(text("SELECT 1"))
+                except exc.DBAPIError as e:
+                    logger.warning(f"db pool: idle connection failed validation: {e}")
+
+    for async_engine in async_engines:
+        for _ in range(async_engine.pool.checkedin()):
+            try:
+                async with async_engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except exc.DBAPIError as e:
+                logger.warning(f"db pool: idle connection failed validation: {e}")
+    await asyncio.to_thread(sweep_sync)
+
+
+async def validate_idle_connections(async_engines: list, sync_engines: list) -> None:
+    """
+    Background loop (started from the app lifespan when
+    DB_POOL_VALIDATION_INTERVAL > 0): every interval, run "SELECT 1" once
+    per idle connection. QueuePool hands connections out first-in
+    first-out, so N sequential checkouts visit all N idle connections.
+    A dead one raises a disconnect error, which makes SQLAlchemy
+    invalidate it (and the rest of that pool's connections) — the next
+    real checkout then gets a fresh connection.
+    Pass every engine built with pool_settings_from_env() — replicas
+    included: the setting turns pre_ping off for all of them.
+    """
+    interval = validation_interval()
+    while True:
+        await asyncio.sleep(interval)
+        await sweep_idle_connections(async_engines, sync_engines)
@@ -0,0 +1,95 @@
+"""
+db/replicas.py — Read Routing
+
+Decides which database a read-only request talks to. The replica engines
+themselves are built in db/database.py from REPLICA_DATABASE_URLS.
+
+SYSTEM DESIGN CONCEPT — Read Replicas with Read-Your-Writes:
+Most of our traffic is the dashboard reading tasks, so read-only routes
+(GET /tasks, GET /tasks/{id}, /auth/me, the digest) use get_read_db,
+which spreads sessions round-robin over the replicas and takes that load
+off the primary.
+
+Replicas lag the primary slightly. A user who just created a task and
+immediately reloads would otherwise see the list without it. So every
+write marks the user (mark_write), and for READ_YOUR_WRITES_SECONDS
+afterwards that user's reads stay on the primary. The marks live in a
+TieredCache, so with CACHE_REDIS_URL set a write on one worker makes the
+user sticky on every worker. READ_YOUR_WRITES_SECONDS=0 turns it off.
+
+With no replicas configured everything reads from the primary, exactly
+as before.
+"""
+
+from typing import AsyncGenerator
+import itertools
+import os
+
+from fastapi import Request
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.cache import LRUCache, TieredCache, shared_cache_from_env
+from app.db import database
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+recent_writers = TieredCache(
+    "recent_writes",
+    LRUCache(max_entries=100_000, ttl=READ_YOUR_WRITES_SECONDS),
+    shared=shared_cache_from_env("recent_writes", ttl=READ_YOUR_WRITES_SECONDS),
+)
+
+_round_robin = itertools.count()
+
+
+def mark_write(user_id: int) -> None:
+    """Keep this user's reads on the primary for READ_YOUR_WRITES_SECONDS."""
+    if READ_YOUR_WRITES_SECONDS > 0:
+        recent_writers.set(str(user_id), True)
+
+
+def recently_wrote(user_id: int | str | None) -> bool:
+    return (
+        user_id is not None
+        and READ_YOUR_WRITES_SECONDS > 0
+        and recent_writers.get(str(user_id)) is not None
+    )
+
+
+def read_session_factory(user_id: int | str | None = None) -> async_sessionmaker:
+    replicas = database.AsyncReplicaSessionLocals
+    if not replicas or recently_wrote(user_id):
+        return database.AsyncSessionLocal
+    return replicas[next(_round_robin) % len(replicas)]
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    get_async_db() for read-only routes: a replica session, or the primary
+    if there are no replicas or the caller wrote something moments ago.
+    Never write through it.
+    """
+    # Imported here: app.auth imports this module (auth/dependencies.py), so a
+    # top-level import breaks whichever entry point reaches app.db.replicas first
+    from app.auth.utils import user_id_from_authorization
+
+    user_id = user_id_from_authorization(request.headers.get("authorization"))
+    async with read_session_factory(user_id)() as db:
+        yield db
+
+
+def ReadSessionLocal() -> Session:
+    """Sync replica session (digest job), round-robin; the primary if there are none."""
+    replicas = database.ReplicaSessionLocals
+    if not replicas:
+        return database.SessionLocal()
+    return replicas[next(_round_robin) % len(replicas)]()
+
+
+def get_sync_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
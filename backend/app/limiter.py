@@ -1,4 +1,68 @@
+"""
+limiter.py — Rate Limiting
+
+SYSTEM DESIGN CONCEPT — Shared Counters, Per-User Keys:
+  - Storage: counters live in RATE_LIMIT_STORAGE_URI. The default,
+    memory://, is per process — with N uvicorn workers each one enforces
+    its own limit, so a user really gets N x the quota. Point it at a
+    Redis-compatible server (redis://host:6379/1 — Redis, Valkey,
+    KeyDB, a local stand-in; the client is redis in requirements.txt)
+    and every worker checks the same counters.
+    Each check is a single atomic script on the server, so there is no
+    read-then-write race between workers.
+  - Strategy: "moving-window" (a true sliding window) by default, so a
+    client can't fire 2x the limit across a window boundary.
+    RATE_LIMIT_STRATEGY=fixed-window is cheaper if that matters more.
+  - Key: the authenticated user id from the bearer token, so colleagues
+    behind one corporate NAT no longer share a bucket. Requests without
+    a valid token (register, login) fall back to the client IP.
+  - Quotas: DEFAULT_LIMIT applies to every route; expensive routes
+    (digest, import/export, bulk) have their own, tighter limit instead,
+    counted separately from the default bucket.
+If the shared storage is unreachable we fall back to in-memory counters
+rather than failing requests.
+"""
+
+import os
+
+from fastapi import Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
+from app.auth.utils import user_id_from_authorization
+
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "moving-window")
+
+DEFAULT_LIMIT = os.getenv("RATE_LIMIT_DEFAULT", "100/minute")
+AUTH_LIMIT = "5/minute"                 # register / login, per IP
+DIGEST_LIMIT = "3/hour"                 # POST /tasks/test-digest sends an email
+IMPORT_EXPORT_LIMIT = "10/hour"         # whole-history reads and writes
+BULK_LIMIT = "30/minute"                # up to 1000 tasks per call
+
+
+def rate_limit_key(request: Request) -> str:
+    """
+    "user:<id>" for requests with a valid bearer token, else "ip:<address>".
+    decode_access_token is answered from the verified-token cache for
+    repeat tokens, so this is cheap.
+    """
+    user_id = user_id_from_authorization(request.headers.get("authorization"))
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{get_remote_address(request)}"
+
+
+def build_limiter(storage_uri: str = RATE_LIMIT_STORAGE_URI) -> Limiter:
+    """The app's Limiter configuration; each uvicorn worker builds one."""
+    return Limiter(
+        key_func=rate_limit_key,
+        default_limits=[DEFAULT_LIMIT],
+        storage_uri=storage_uri,
+        strategy=RATE_LIMIT_STRATEGY,
+        key_prefix="calibrate",
+        in_memory_fallback_enabled=True,
+    )
+
+
+limiter = build_limiter()
@@ -1,27 +1,50 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
-from app.db.database import engine, get_db, Base
+from app.db.database import engine, async_engine, get_async_db, Base, replica_engines, async_replica_engines
+from app.db.pool import pool_stats, validate_idle_connections, validation_interval
 from app.models import *  # Registers all models with Base.metadata
 from app.auth.router import router as auth_router
 from app.tasks.router import router as tasks_router
+from app.tasks.cache import task_cache
+from app.auth.cache import user_cache
+from app.auth import passwords
 from app.limiter import limiter
-from app.scheduler import setup_scheduler, shutdown_scheduler
+from app.background import BackgroundRunner, scheduler_mode, job_worker_enabled
+from app.services.job_worker import JobWorker
 from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import os
+
+# Runs queued background jobs (digests, ...) — one per uvicorn worker.
+# JOB_WORKER_ENABLED=false leaves only the scheduler, which just enqueues.
+job_worker = JobWorker.from_env()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    setup_scheduler()
+    # The scheduler and job worker run off the request loop (SCHEDULER_MODE, see background.py)
+    background = BackgroundRunner(scheduler_mode(), job_worker if job_worker_enabled() else None)
+    background.start()
+    app.state.background = background
+    validator = None
+    if validation_interval() > 0:
+        validator = asyncio.create_task(validate_idle_connections(
+            [async_engine, *async_replica_engines], [engine, *replica_engines]
+        ))
     yield
     # Shutdown
-    shutdown_scheduler()
+    if validator is not None:
+        validator.cancel()
+    await background.stop()
+    passwords.shutdown_password_pool()
 
 limiter = limiter
 app = FastAPI(
@@ -43,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],   # Lets the frontend read ETags for conditional GETs
 )
 
 # Create all DB tables on startup
@@ -61,7 +85,42 @@ def health():
     return {"status": "ok"}
 
 
+# /metrics exposes internals (pool sizes, cache hit rates, worker state),
+# so it is off unless METRICS_TOKEN is set, and then scrapers must send
+# "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+def require_metrics_token(request: Request) -> None:
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    sent = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(sent.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics(request: Request):
+    """In-process counters for this worker (cache hit rates etc.)."""
+    return {
+        "task_cache": task_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "password_pool": passwords.stats(),
+        "db_pool": {
+            "async": pool_stats(async_engine.pool),
+            "sync": pool_stats(engine.pool),
+            # one entry per REPLICA_DATABASE_URLS entry, in that order
+            "replicas": [
+                {"async": pool_stats(async_replica.pool), "sync": pool_stats(replica.pool)}
+                for async_replica, replica in zip(async_replica_engines, replica_engines)
+            ],
+        },
+        # job_worker / digest_delivery: None unless they run in this process
+        **request.app.state.background.stats(),
+    }
+
+
 @app.get("/ping-db")
-def ping_db(db: Session = Depends(get_db)):
-    db.execute(text("SELECT 1"))
+async def ping_db(db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT 1"))
     return {"db": "connected"}
\ No newline at end of file
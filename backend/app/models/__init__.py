@@ -5,6 +5,7 @@ from app.models.user import User
 from app.models.task import Task, Subtask, TaskType, TaskPriority, TaskStatus
 from app.models.prediction import Prediction, Actual
 from app.models.user_pattern import UserPattern
+from app.models.job import Job, JobStatus
 
 __all__ = [
     "User",
@@ -16,4 +17,6 @@ __all__ = [
     "Prediction",
     "Actual",
     "UserPattern",
+    "Job",
+    "JobStatus",
 ]
\ No newline at end of file
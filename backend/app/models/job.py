@@ -0,0 +1,62 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Text, Index, text
+from sqlalchemy.sql import func
+from app.db.database import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Job(Base):
+    """
+    One unit of background work (a user's digest, a learning rebuild, ...),
+    shared by every API worker through this table. See services/job_queue.py.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim scan: queued jobs that are due, oldest first
+        Index(
+            "ix_jobs_claimable", "kind", "run_at",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        # Crashed-worker scan: running jobs whose lease ran out
+        Index(
+            "ix_jobs_leased", "kind", "lease_expires_at",
+            postgresql_where=text("status = 'running'"),
+            sqlite_where=text("status = 'running'"),
+        ),
+        # Retention scan: finished jobs by age (job_queue.purge_finished)
+        Index(
+            "ix_jobs_finished", "finished_at",
+            postgresql_where=text("status IN ('succeeded', 'failed')"),
+            sqlite_where=text("status IN ('succeeded', 'failed')"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    # Enqueueing the same dedupe_key twice is a no-op (e.g. "digest:42:2026-03-01")
+    dedupe_key = Column(String, nullable=True, unique=True)
+
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.queued, server_default="queued")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=3, server_default="3")
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # Set while running: which worker holds the job, and until when
+    locked_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job id={self.id} kind={self.kind} status={self.status}>"
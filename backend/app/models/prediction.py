@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Text, event, select, update
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from app.models.task import Task
+from app.models.user import User
 
 
 class Prediction(Base):
@@ -54,4 +56,24 @@ class Actual(Base):
     task = relationship("Task", back_populates="actuals")
 
     def __repr__(self):
-        return f"<Actual id={self.id} task_id={self.task_id} actual={self.actual_time}min>"
\ No newline at end of file
+        return f"<Actual id={self.id} task_id={self.task_id} actual={self.actual_time}min>"
+
+
+# ─── Task Version Bumps ───────────────────────────────────────────────────────
+# GET /tasks?include=predictions,actuals is served with an ETag built from
+# the owner's users.tasks_version (see tasks/service.bump_tasks_version).
+# Predictions and actuals are written outside app.tasks.service (by the
+# prediction engine), so any ORM insert, update or delete of one bumps the
+# version right here, in the same flush and transaction as the write.
+# Code writing these tables with bare INSERT/UPDATE statements must call
+# bump_tasks_version() itself.
+
+@event.listens_for(Prediction, "after_insert")
+@event.listens_for(Prediction, "after_update")
+@event.listens_for(Prediction, "after_delete")
+@event.listens_for(Actual, "after_insert")
+@event.listens_for(Actual, "after_update")
+@event.listens_for(Actual, "after_delete")
+def _bump_owner_tasks_version(mapper, connection, target) -> None:
+    owner = select(Task.user_id).where(Task.id == target.task_id).scalar_subquery()
+    connection.execute(update(User).where(User.id == owner).values(tasks_version=User.tasks_version + 1))
@@ -1,10 +1,11 @@
 from sqlalchemy import (
     Column, Integer, String, DateTime, Float,
-    ForeignKey, Enum, Text, Boolean
+    ForeignKey, Enum, Text, Boolean, Index, text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
+from datetime import datetime, timezone
 import enum
 
 
@@ -34,8 +35,30 @@ class TaskStatus(str, enum.Enum):
 class Task(Base):
     __tablename__ = "tasks"
 
+    # Composite indexes shaped after the hot queries (see migration
+    # 2026_10_18_0001). Every one leads with user_id, so they also cover
+    # plain "WHERE user_id = ?" lookups and the FK cascade.
+    __table_args__ = (
+        # GET /tasks: newest first, keyset on (created_at, id)
+        Index("ix_tasks_user_id_created_at", "user_id", "created_at", "id"),
+        # GET /tasks?status=...
+        Index("ix_tasks_user_id_status_created_at", "user_id", "status", "created_at", "id"),
+        # Digest: "what did you finish yesterday"
+        Index(
+            "ix_tasks_completed_by_user", "user_id", "completed_at",
+            postgresql_where=text("status = 'completed'"),
+            sqlite_where=text("status = 'completed'"),
+        ),
+        # Digest / overdue detection: open tasks past their deadline
+        Index(
+            "ix_tasks_open_by_deadline", "user_id", "deadline",
+            postgresql_where=text("status IN ('planned', 'in_progress')"),
+            sqlite_where=text("status IN ('planned', 'in_progress')"),
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -57,14 +80,22 @@ class Task(Base):
     scheduled_date = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python, not only by the server default: the GET /tasks cursor
+    # compares created_at with a bound datetime, and on SQLite a
+    # CURRENT_TIMESTAMP string ("... 12:00:00") doesn't sort like a bound
+    # one ("... 12:00:00.000000"), so cursor pages would repeat forever.
+    # The server default stays for rows written outside the ORM (COPY).
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="tasks")
-    subtasks = relationship("Subtask", back_populates="task", cascade="all, delete-orphan")
-    predictions = relationship("Prediction", back_populates="task", cascade="all, delete-orphan")
-    actuals = relationship("Actual", back_populates="task", cascade="all, delete-orphan")
+    # passive_deletes: let the ON DELETE CASCADE foreign keys remove children
+    # instead of loading every collection just to delete it
+    subtasks = relationship("Subtask", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    predictions = relationship("Prediction", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    actuals = relationship("Actual", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
 
     def __repr__(self):
         return f"<Task id={self.id} title={self.title} status={self.status}>"
@@ -1,11 +1,59 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON
-from sqlalchemy.orm import relationship
+import logging
+
+import pytz
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, Index, text
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.db.database import Base
 
+logger = logging.getLogger(__name__)
+
+
+def canonical_timezone(name) -> str | None:
+    """
+    The pytz name for `name` ("utc" -> "UTC", "Europe/paris" -> "Europe/Paris"),
+    or None if it isn't a timezone. The digest job picks recipients by exact
+    match on these names, so only canonical ones may be stored.
+    """
+    if not isinstance(name, str) or not name:
+        return None
+    try:
+        return pytz.timezone(name).zone
+    except pytz.UnknownTimeZoneError:
+        return None
+
+
+_BOOLEAN_STRINGS = {"true": True, "1": True, "yes": True, "on": True,
+                    "false": False, "0": False, "no": False, "off": False}
+
+
+def preference_flag(value) -> bool | None:
+    """
+    A preference flag as a real bool: JSON booleans as-is, 0/1 and strings
+    like "false"/"no"/"off" as what they say (bool("false") would be True),
+    None for anything else.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        return _BOOLEAN_STRINGS.get(value.strip().lower())
+    return None
+
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # The digest job's recipient scan: active users with notifications on
+        # in the timezones that are due, walked in id order
+        # (see digest_service.digest_recipients_query).
+        Index(
+            "ix_users_digest_timezone", "timezone", "id",
+            postgresql_where=text("is_active AND notifications_enabled"),
+            sqlite_where=text("is_active AND notifications_enabled"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -22,6 +70,17 @@ class User(Base):
         "notifications_enabled": True
     })
 
+    # Copies of preferences["notifications_enabled"] / ["timezone"] as real
+    # columns, so jobs can filter and index on them. Kept in sync by
+    # _sync_preference_columns below — set preferences, not these.
+    notifications_enabled = Column(Boolean, nullable=False, default=True, server_default=text("true"))
+    timezone = Column(String, nullable=False, default="UTC", server_default="UTC")
+
+    # Bumped by every write in app.tasks.service, and by any ORM write to
+    # the user's predictions or actuals (models/prediction.py). Drives the
+    # ETag on GET /tasks and GET /tasks/{id}: same version → nothing changed.
+    tasks_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
 
@@ -32,5 +91,27 @@ class User(Base):
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
     patterns = relationship("UserPattern", back_populates="user", cascade="all, delete-orphan")
 
+    @validates("preferences")
+    def _sync_preference_columns(self, key, preferences):
+        # PATCH /auth/preferences rejects values we can't read; the
+        # fallbacks here cover other writers (and rows from before that)
+        preferences = dict(preferences or {})
+        enabled = preferences.get("notifications_enabled", True)
+        self.notifications_enabled = preference_flag(enabled)
+        if self.notifications_enabled is None:
+            logger.warning(f"User {self.id}: unreadable notifications_enabled {enabled!r}, using True")
+            self.notifications_enabled = True
+        timezone = preferences.get("timezone") or "UTC"
+        self.timezone = canonical_timezone(timezone)
+        if self.timezone is None:
+            logger.warning(f"User {self.id}: unknown timezone {timezone!r}, using UTC")
+            self.timezone = "UTC"
+
+        # Keep the JSON in step with the columns
+        for name in ("notifications_enabled", "timezone"):
+            if name in preferences:
+                preferences[name] = getattr(self, name)
+        return preferences
+
     def __repr__(self):
         return f"<User id={self.id} email={self.email}>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -7,13 +7,18 @@ from app.db.database import Base
 class UserPattern(Base):
     """
     Stores learned patterns per user per task type.
-    Updated by the ML system (Person 1) after enough data is collected.
+    Kept current one completion at a time by tasks/patterns.py.
     Example: "You underestimate research tasks by 40%"
     """
     __tablename__ = "user_patterns"
+    __table_args__ = (
+        # One row per (user, task type): the upsert on completion targets it,
+        # and it serves the by-user lookups the old user_id index did
+        Index("uq_user_patterns_user_task_type", "user_id", "task_type", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     task_type = Column(String, nullable=False)          # matches TaskType enum values
 
@@ -22,6 +27,10 @@ class UserPattern(Base):
     systematic_bias = Column(Float, nullable=True)      # + means underestimates, - means overestimates
     calibration_factor = Column(Float, default=1.0)     # Multiplier applied to raw predictions
 
+    # Running accumulators (see tasks/patterns.py)
+    bias_m2 = Column(Float, nullable=False, default=0.0, server_default="0")       # Welford sum of squared deviations of the bias
+    decay_weight = Column(Float, nullable=False, default=0.0, server_default="0")  # Decayed task count behind calibration_factor
+
     # Stats
     total_tasks_completed = Column(Integer, default=0)
     avg_actual_time = Column(Float, nullable=True)      # Average actual minutes for this task type
@@ -35,5 +44,11 @@ class UserPattern(Base):
     # Relationships
     user = relationship("User", back_populates="patterns")
 
+    @property
+    def bias_variance(self) -> float | None:
+        """Sample variance of the per-task bias; None until there are two tasks."""
+        n = self.total_tasks_completed or 0
+        return self.bias_m2 / (n - 1) if n > 1 else None
+
     def __repr__(self):
         return f"<UserPattern user_id={self.user_id} task_type={self.task_type} bias={self.systematic_bias}>"
\ No newline at end of file
@@ -1,47 +1,142 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from datetime import datetime
 import logging
 import asyncio
 
+import pytz
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
+from app.db.replicas import ReadSessionLocal
+from app.models.job import Job
 from app.models.user import User
-from app.services.digest_service import generate_user_digest
+from app.services import job_queue
+from app.services.digest_service import (
+    build_digests, send_digest, iter_digest_recipients, timezones_due, yesterday_window, DIGEST_SLOT_MINUTES
+)
+from app.services.job_worker import job_handler
+from app.services.mail_delivery import MailDeliveryEngine
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
-async def send_daily_digests():
+# Delivery stats of the most recent digest batch, for /metrics
+last_digest_delivery: dict | None = None
+
+
+def enqueue_digests(timezones: list[str], now: datetime | None = None) -> int:
     """
-    Scheduled job to send daily digests to all active users who have notifications enabled.
+    Enqueues one "digest" job per recipient in `timezones`. The dedupe key
+    is user + day summarized, so every uvicorn worker's scheduler can run
+    this for the same slot (and a rerun after a crash can too) and each
+    user still gets one digest per day. Returns how many recipients it saw.
     """
-    logger.info("Starting daily email digest job...")
+    now = now or datetime.now(pytz.utc)
+    reader: Session = ReadSessionLocal()     # finding recipients only reads: use a replica if we have one
     db: Session = SessionLocal()
+    seen = 0
     try:
-        # Fetch all active users.
-        # In production, we might want to batch these or fetch them based on timezone.
-        users = db.query(User).filter(User.is_active == True).all()
-
-        for user in users:
-            # Check if this user wants notifications based on preferences
-            notifications_enabled = user.preferences.get("notifications_enabled", True)
-            if notifications_enabled:
-                try:
-                    await generate_user_digest(db, user)
-                except Exception as e:
-                    logger.error(f"Failed to send digest to {user.email}: {e}")
-                    
+        for users in iter_digest_recipients(reader, timezones=timezones):
+            job_queue.enqueue(db, "digest", [
+                {
+                    "payload": {"user_id": user.id},
+                    "dedupe_key": f"digest:{user.id}:{yesterday_window(user.timezone, now)[0].isoformat()}",
+                }
+                for user in users
+            ])
+            db.commit()
+            seen += len(users)
+    finally:
+        reader.close()
+        db.close()
+    return seen
+
+
+async def enqueue_due_digests():
+    """
+    Scheduled job (every DIGEST_SLOT_MINUTES, in every uvicorn worker):
+    enqueues the daily digest for active users with notifications enabled
+    whose local time has just reached the send hour — see Timezone
+    Sharding in digest_service.py. The JobWorkers send them (send_digests).
+    """
+    timezones = timezones_due()
+    if not timezones:
+        return
+    try:
+        count = await asyncio.to_thread(enqueue_digests, timezones)
+        logger.info(f"Enqueued daily digests for {count} users in {len(timezones)} timezones.")
     except Exception as e:
-        logger.error(f"Error in send_daily_digests job: {e}")
+        logger.error(f"Error in enqueue_due_digests job: {e}")
+
+
+def purge_finished_jobs():
+    """Deletes finished jobs past their retention (see job_queue.purge_finished)."""
+    db: Session = SessionLocal()
+    try:
+        return job_queue.purge_finished(db)
     finally:
         db.close()
-    
-    logger.info("Finished daily email digest job.")
+
+
+async def purge_jobs():
+    """
+    Scheduled job (daily, in every uvicorn worker — deleting twice is
+    harmless): keeps the jobs table at JOB_RETENTION_DAYS of history.
+    """
+    try:
+        count = await asyncio.to_thread(purge_finished_jobs)
+        logger.info(f"Purged {count} finished jobs.")
+    except Exception as e:
+        logger.error(f"Error in purge_jobs job: {e}")
+
+
+@job_handler("digest")
+async def send_digests(jobs: list[Job]) -> list[str | None]:
+    """
+    Sends a batch of digest jobs: the digests are built in two queries
+    (build_digests) and handed to the delivery engine, which sends them
+    over a few persistent SMTP connections. A job fails only if its own
+    message couldn't be delivered; users who since turned notifications
+    off (or left) are skipped.
+    """
+    global last_digest_delivery
+
+    def load() -> list:
+        db: Session = ReadSessionLocal()
+        try:
+            users = db.scalars(select(User).where(
+                User.id.in_([job.payload["user_id"] for job in jobs]),
+                User.is_active, User.notifications_enabled,
+            )).all()
+            return build_digests(db, users)
+        finally:
+            db.close()
+
+    digests = {digest.user.id: digest for digest in await asyncio.to_thread(load)}
+    mailer = MailDeliveryEngine.from_env()
+    async with mailer:
+        delivered = {user_id: await send_digest(digest, mailer) for user_id, digest in digests.items()}
+    last_digest_delivery = mailer.stats()
+
+    errors = []
+    for job in jobs:
+        future = delivered.get(job.payload["user_id"])
+        errors.append(None if future is None or future.result() else "digest delivery failed")
+    return errors
 
 def setup_scheduler():
-    # Run every day at 09:00 AM UTC (adjust as needed, or trigger per user timezone)
-    scheduler.add_job(send_daily_digests, CronTrigger(hour=9, minute=0))
+    # Every slot, for the timezones that just reached the send hour.
+    # A run that starts late keeps its slot (see digest_service.slot_start),
+    # so allow it to start up to one slot late rather than skipping it.
+    scheduler.add_job(
+        enqueue_due_digests,
+        CronTrigger(minute=f"*/{DIGEST_SLOT_MINUTES}", timezone="UTC"),
+        misfire_grace_time=DIGEST_SLOT_MINUTES * 60,
+        coalesce=True,
+    )
+    scheduler.add_job(purge_jobs, CronTrigger(hour=3, minute=30, timezone="UTC"), coalesce=True)
     scheduler.start()
     logger.info("Scheduler started.")
 
@@ -1,11 +1,20 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy import select, Select, bindparam, values, column, Integer, DateTime
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+import asyncio
+import logging
+import os
 import pytz
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 
 from app.models.user import User
 from app.models.task import Task, TaskStatus
 from app.services.email_service import send_email
+from app.services.mail_delivery import MailDeliveryEngine
+
+logger = logging.getLogger(__name__)
 
 def format_time(mins: float) -> str:
     if not mins:
@@ -14,81 +23,258 @@ def format_time(mins: float) -> str:
     m = int(mins % 60)
     return f"{h}h {m}min" if h > 0 else f"{m}min"
 
+# The status filters are rendered as SQL literals (literal_execute) instead of
+# bound parameters: the planner can only use a partial index when it can see
+# the query's status matches the index's WHERE clause, and with a prepared
+# statement it can't see inside a parameter.
+COMPLETED = bindparam("completed_status", TaskStatus.completed, literal_execute=True)
+OPEN_STATUSES = bindparam(
+    "open_statuses", [TaskStatus.planned, TaskStatus.in_progress],
+    expanding=True, literal_execute=True
+)
+
+
+# ─── Batch Queries ────────────────────────────────────────────────────────────
+# SYSTEM DESIGN CONCEPT — Set-Based Instead of Per-Row:
+# Asking "what did user X complete yesterday?" once per user costs 2 round
+# trips per user — 200k for 100k users. Instead we send one chunk of users'
+# windows along as a VALUES list (a CTE) and join tasks against it, so a
+# whole chunk takes two queries. Each user's "yesterday" is different
+# (timezones), which is why the windows travel with the query rather than
+# being a single WHERE bound. Per user, the join still probes the same
+# partial indexes the single-user queries did.
+
+def digest_windows(rows: list[tuple[int, datetime, datetime]]):
+    """
+    VALUES CTE (user_id, window_start, window_end) — each user's
+    "yesterday" in their own timezone, as UTC instants.
+    """
+    return values(
+        column("user_id", Integer),
+        column("window_start", DateTime(timezone=True)),
+        column("window_end", DateTime(timezone=True)),
+        name="windows",
+    ).data(rows).cte("windows")
+
+
+def completed_tasks_query(windows) -> Select:
+    """Tasks each user completed inside their window. Served by ix_tasks_completed_by_user."""
+    return (
+        select(Task.user_id, Task.title, Task.actual_time, Task.estimated_time)
+        .join(windows, windows.c.user_id == Task.user_id)
+        .where(
+            Task.status == COMPLETED,
+            Task.completed_at >= windows.c.window_start,
+            Task.completed_at <= windows.c.window_end,
+        )
+        .order_by(Task.user_id, Task.completed_at)
+    )
+
+
+def overdue_tasks_query(windows) -> Select:
+    """Still-open tasks whose deadline passed by the end of the window. Served by ix_tasks_open_by_deadline."""
+    return (
+        select(Task.user_id, Task.title, Task.actual_time, Task.estimated_time)
+        .join(windows, windows.c.user_id == Task.user_id)
+        .where(
+            Task.status.in_(OPEN_STATUSES),
+            Task.deadline <= windows.c.window_end,
+        )
+        .order_by(Task.user_id, Task.deadline)
+    )
+
+
+DIGEST_RECIPIENT_CHUNK_SIZE = 1000
+DIGEST_SEND_HOUR = int(os.getenv("DIGEST_SEND_HOUR", 9))     # local time
+DIGEST_SLOT_MINUTES = 15                                    # how often the job runs
+
+
+# ─── Timezone Sharding ────────────────────────────────────────────────────────
+# SYSTEM DESIGN CONCEPT — Spread the Load by Local Time:
+# One 09:00-UTC run mailed everyone at once (and at 2am for some of them).
+# Instead the job runs every DIGEST_SLOT_MINUTES and only picks the users
+# whose local clock has just reached DIGEST_SEND_HOUR, so the work is
+# spread over the day the same way our users are spread over the globe.
+#
+# We shard by timezone *name*, not by UTC offset: a zone's offset changes
+# with DST, its name doesn't. Every real offset is a multiple of 15
+# minutes, so with 15-minute slots each zone is due in exactly one slot a day.
+
+def slot_start(now: datetime) -> datetime:
+    """The DIGEST_SLOT_MINUTES slot `now` falls in (a late-running job keeps its slot)."""
+    return now.replace(minute=now.minute - now.minute % DIGEST_SLOT_MINUTES, second=0, microsecond=0)
+
+
+def timezones_due(now: datetime | None = None, send_hour: int = DIGEST_SEND_HOUR) -> list[str]:
+    """Names of the timezones where it's send_hour:00 at the start of the current slot."""
+    start = slot_start(now or datetime.now(pytz.utc))
+    return [
+        name for name in pytz.all_timezones
+        if (local := start.astimezone(pytz.timezone(name))).hour == send_hour and local.minute == 0
+    ]
+
+
+def digest_recipients_query(
+    after_id: int = 0, limit: int = DIGEST_RECIPIENT_CHUNK_SIZE, timezone: str | None = None
+) -> Select:
+    """
+    One keyset page of users who should get a digest: active, notifications
+    on, id > after_id, and (if given) in `timezone`. With a timezone it's a
+    range read of ix_users_digest_timezone, already in id order — no scan,
+    no sort, however many users there are.
+    """
+    query = (
+        select(User)
+        .where(User.is_active, User.notifications_enabled, User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    if timezone is not None:
+        query = query.where(User.timezone == timezone)
+    return query
+
+
+def iter_digest_recipients(
+    db: Session, chunk_size: int = DIGEST_RECIPIENT_CHUNK_SIZE, timezones: list[str] | None = None
+):
+    """
+    Yields chunks (lists) of recipients — of every timezone, or only of
+    `timezones`, one zone after the other. The session is cleared between
+    chunks, so memory stays at one chunk's worth of users (plus their
+    tasks) instead of growing with the user table.
+    """
+    for timezone in (timezones if timezones is not None else [None]):
+        after_id = 0
+        while True:
+            users = db.scalars(digest_recipients_query(after_id, chunk_size, timezone)).all()
+            if not users:
+                break
+            yield users
+            after_id = users[-1].id
+            db.expunge_all()
+
+
+def yesterday_window(timezone: str | None, now: datetime | None = None) -> tuple[date, datetime, datetime]:
+    """
+    (yesterday's date, its first instant, its last instant) in the given
+    timezone, with the instants converted to UTC. The digest runs in the
+    morning and summarizes yesterday.
+    """
+    tz = pytz.timezone(timezone or "UTC")
+    now = now or datetime.now(pytz.utc)
+    day = now.astimezone(tz).date() - timedelta(days=1)
+    start = tz.localize(datetime.combine(day, time.min)).astimezone(pytz.utc)
+    end = tz.localize(datetime.combine(day, time.max)).astimezone(pytz.utc)
+    return day, start, end
+
+
+def digest_timezone(user: User) -> str:
+    """
+    The user's timezone, or UTC if pytz doesn't know it — one bad stored
+    value must not stop the digests of the rest of the chunk.
+    """
+    try:
+        pytz.timezone(user.timezone or "UTC")
+    except pytz.UnknownTimeZoneError:
+        logger.warning(f"User {user.id}: unknown timezone {user.timezone!r}, digest uses UTC")
+        return "UTC"
+    return user.timezone or "UTC"
+
+
+class UserDigest:
+    """Everything the digest email for one user needs."""
+
+    def __init__(self, user: User, day: date, completed: list, overdue: list):
+        self.user = user
+        self.day = day
+        self.completed = completed      # rows with title, actual_time, estimated_time
+        self.overdue = overdue
+
+    @property
+    def total_completed_time(self) -> float:
+        return sum([t.actual_time or t.estimated_time or 0 for t in self.completed])
+
+    @property
+    def subject(self) -> str:
+        return f"Your Calibrate Digest: {len(self.completed)} tasks completed"
+
+
+def build_digests(db: Session, users: list[User]) -> list[UserDigest]:
+    """
+    Digest data for a whole chunk of users in two queries (see Batch Queries
+    above), in the order of `users`.
+    """
+    if not users:
+        return []
+    now = datetime.now(pytz.utc)
+    days, rows = {}, []
+    for user in users:
+        days[user.id], start, end = yesterday_window(digest_timezone(user), now)
+        rows.append((user.id, start, end))
+    windows = digest_windows(rows)
+
+    completed = defaultdict(list)
+    for row in db.execute(completed_tasks_query(windows)):
+        completed[row.user_id].append(row)
+    overdue = defaultdict(list)
+    for row in db.execute(overdue_tasks_query(windows)):
+        overdue[row.user_id].append(row)
+
+    return [
+        UserDigest(user, days[user.id], completed[user.id], overdue[user.id])
+        for user in users
+    ]
+
+
+# ─── Rendering ───────────────────────────────────────────────────────────────
+#
+# SYSTEM DESIGN CONCEPT — Compile Once, Render Many:
+# The templates (app/templates/email) are parsed and compiled to Python
+# code once, when this module loads, and kept: auto_reload is off, so
+# nothing re-reads or re-checks the files per user. In the compiled code
+# the static markup — header, stat cards, footer — is a set of string
+# constants emitted as-is, so per user we only evaluate the few
+# expressions and loops. HTML is autoescaped, so a task titled
+# "<script>" arrives as text; the plain-text part is not escaped.
+
+_templates = Environment(
+    loader=FileSystemLoader(Path(__file__).resolve().parent.parent / "templates" / "email"),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_templates.filters["format_time"] = format_time
+DIGEST_HTML = _templates.get_template("digest.html")
+DIGEST_TEXT = _templates.get_template("digest.txt")
+
+
+def render_digest_html(digest: UserDigest) -> str:
+    return DIGEST_HTML.render(digest=digest)
+
+
+def render_digest_text(digest: UserDigest) -> str:
+    return DIGEST_TEXT.render(digest=digest)
+
+
+async def send_digest(digest: UserDigest, mailer: MailDeliveryEngine | None = None):
+    """
+    Queues the digest on `mailer` (the digest job) and returns the delivery
+    future from MailDeliveryEngine.submit(), or sends it right away.
+    """
+    html, text = render_digest_html(digest), render_digest_text(digest)
+    if mailer is not None:
+        return await mailer.submit(digest.user.email, digest.subject, html, text)
+    else:
+        await send_email(digest.subject, digest.user.email, html, text)
+
+
 async def generate_user_digest(db: Session, user: User):
     """
-    Fetches the user's tasks for today (or the previous day if running at midnight)
-    and constructs the HTML for the daily digest email.
-    """
-    # Using UTC for simplicity; in production, use user's timezone from user.preferences
-    tz = pytz.timezone(user.preferences.get("timezone", "UTC"))
-    now = datetime.now(tz)
-    
-    # Calculate start and end of "yesterday" (or "today" depending on when this runs)
-    # Let's say this runs at 9AM. We summarize what happened *yesterday*.
-    yesterday = now - timedelta(days=1)
-    start_of_day = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-    # 1. Fetch completed tasks
-    completed_tasks = db.query(Task).filter(
-        Task.user_id == user.id,
-        Task.status == TaskStatus.completed,
-        Task.completed_at >= start_of_day,
-        Task.completed_at <= end_of_day
-    ).all()
-
-    # 2. Fetch overdue/deferred tasks
-    in_progress_tasks = db.query(Task).filter(
-        Task.user_id == user.id,
-        Task.status.in_([TaskStatus.planned, TaskStatus.in_progress]),
-        Task.deadline <= end_of_day
-    ).all()
-
-    # Calculate metrics
-    total_completed_time = sum([t.actual_time or t.estimated_time or 0 for t in completed_tasks])
-    num_completed = len(completed_tasks)
-    num_overdue = len(in_progress_tasks)
-
-    # Build HTML
-    html_content = f"""
-    <html>
-        <body style="font-family: Arial, sans-serif; background-color: #f6f5f4; color: #1c1917; padding: 20px;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border: 1px solid #e7e5e4; padding: 30px; border-radius: 4px;">
-                <h2 style="color: #b91c1c; margin-top: 0;">Calibrate Daily Digest</h2>
-                <p>Hello {user.full_name or 'User'},</p>
-                <p>Here is your summary for <strong>{yesterday.strftime('%A, %B %d')}</strong>:</p>
-                
-                <div style="display: flex; gap: 20px; margin-bottom: 20px;">
-                    <div style="background-color: #fef2f2; border-left: 4px solid #b91c1c; padding: 15px; flex: 1;">
-                        <div style="font-size: 10px; font-weight: bold; color: #78716c; text-transform: uppercase;">Time Completed</div>
-                        <div style="font-size: 24px; font-weight: bold; margin-top: 5px;">{format_time(total_completed_time)}</div>
-                    </div>
-                    <div style="background-color: #f5f5f4; border-left: 4px solid #a8a29e; padding: 15px; flex: 1;">
-                        <div style="font-size: 10px; font-weight: bold; color: #78716c; text-transform: uppercase;">Tasks Done</div>
-                        <div style="font-size: 24px; font-weight: bold; margin-top: 5px;">{num_completed}</div>
-                    </div>
-                </div>
-
-                <h3>✅ Completed Tasks</h3>
-                <ul style="padding-left: 20px;">
-                    { ''.join([f"<li>{t.title} <em>({format_time(t.actual_time or t.estimated_time)})</em></li>" for t in completed_tasks]) or "<li>No tasks completed yesterday.</li>" }
-                </ul>
-
-                <h3>⚠️ Rollover/Overdue Tasks</h3>
-                <ul style="padding-left: 20px;">
-                    { ''.join([f"<li>{t.title} <em>({format_time(t.estimated_time)})</em></li>" for t in in_progress_tasks]) or "<li>No overdue tasks! Great job.</li>" }
-                </ul>
-
-                <br />
-                <hr style="border: none; border-top: 1px solid #e7e5e4;" />
-                <p style="font-size: 11px; color: #a8a29e; text-align: center; margin-top: 20px;">
-                    You are receiving this because your daily notifications are enabled in Calibrate.<br/>
-                    <a href="#" style="color: #b91c1c;">Update Preferences</a>
-                </p>
-            </div>
-        </body>
-    </html>
-    """
-    
-    subject = f"Your Calibrate Digest: {num_completed} tasks completed"
-    await send_email(subject, user.email, html_content)
+    Builds and sends one user's daily digest (POST /tasks/test-digest).
+    The scheduler uses build_digests() directly, a chunk of users at a time.
+    The queries run on a worker thread: db is a sync Session, and blocking
+    on it here would stall the event loop.
+    """
+    (digest,) = await asyncio.to_thread(build_digests, db, [user])
+    await send_digest(digest)
@@ -1,5 +1,5 @@
 import os
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType, MultipartSubtypeEnum
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,15 +18,18 @@ conf = ConnectionConfig(
 
 fast_mail = FastMail(conf)
 
-async def send_email(subject: str, email_to: str, body: str):
+async def send_email(subject: str, email_to: str, body: str, text: str | None = None):
     """
-    Sends an email using fastapi-mail.
+    Sends an email using fastapi-mail. `body` is HTML; `text`, if given,
+    goes along as the plain-text alternative.
     """
     message = MessageSchema(
         subject=subject,
         recipients=[email_to],
         body=body,
-        subtype=MessageType.html
+        subtype=MessageType.html,
+        alternative_body=text,
+        multipart_subtype=MultipartSubtypeEnum.alternative if text is not None else MultipartSubtypeEnum.mixed,
     )
 
     try:
@@ -0,0 +1,211 @@
+"""
+services/job_queue.py — Durable Job Queue
+
+WHAT THIS FILE DOES:
+Queue operations on the jobs table (models/job.py): enqueue, claim,
+heartbeat, complete, fail, purge_finished. services/job_worker.py runs the loop that
+uses them; every uvicorn worker runs one.
+
+SYSTEM DESIGN CONCEPT — The Database as a Work Queue:
+  - Claiming: UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED
+    LIMIT n) RETURNING. Concurrent claimers skip rows another one has
+    locked instead of waiting for them, so N workers pull N disjoint
+    batches and throughput grows with the worker count.
+  - Leases: a claimed job belongs to its worker until lease_expires_at.
+    The worker heartbeats (pushes the lease forward) while it runs. If
+    the worker crashes, the lease runs out and another worker claims the
+    job again — nothing is lost with the crashed process.
+  - Fencing: complete()/fail() only apply if the job is still leased to
+    the caller, so a worker that stalled past its lease can't overwrite
+    the result of whoever took the job over.
+  - Idempotency: dedupe_key is unique and enqueue() ignores duplicates,
+    so e.g. every API worker may enqueue "digest for user 42 on March 1"
+    and it still exists (and is sent) once.
+  - Retries: a failed attempt goes back to the queue with exponential
+    backoff until max_attempts, then stays "failed" with its last error.
+  - Retention: finished jobs are kept JOB_RETENTION_DAYS for inspection,
+    then deleted (purge_finished, daily from the scheduler) — otherwise
+    the table and its dedupe_key index grow by a row per user per day.
+"""
+
+from datetime import datetime, timedelta, timezone
+import os
+
+from sqlalchemy import and_, delete, or_, select, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.job import Job, JobStatus
+
+RETRY_BACKOFF_SECONDS = 30
+# A purged job's dedupe_key can be enqueued again, so this must outlast the
+# window in which a key is re-enqueued (a digest's is for yesterday: ~2 days)
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 7))
+PURGE_BATCH_SIZE = 10_000
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db: Session, kind: str, jobs: list[dict], max_attempts: int = 3) -> None:
+    """
+    Adds jobs of one kind: [{"payload": {...}, "dedupe_key": "...", "run_at": ...}, ...]
+    (dedupe_key and run_at optional). Jobs whose dedupe_key already exists
+    are skipped. Doesn't commit.
+    """
+    if not jobs:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    now = utcnow()
+    rows = [
+        {
+            "kind": kind,
+            "payload": job.get("payload", {}),
+            "dedupe_key": job.get("dedupe_key"),
+            "run_at": job.get("run_at") or now,
+            "max_attempts": max_attempts,
+            "status": JobStatus.queued,
+        }
+        for job in jobs
+    ]
+    db.execute(insert(Job).on_conflict_do_nothing(index_elements=["dedupe_key"]), rows)
+
+
+def claim(db: Session, worker_id: str, kinds: list[str], limit: int, lease_seconds: float) -> list[Job]:
+    """
+    Leases up to `limit` runnable jobs to `worker_id` and commits: queued
+    jobs that are due, plus running jobs whose lease expired (their worker
+    died). Each claim counts as an attempt. The jobs come back detached,
+    so they outlive the session.
+    """
+    now = utcnow()
+
+    # Jobs whose worker died on their last allowed attempt: give up on them
+    db.execute(
+        update(Job)
+        .where(
+            Job.kind.in_(kinds),
+            Job.status == JobStatus.running,
+            Job.lease_expires_at < now,
+            Job.attempts >= Job.max_attempts,
+        )
+        .values(status=JobStatus.failed, finished_at=now, locked_by=None,
+                last_error=func.coalesce(Job.last_error, "lease expired"))
+    )
+
+    runnable = (
+        select(Job.id)
+        .where(
+            Job.kind.in_(kinds),
+            or_(
+                and_(Job.status == JobStatus.queued, Job.run_at <= now),
+                and_(Job.status == JobStatus.running, Job.lease_expires_at < now),
+            ),
+        )
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.scalars(
+        update(Job)
+        .where(Job.id.in_(runnable.scalar_subquery()))
+        .values(
+            status=JobStatus.running,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=Job.attempts + 1,
+        )
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    ).all()
+    for job in claimed:
+        db.expunge(job)     # or commit would expire them
+    db.commit()
+    return claimed
+
+
+def heartbeat(db: Session, worker_id: str, job_ids: list[int], lease_seconds: float) -> None:
+    """Extends the lease on jobs this worker still holds, and commits."""
+    if not job_ids:
+        return
+    db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.locked_by == worker_id, Job.status == JobStatus.running)
+        .values(lease_expires_at=utcnow() + timedelta(seconds=lease_seconds))
+    )
+    db.commit()
+
+
+def _held_by(worker_id: str, job: Job):
+    # attempts pins this exact claim: if the lease expired and the job was
+    # claimed again (even by the same worker), the old claim no longer matches
+    return and_(
+        Job.id == job.id,
+        Job.locked_by == worker_id,
+        Job.status == JobStatus.running,
+        Job.attempts == job.attempts,
+    )
+
+
+def complete(db: Session, worker_id: str, job: Job) -> bool:
+    """Marks the job succeeded, if we still hold it. Returns whether we did. Doesn't commit."""
+    result = db.execute(
+        update(Job)
+        .where(_held_by(worker_id, job))
+        .values(status=JobStatus.succeeded, finished_at=utcnow(), locked_by=None, lease_expires_at=None)
+    )
+    return result.rowcount == 1
+
+
+def fail(db: Session, worker_id: str, job: Job, error: str) -> bool:
+    """
+    Records a failed attempt, if we still hold the job: back to the queue
+    after RETRY_BACKOFF_SECONDS x 2^(attempts-1), or "failed" for good once
+    attempts reach max_attempts. Returns whether we did. Doesn't commit.
+    """
+    now = utcnow()
+    if job.attempts >= job.max_attempts:
+        values = {"status": JobStatus.failed, "finished_at": now}
+    else:
+        delay = RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        values = {"status": JobStatus.queued, "run_at": now + timedelta(seconds=delay)}
+    result = db.execute(
+        update(Job)
+        .where(_held_by(worker_id, job))
+        .values(**values, last_error=error[:2000], locked_by=None, lease_expires_at=None)
+    )
+    return result.rowcount == 1
+
+
+def purge_finished(
+    db: Session, older_than: timedelta = timedelta(days=JOB_RETENTION_DAYS), batch_size: int = PURGE_BATCH_SIZE
+) -> int:
+    """
+    Deletes succeeded and failed jobs that finished more than `older_than`
+    ago, batch_size at a time with a commit after each batch, so no
+    transaction holds many locks. Returns how many it deleted.
+    """
+    cutoff = utcnow() - older_than
+    deleted = 0
+    while True:
+        batch = (
+            select(Job.id)
+            .where(Job.status.in_([JobStatus.succeeded, JobStatus.failed]), Job.finished_at < cutoff)
+            .limit(batch_size)
+        )
+        result = db.execute(
+            delete(Job).where(Job.id.in_(batch.scalar_subquery())).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def queue_stats(db: Session) -> dict:
+    """Job counts per kind and status."""
+    stats: dict[str, dict[str, int]] = {}
+    for kind, status, count in db.execute(select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status)):
+        stats.setdefault(kind, {})[status.value] = count
+    return stats
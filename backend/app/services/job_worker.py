@@ -0,0 +1,197 @@
+"""
+services/job_worker.py — Background Job Worker
+
+WHAT THIS FILE DOES:
+  - job_handler(kind): registers the coroutine that runs jobs of a kind
+  - JobWorker: claims batches of jobs (services/job_queue.py), runs them
+    through their handler, heartbeats while they run, and records each
+    job's outcome. The app lifespan starts one per uvicorn worker.
+
+SYSTEM DESIGN CONCEPT — Many Workers, One Queue:
+The scheduler only decides *what* is due and enqueues it; any worker
+does the work. Jobs are claimed with SKIP LOCKED, so four uvicorn
+workers split the digest run four ways instead of each sending all of
+it, and a worker that dies mid-batch only delays its jobs until their
+lease runs out.
+
+Handlers take a batch of jobs of their kind and return one entry per job:
+None for success, or an error message (the job is retried with backoff).
+Batches let a handler keep the batch-query tricks of the code it
+replaces — e.g. the digest handler builds 200 digests in two queries.
+"""
+
+from typing import Awaitable, Callable
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import SessionLocal
+from app.models.job import Job
+from app.services import job_queue
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[list[Job]], Awaitable[list[str | None]]]
+
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Decorator: `fn` runs the jobs of this kind."""
+    def register(fn: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class JobWorker:
+    """
+    Usage (see main.lifespan):
+        worker = JobWorker.from_env()
+        worker.start()
+        ...
+        await worker.stop()
+    run_once() processes a single batch — what the loop calls, and what tests use.
+    """
+
+    def __init__(
+        self,
+        kinds: list[str] | None = None,
+        batch_size: int = 200,
+        lease_seconds: float = 60,
+        poll_seconds: float = 5,
+        session_factory: sessionmaker = SessionLocal,
+    ):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.kinds = kinds
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+        self.claimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.lost = 0       # finished after our lease ran out — someone else has the job now
+
+    @classmethod
+    def from_env(cls) -> "JobWorker":
+        return cls(
+            batch_size=int(os.environ.get("JOB_BATCH_SIZE", 200)),
+            lease_seconds=float(os.environ.get("JOB_LEASE_SECONDS", 60)),
+            poll_seconds=float(os.environ.get("JOB_POLL_SECONDS", 5)),
+        )
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops claiming. A batch that's still running is abandoned; its leases
+        run out and another worker picks the jobs up.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"job worker {self.worker_id}: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_seconds)   # queue drained: poll, don't spin
+
+    # ─── One batch ────────────────────────────────────────────────────────────
+
+    async def run_once(self) -> int:
+        """Claims one batch, runs it, and records the outcomes. Returns how many jobs it claimed."""
+        kinds = self.kinds or list(JOB_HANDLERS)
+        jobs = await asyncio.to_thread(self._with_session, job_queue.claim,
+                                       self.worker_id, kinds, self.batch_size, self.lease_seconds)
+        if not jobs:
+            return 0
+        self.claimed += len(jobs)
+
+        heartbeat = asyncio.create_task(self._heartbeat([job.id for job in jobs]))
+        try:
+            by_kind: dict[str, list[Job]] = {}
+            for job in jobs:
+                by_kind.setdefault(job.kind, []).append(job)
+            outcomes = []
+            for kind, batch in by_kind.items():
+                outcomes.extend(zip(batch, await self._handle(kind, batch)))
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        await asyncio.to_thread(self._record, outcomes)
+        return len(jobs)
+
+    async def _handle(self, kind: str, jobs: list[Job]) -> list[str | None]:
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            return [f"no handler for job kind {kind!r}"] * len(jobs)
+        try:
+            errors = await handler(jobs)
+        except Exception as e:
+            logger.error(f"job worker: {kind} batch of {len(jobs)} failed: {e}")
+            return [f"{type(e).__name__}: {e}"] * len(jobs)
+        if len(errors) != len(jobs):
+            return [f"handler returned {len(errors)} results for {len(jobs)} jobs"] * len(jobs)
+        return errors
+
+    async def _heartbeat(self, job_ids: list[int]) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self._with_session, job_queue.heartbeat,
+                                        self.worker_id, job_ids, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"job worker {self.worker_id}: heartbeat failed: {e}")
+
+    def _record(self, outcomes: list[tuple[Job, str | None]]) -> None:
+        db = self.session_factory()
+        try:
+            for job, error in outcomes:
+                if error is None:
+                    held = job_queue.complete(db, self.worker_id, job)
+                    self.succeeded += held
+                else:
+                    held = job_queue.fail(db, self.worker_id, job, error)
+                    self.failed += held
+                if not held:
+                    self.lost += 1
+                    logger.warning(f"job worker {self.worker_id}: lost the lease on job {job.id}")
+            db.commit()
+        finally:
+            db.close()
+
+    def _with_session(self, operation, *args):
+        db = self.session_factory()
+        try:
+            return operation(db, *args)
+        finally:
+            db.close()
+
+    # ─── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": self._task is not None and not self._task.done(),
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "lost_leases": self.lost,
+        }
@@ -0,0 +1,295 @@
+"""
+services/mail_delivery.py — Bulk Email Delivery Engine
+
+Used by the 9am digest job. send_email() (email_service.py) is still
+fine for one-off messages like the test digest.
+
+SYSTEM DESIGN CONCEPT — Reuse Connections, Bound Concurrency:
+send_email opens a fresh SMTP connection per message (TCP + TLS + AUTH:
+several round trips before the message itself) and the job used to
+await each one in turn. Here:
+  - MAIL_CONNECTIONS workers each hold one persistent SMTP connection and
+    send message after message over it (reconnecting every
+    MAIL_MESSAGES_PER_CONNECTION messages, since servers cap that).
+  - Messages go through a bounded queue (MAIL_QUEUE_SIZE). When the
+    workers fall behind, submit() waits — the job building digests
+    slows down instead of piling every rendered email into memory.
+  - Transient failures (dropped connection, timeouts, 4xx replies) are
+    retried with exponential backoff on a fresh connection; permanent
+    ones (5xx) are counted and logged, never retried.
+  - submit() returns a future that resolves to whether that message was
+    delivered, so a caller (the digest job handler) can tell which
+    recipients to retry.
+  - stats() reports sent / failed / retried and messages per second.
+"""
+
+from email.message import EmailMessage
+from time import monotonic
+import asyncio
+import logging
+import os
+import random
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() == "true"
+
+
+class SMTPSettings:
+    """Connection settings — the same MAIL_* variables email_service.py reads."""
+
+    def __init__(
+        self,
+        hostname: str = "localhost",
+        port: int = 25,
+        sender: str = "hello@calibrate.app",
+        username: str | None = None,
+        password: str | None = None,
+        start_tls: bool = False,
+        use_tls: bool = False,
+        validate_certs: bool = True,
+        timeout: float = 30,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls) -> "SMTPSettings":
+        use_credentials = _env_bool("USE_CREDENTIALS", "True")
+        return cls(
+            hostname=os.environ.get("MAIL_SERVER", "sandbox.smtp.mailtrap.io"),
+            port=int(os.environ.get("MAIL_PORT", 2525)),
+            sender=os.environ.get("MAIL_FROM", "hello@calibrate.app"),
+            username=os.environ.get("MAIL_USERNAME", "fake_user") if use_credentials else None,
+            password=os.environ.get("MAIL_PASSWORD", "fake_password") if use_credentials else None,
+            start_tls=_env_bool("MAIL_STARTTLS", "True"),
+            use_tls=_env_bool("MAIL_SSL_TLS", "False"),
+            validate_certs=_env_bool("VALIDATE_CERTS", "True"),
+        )
+
+
+class PermanentDeliveryError(Exception):
+    """The server rejected the message for good (5xx) — retrying won't help."""
+
+
+def build_message(sender: str, to: str, subject: str, html: str, text: str | None = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to
+    message["Subject"] = subject
+    if text is None:
+        message.set_content(html, subtype="html")
+    else:
+        message.set_content(text)
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+class MailDeliveryEngine:
+    """
+    Usage:
+        async with MailDeliveryEngine.from_env() as mailer:
+            for ...:
+                delivered = await mailer.submit(to, subject, html)   # a future
+        # leaving the block waits until everything is sent (or has failed)
+    """
+
+    def __init__(
+        self,
+        settings: SMTPSettings,
+        connections: int = 4,
+        queue_size: int = 1000,
+        max_attempts: int = 3,
+        backoff_seconds: float = 1.0,
+        messages_per_connection: int = 100,
+    ):
+        self.settings = settings
+        self.connections = connections
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.messages_per_connection = messages_per_connection
+        self._queue: asyncio.Queue[tuple[EmailMessage, asyncio.Future]] = asyncio.Queue(maxsize=queue_size)
+        self._workers: list[asyncio.Task] = []
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.connects = 0
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+
+    @classmethod
+    def from_env(cls) -> "MailDeliveryEngine":
+        return cls(
+            SMTPSettings.from_env(),
+            connections=int(os.environ.get("MAIL_CONNECTIONS", 4)),
+            queue_size=int(os.environ.get("MAIL_QUEUE_SIZE", 1000)),
+            max_attempts=int(os.environ.get("MAIL_MAX_ATTEMPTS", 3)),
+            backoff_seconds=float(os.environ.get("MAIL_RETRY_BACKOFF_SECONDS", 1.0)),
+            messages_per_connection=int(os.environ.get("MAIL_MESSAGES_PER_CONNECTION", 100)),
+        )
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────────
+
+    async def __aenter__(self) -> "MailDeliveryEngine":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        self._started_at = monotonic()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.connections)]
+
+    async def close(self) -> None:
+        """Waits for every queued message to be sent or given up on, then disconnects."""
+        await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._finished_at = monotonic()
+
+    async def submit(self, to: str, subject: str, html: str, text: str | None = None) -> asyncio.Future:
+        """
+        Queues one message. Waits only if the queue is full (backpressure).
+        Returns a future that resolves to True once the message is sent, or
+        False if it was given up on — it never raises.
+        """
+        delivered = asyncio.get_running_loop().create_future()
+        await self._queue.put((build_message(self.settings.sender, to, subject, html, text), delivered))
+        return delivered
+
+    # ─── Workers ──────────────────────────────────────────────────────────────
+
+    async def _worker(self) -> None:
+        connection = _WorkerConnection(self)
+        try:
+            while True:
+                message, delivered = await self._queue.get()
+                try:
+                    try:
+                        result = await self._deliver(connection, message)
+                    except Exception as e:
+                        # Anything _deliver doesn't expect (a bad message, a bug):
+                        # give up on this message, keep the worker alive, and
+                        # still resolve the future — submit() promises it never raises
+                        connection.drop()
+                        self._give_up(message, e)
+                        result = False
+                    if not delivered.done():
+                        delivered.set_result(result)
+                finally:
+                    self._queue.task_done()
+        finally:
+            await connection.close()
+
+    async def _deliver(self, connection: "_WorkerConnection", message: EmailMessage) -> bool:
+        """
+        Sends one message, retrying transient failures on a fresh connection
+        after backoff_seconds x 2^(attempt-1) (with jitter, so a server
+        hiccup doesn't make every worker reconnect at the same instant).
+        Returns whether the message went out.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                smtp = await connection.get()
+                errors, _ = await smtp.send_message(message)
+                if errors:
+                    raise PermanentDeliveryError(str(errors))
+                connection.sent += 1
+                self.sent += 1
+                return True
+            except PermanentDeliveryError as e:
+                self._give_up(message, e)
+                return False
+            except aiosmtplib.SMTPRecipientsRefused as e:
+                if all(refused.code >= 500 for refused in e.recipients):
+                    self._give_up(message, e)
+                    return False
+                error = e
+            except aiosmtplib.SMTPResponseException as e:
+                if e.code >= 500:
+                    self._give_up(message, e)
+                    return False
+                error = e
+            except (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError) as e:
+                error = e
+
+            connection.drop()
+            if attempt == self.max_attempts:
+                self._give_up(message, error)
+                return False
+            self.retried += 1
+            await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    def _give_up(self, message: EmailMessage, error: Exception) -> None:
+        self.failed += 1
+        logger.error(f"mail delivery: giving up on {message['To']}: {error}")
+
+    # ─── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = (self._finished_at or monotonic()) - self._started_at
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "connections_opened": self.connects,
+            "queued": self._queue.qsize(),
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "messages_per_second": round(self.sent / elapsed, 2) if elapsed else None,
+        }
+
+
+class _WorkerConnection:
+    """One worker's persistent SMTP connection, (re)opened on demand."""
+
+    def __init__(self, engine: MailDeliveryEngine):
+        self.engine = engine
+        self.smtp: aiosmtplib.SMTP | None = None
+        self.sent = 0
+
+    async def get(self) -> aiosmtplib.SMTP:
+        if self.smtp is not None and self.smtp.is_connected and self.sent < self.engine.messages_per_connection:
+            return self.smtp
+        await self.close()
+        s = self.engine.settings
+        smtp = aiosmtplib.SMTP(
+            hostname=s.hostname, port=s.port, use_tls=s.use_tls, start_tls=s.start_tls,
+            validate_certs=s.validate_certs, timeout=s.timeout,
+        )
+        await smtp.connect()
+        if s.username:
+            await smtp.login(s.username, s.password)
+        self.engine.connects += 1
+        self.smtp, self.sent = smtp, 0
+        return smtp
+
+    def drop(self) -> None:
+        """Abandons a connection that failed mid-conversation."""
+        if self.smtp is not None:
+            self.smtp.close()
+        self.smtp = None
+
+    async def close(self) -> None:
+        if self.smtp is not None and self.smtp.is_connected:
+            try:
+                await self.smtp.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                self.smtp.close()
+        self.smtp = None
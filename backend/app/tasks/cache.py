@@ -0,0 +1,37 @@
+"""
+tasks/cache.py — Task Response Cache
+
+Caches serialized TaskListResponse pages and TaskResponse objects.
+
+SYSTEM DESIGN CONCEPT — Generation Keys:
+Every key embeds the user's tasks_version (see service.bump_tasks_version).
+A write bumps the version inside its own transaction, so the next read
+builds a new key and misses: invalidation is exact, per user, and needs
+no delete calls or cross-worker messages. Entries under old versions are
+simply never read again and fall out via LRU eviction / TTL.
+"""
+
+from urllib.parse import urlencode
+import os
+
+from app.cache import LRUCache, TieredCache, shared_cache_from_env
+
+TASK_CACHE_TTL_SECONDS = float(os.getenv("TASK_CACHE_TTL_SECONDS", 300))
+TASK_CACHE_MAX_ENTRIES = int(os.getenv("TASK_CACHE_MAX_ENTRIES", 10_000))
+
+task_cache = TieredCache(
+    "tasks",
+    LRUCache(max_entries=TASK_CACHE_MAX_ENTRIES, ttl=TASK_CACHE_TTL_SECONDS),
+    shared=shared_cache_from_env("tasks", ttl=TASK_CACHE_TTL_SECONDS),
+)
+
+
+def list_key(user_id: int, version: int, **params) -> str:
+    """Key for one page of GET /tasks — every query param that shapes the body."""
+    query = urlencode(sorted((k, "" if v is None else str(v)) for k, v in params.items()))
+    return f"{user_id}:v{version}:list:{query}"
+
+
+def detail_key(user_id: int, version: int, task_id: int, include: tuple[str, ...]) -> str:
+    """Key for GET /tasks/{id}."""
+    return f"{user_id}:v{version}:task:{task_id}:{','.join(include)}"
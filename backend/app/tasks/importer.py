@@ -0,0 +1,301 @@
+"""
+tasks/importer.py — Streaming Bulk Import
+
+Backs POST /tasks/import: reads an NDJSON or CSV upload as it arrives,
+validates each row against TaskCreate, and loads valid rows in chunks of
+IMPORT_CHUNK_SIZE.
+
+SYSTEM DESIGN CONCEPT — Bounded Memory, Bulk Load:
+Migrating a team means millions of rows, so we never hold the upload:
+  - the body is consumed chunk by chunk and split into lines (CSV
+    records, whose quoted cells may span lines, are then read from
+    those lines by a single csv.reader)
+  - valid rows accumulate until a chunk is full, then the chunk is
+    written and committed, and the buffer starts over
+  - on Postgres (asyncpg) a chunk goes in with COPY, the fastest way
+    to load rows; other databases use the multi-row INSERT from
+    service.insert_tasks()
+Bad rows never stop the import; they're reported by line number.
+"""
+
+from collections import deque
+from typing import AsyncIterator
+import codecs
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import TaskStatus
+from app.tasks import service
+from app.tasks.schemas import TaskCreate, ImportResponse, ImportRowError
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+MAX_CSV_RECORD_LINES = 1000     # a quote left open can't make us buffer the rest of the upload
+MAX_LINE_LENGTH = 1_000_000     # characters; an upload without newlines can't be buffered whole either
+
+TASK_COPY_COLUMNS = [
+    "id", "user_id", "title", "description", "task_type", "priority", "status",
+    "deadline", "scheduled_date", "estimated_time", "optimistic_time",
+    "realistic_time", "pessimistic_time",
+]
+SUBTASK_COPY_COLUMNS = ["task_id", "description", "estimated_time", "order", "is_completed", "is_implicit"]
+
+
+async def _lines(body: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str | ValueError]]:
+    """
+    Splits a streamed body into (line_number, line) without buffering it.
+    A line longer than MAX_LINE_LENGTH is dropped as it arrives and comes
+    through as a ValueError instead.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    oversized = False           # pending is the tail of a line already too long
+    line_number = 0
+
+    def line_or_error(line: str):
+        if oversized or len(line) > MAX_LINE_LENGTH:
+            return ValueError(f"line longer than {MAX_LINE_LENGTH} characters")
+        return line.rstrip("\r")
+
+    async for chunk in body:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            line_number += 1
+            yield line_number, line_or_error(line)
+            oversized = False
+        if len(pending) > MAX_LINE_LENGTH:
+            pending, oversized = "", True
+    pending += decoder.decode(b"", final=True)
+    if pending or oversized:
+        yield line_number + 1, line_or_error(pending)
+
+
+def _parse_ndjson(line: str) -> dict:
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError("each line must be a JSON object")
+    return row
+
+
+class _LineFeed:
+    """The iterator csv.reader reads from: lines are appended as they arrive."""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _csv_records(body: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, list[str] | csv.Error]]:
+    """
+    (first line number, cells) per CSV record — or the csv.Error it raised.
+    One csv.reader reads the whole body, so a quoted cell with newlines in
+    it (a multi-line description from the export) stays one record. The
+    reader is only advanced once the lines fed to it close every quote
+    they open, so it never runs out of input mid-record. A record still
+    open after MAX_CSV_RECORD_LINES lines, or one with a line longer than
+    MAX_LINE_LENGTH, is dropped as an error.
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    open_quotes = 0
+
+    def discard_fed_lines() -> None:
+        # Let the reader take the lines, so its line count stays right
+        while feed.lines:
+            try:
+                next(reader)
+            except csv.Error:
+                pass
+
+    async for _, line in _lines(body):
+        if isinstance(line, ValueError):
+            # Ends any record in progress; an empty line stands in for the dropped one
+            first_line = reader.line_num + 1
+            feed.lines.append("\n")
+            open_quotes = 0
+            discard_fed_lines()
+            yield first_line, csv.Error(str(line))
+            continue
+        feed.lines.append(line + "\n")
+        open_quotes = (open_quotes + line.count('"')) % 2
+        if open_quotes and len(feed.lines) < MAX_CSV_RECORD_LINES:
+            continue
+        if open_quotes:
+            first_line = reader.line_num + 1
+            open_quotes = 0
+            discard_fed_lines()
+            yield first_line, csv.Error(f"quoted cell still open after {MAX_CSV_RECORD_LINES} lines")
+            continue
+        while feed.lines:
+            first_line = reader.line_num + 1
+            try:
+                cells = next(reader)
+            except csv.Error as e:
+                cells = e
+            yield first_line, cells
+    if feed.lines:                          # a quote left open at the end
+        yield reader.line_num + 1, csv.Error("unexpected end of data")
+
+
+def _parse_csv(cells: list[str], header: list[str]) -> dict:
+    """
+    One CSV record. Empty cells are left out (so defaults apply); the
+    subtasks cell, if present, holds a JSON array — the same layout
+    GET /tasks/export?format=csv produces.
+    """
+    if len(cells) != len(header):
+        raise ValueError(f"expected {len(header)} columns, got {len(cells)}")
+    row = {column: value for column, value in zip(header, cells) if value != ""}
+    if "subtasks" in row:
+        row["subtasks"] = json.loads(row["subtasks"])
+    return row
+
+
+async def _records(body: AsyncIterator[bytes], import_format: str) -> AsyncIterator[tuple[int, dict | Exception]]:
+    """
+    (line number, row) for every non-blank record, with the CSV header
+    consumed. A record that can't be parsed comes through as the exception.
+    """
+    if import_format != "csv":
+        async for line_number, line in _lines(body):
+            if isinstance(line, ValueError):
+                yield line_number, line
+            elif line.strip():
+                try:
+                    yield line_number, _parse_ndjson(line)
+                except ValueError as e:         # JSONDecodeError is a ValueError
+                    yield line_number, e
+        return
+
+    header: list[str] | None = None
+    async for line_number, cells in _csv_records(body):
+        if isinstance(cells, csv.Error):
+            yield line_number, cells
+        elif not any(cell.strip() for cell in cells):
+            continue
+        elif header is None:
+            header = cells
+        else:
+            try:
+                yield line_number, _parse_csv(cells, header)
+            except ValueError as e:
+                yield line_number, e
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+async def _copy_chunk(db: AsyncSession, user_id: int, payloads: list[TaskCreate]) -> None:
+    """
+    Postgres fast path: COPY the chunk into tasks and subtasks.
+    COPY can't return generated ids, so we reserve them from the tasks id
+    sequence up front and write them explicitly; subtasks can then point
+    at their parent without a round trip per task. Columns with only a
+    Python-side default (status, is_completed, ...) are filled in here,
+    because COPY only applies server defaults.
+    """
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    pg = raw.driver_connection
+
+    task_ids = [
+        row[0] for row in await pg.fetch(
+            "SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, $1)",
+            len(payloads),
+        )
+    ]
+
+    await pg.copy_records_to_table("tasks", columns=TASK_COPY_COLUMNS, records=[
+        (
+            task_id, user_id, p.title, p.description, p.task_type.name, p.priority.name,
+            TaskStatus.planned.name, p.deadline, p.scheduled_date, p.estimated_time,
+            p.optimistic_time, p.realistic_time, p.pessimistic_time,
+        )
+        for task_id, p in zip(task_ids, payloads)
+    ])
+
+    subtask_records = [
+        (task_id, s.description, s.estimated_time, s.order, False, False)
+        for task_id, p in zip(task_ids, payloads)
+        for s in p.subtasks
+    ]
+    if subtask_records:
+        await pg.copy_records_to_table("subtasks", columns=SUBTASK_COPY_COLUMNS, records=subtask_records)
+
+
+def _uses_copy(db: AsyncSession) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "asyncpg"
+
+
+async def _write_chunk(db: AsyncSession, user_id: int, payloads: list[TaskCreate]) -> None:
+    """Writes and commits one chunk — each chunk is its own transaction."""
+    if _uses_copy(db):
+        await _copy_chunk(db, user_id, payloads)
+    else:
+        await service.insert_tasks(db, user_id, payloads)
+    await service.bump_tasks_version(db, user_id)
+    await db.commit()
+
+
+async def import_tasks(
+    db: AsyncSession, user_id: int, body: AsyncIterator[bytes], import_format: str = "ndjson"
+) -> ImportResponse:
+    """Streams `body` into the user's tasks. See the module docstring."""
+    imported, failed = 0, 0
+    errors: list[ImportRowError] = []
+    chunk: list[tuple[int, TaskCreate]] = []
+
+    def record_error(line_number: int, message: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ImportRowError(line=line_number, error=message))
+
+    async def flush() -> None:
+        nonlocal imported
+        try:
+            await _write_chunk(db, user_id, [payload for _, payload in chunk])
+            imported += len(chunk)
+        except Exception as e:
+            await db.rollback()
+            for line_number, _ in chunk:
+                record_error(line_number, f"database error: {e}")
+        chunk.clear()
+
+    async for line_number, row in _records(body, import_format):
+        if isinstance(row, Exception):
+            record_error(line_number, _error_message(row))
+            continue
+        try:
+            chunk.append((line_number, TaskCreate.model_validate(row)))
+        except ValidationError as e:
+            record_error(line_number, _error_message(e))
+            continue
+
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    return ImportResponse(
+        imported=imported,
+        failed=failed,
+        errors=errors,
+        errors_truncated=failed > len(errors),
+    )
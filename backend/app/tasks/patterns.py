@@ -0,0 +1,118 @@
+"""
+tasks/patterns.py — Online UserPattern Statistics
+
+WHAT THIS FILE DOES:
+record_completion() folds one completed task into its user's UserPattern
+row for that task type, in the same transaction as the completion.
+Only tasks with both an estimate (estimated_time, the AI's guess) and an
+actual_time count. For each such task:
+  bias     = (actual - estimate) / estimate    + means the user underestimates
+  accuracy = min(actual, estimate) / max(...)   1.0 = spot on
+  ratio    = actual / estimate                  what the estimate should have been scaled by
+
+SYSTEM DESIGN CONCEPT — Online Statistics:
+Recomputing a user's pattern from their whole history on every
+completion (or in a nightly batch over everyone's history) costs more
+as history grows. Running statistics cost the same for the first task
+and the ten-thousandth:
+  - Welford's algorithm keeps count, mean and M2 (sum of squared
+    deviations from the mean), updated per value without the old values
+    and without the cancellation error of sum / sum-of-squares:
+        n' = n + 1;  mean' = mean + (x - mean) / n';  M2' = M2 + (x - mean)(x - mean')
+    systematic_bias is that mean, bias_variance is M2 / (n - 1).
+  - calibration_factor is an exponentially decayed mean of the ratio,
+    so it follows how the user estimates *now*: with decay d per task,
+        W' = d·W + 1;  factor' = (d·W·factor + ratio) / W'
+    (W is decay_weight). PATTERN_HALF_LIFE_TASKS sets d: a task that
+    many completions ago counts half as much as the latest one.
+
+The update is a single INSERT ... ON CONFLICT DO UPDATE whose SET clause
+computes the new values from the row's current ones in SQL — like
+bump_tasks_version(), two concurrent completions can't lose each other's
+update, and no SELECT is needed first.
+"""
+
+import os
+
+from sqlalchemy import Float, bindparam, cast, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import TaskType
+from app.models.user_pattern import UserPattern
+
+PATTERN_HALF_LIFE_TASKS = float(os.getenv("PATTERN_HALF_LIFE_TASKS", 20))
+DECAY = 0.5 ** (1 / PATTERN_HALF_LIFE_TASKS)
+
+
+def observation(estimate: float | None, actual: float | None) -> dict | None:
+    """The per-task values the pattern accumulates, or None if the task doesn't count."""
+    if not estimate or not actual or estimate <= 0 or actual <= 0:
+        return None
+    return {
+        "bias": (actual - estimate) / estimate,
+        "accuracy": min(actual, estimate) / max(actual, estimate),
+        "ratio": actual / estimate,
+        "actual": actual,
+        "estimate": estimate,
+    }
+
+
+def _running_mean(current, n1, x):
+    return current + (x - current) / n1
+
+
+def pattern_upsert(dialect_name: str, user_id: int, task_type: str, obs: dict):
+    """INSERT ... ON CONFLICT (user_id, task_type) DO UPDATE applying one observation."""
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    x = {name: bindparam(name, value, type_=Float) for name, value in obs.items()}
+
+    statement = insert(UserPattern).values(
+        user_id=user_id,
+        task_type=task_type,
+        total_tasks_completed=1,
+        systematic_bias=x["bias"],
+        bias_m2=0.0,
+        avg_accuracy=x["accuracy"],
+        avg_actual_time=x["actual"],
+        avg_estimated_time=x["estimate"],
+        calibration_factor=x["ratio"],
+        decay_weight=1.0,
+    )
+
+    # In SET, column references are the row's values *before* this update
+    count = func.coalesce(UserPattern.total_tasks_completed, 0) + 1
+    n1 = cast(count, Float)
+    bias = func.coalesce(UserPattern.systematic_bias, 0.0)
+    new_bias = _running_mean(bias, n1, x["bias"])
+    weight = func.coalesce(UserPattern.decay_weight, 0.0) * literal(DECAY, Float)
+    factor = func.coalesce(UserPattern.calibration_factor, 1.0)
+
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "task_type"],
+        set_={
+            "total_tasks_completed": count,
+            "systematic_bias": new_bias,
+            "bias_m2": func.coalesce(UserPattern.bias_m2, 0.0) + (x["bias"] - bias) * (x["bias"] - new_bias),
+            "avg_accuracy": _running_mean(func.coalesce(UserPattern.avg_accuracy, 0.0), n1, x["accuracy"]),
+            "avg_actual_time": _running_mean(func.coalesce(UserPattern.avg_actual_time, 0.0), n1, x["actual"]),
+            "avg_estimated_time": _running_mean(func.coalesce(UserPattern.avg_estimated_time, 0.0), n1, x["estimate"]),
+            "calibration_factor": (weight * factor + x["ratio"]) / (weight + 1),
+            "decay_weight": weight + 1,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def record_completion(
+    db: AsyncSession, user_id: int, task_type: TaskType | None, estimate: float | None, actual: float | None
+) -> None:
+    """
+    Folds a task that just became completed into its UserPattern. Doesn't
+    commit — call it inside the transaction that completes the task.
+    """
+    obs = observation(estimate, actual)
+    if obs is None:
+        return
+    type_name = (task_type or TaskType.unknown).value
+    await db.execute(pattern_upsert(db.get_bind().dialect.name, user_id, type_name, obs))
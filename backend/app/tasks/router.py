@@ -5,7 +5,11 @@ SYSTEM DESIGN CONCEPT — RESTful Resource Design:
 Routes follow REST conventions for predictable, standard API design:
 
   POST   /tasks              → create task
+  POST   /tasks/bulk         → create many tasks in one request
+  PATCH  /tasks/bulk         → update many tasks in one request
   GET    /tasks              → list all my tasks (paginated)
+  POST   /tasks/import       → stream in tasks from NDJSON or CSV
+  GET    /tasks/export       → stream all my tasks as NDJSON or CSV
   GET    /tasks/{id}         → get one task
   PATCH  /tasks/{id}         → partial update
   DELETE /tasks/{id}         → delete task
@@ -14,34 +18,44 @@ Routes follow REST conventions for predictable, standard API design:
 
 ALL routes use Depends(get_current_user) — every request must have
 a valid JWT. Users can only ever see/modify their own tasks.
+Read-only routes use get_current_reader + get_read_db instead, which
+read from a replica when one is configured (see db/replicas.py).
 
 INTEGRATION POINT (from PRD):
 Person 2 (frontend) calls these routes to build the UI.
 Person 1 (ML) will add POST /tasks/{id}/predictions here later.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Literal
+import hashlib
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.replicas import get_read_db, get_sync_read_db
 from app.models.user import User
 from app.models.task import TaskStatus
-from app.auth.dependencies import get_current_user
-from app.tasks import service
+from app.auth.dependencies import get_current_user, get_current_reader
+from app.tasks.cache import detail_key
+from app.tasks import service, importer
+from app.tasks.serializers import ORJSONResponse
 from app.tasks.schemas import (
-    TaskCreate, TaskUpdate, TaskResponse, TaskListResponse, SubtaskResponse
+    TaskCreate, TaskUpdate, TaskResponse, TaskListResponse, SubtaskResponse,
+    TaskBulkCreate, TaskBulkUpdate, BulkTaskResponse, ImportResponse
 )
-from app.limiter import limiter
+from app.limiter import limiter, DIGEST_LIMIT, IMPORT_EXPORT_LIMIT, BULK_LIMIT
 from app.services.digest_service import generate_user_digest
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
 @router.post("", response_model=TaskResponse, status_code=201)
-def create_task(
+async def create_task(
     payload: TaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -59,53 +73,237 @@ def create_task(
       ]
     }
     """
-    return service.create_task(db, current_user.id, payload)
+    return await service.create_task(db, current_user.id, payload)
 
 
-@router.get("", response_model=TaskListResponse)
-def get_tasks(
+# ─── Conditional GET ──────────────────────────────────────────────────────────
+# The dashboard refetches /tasks after almost every action and most of those
+# responses haven't changed. Each user has a tasks_version that every write
+# bumps (predictions and actuals included, see models/prediction.py); the
+# ETag is built from it, so when the client sends the ETag back in
+# If-None-Match we can answer 304 before touching the tasks table.
+#
+# The tag covers the same things as the response's task cache key: user,
+# version, route, task id and every param that shapes the body — a tag
+# from one page, task or ?include= variant never validates another.
+#
+# "private, no-cache": the browser may store the response but must
+# revalidate every time (which is exactly the cheap 304 round trip).
+
+def _tasks_etag(cache_key: str) -> str:
+    # The key includes the user id, so a shared browser cache can't hand
+    # user B a 304 for user A's response at the same version number
+    return f'W/"tasks-{hashlib.blake2b(cache_key.encode(), digest_size=12).hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against If-None-Match (which may list several tags)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def _json_with_etag(body: str, etag: str) -> Response:
+    # body is already-serialized JSON (from the task cache or the fast
+    # serializer), so it goes out as-is — no response_model validation
+    return ORJSONResponse(
+        content=body,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+def _bulk_response(results) -> BulkTaskResponse:
+    failed = sum(1 for r in results if r.status == "not_found")
+    return BulkTaskResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+
+# NOTE: /bulk routes must be registered before /{task_id} so "bulk"
+# isn't captured as a task id.
+@router.post("/bulk", response_model=BulkTaskResponse, status_code=201)
+@limiter.limit(BULK_LIMIT)
+async def create_tasks_bulk(
+    request: Request,
+    payload: TaskBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create up to 1000 tasks (each with optional subtasks) in one transaction.
+    Used by the importer and the AI breakdown flow instead of N x POST /tasks.
+
+    Returns one result per task, in request order:
+    {"results": [{"index": 0, "id": 42, "status": "created"}, ...], ...}
+    """
+    results = await service.create_tasks_bulk(db, current_user.id, payload.tasks)
+    return _bulk_response(results)
+
+
+@router.patch("/bulk", response_model=BulkTaskResponse)
+@limiter.limit(BULK_LIMIT)
+async def update_tasks_bulk(
+    request: Request,
+    payload: TaskBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Partially update up to 1000 tasks in one transaction.
+    Each item is a TaskUpdate plus the task "id".
+
+    Example body:
+    {"tasks": [{"id": 1, "priority": "urgent"}, {"id": 2, "status": "deferred"}]}
+
+    Ids that don't exist (or aren't yours) come back as "not_found";
+    the remaining items are still applied.
+    """
+    results = await service.update_tasks_bulk(db, current_user.id, payload.tasks)
+    return _bulk_response(results)
+
+
+@router.post("/import", response_model=ImportResponse)
+@limiter.limit(IMPORT_EXPORT_LIMIT)
+async def import_tasks(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] | None = Query(default=None, alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a large task history in one upload (e.g. migrating a team).
+
+    Send the file as the raw request body:
+      ?format=ndjson → one TaskCreate JSON object per line
+      ?format=csv    → header row + one task per record; "subtasks" is a
+                       JSON-encoded column (the layout GET /tasks/export produces)
+    Without ?format=, Content-Type text/csv means CSV, anything else NDJSON.
+
+    The body is read as it streams in and loaded in chunks of 1000 rows,
+    each committed on its own. Invalid rows are skipped and reported:
+    {"imported": 9998, "failed": 2, "errors": [{"line": 17, "error": "..."}, ...]}
+    """
+    if import_format is None:
+        import_format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    return await importer.import_tasks(db, current_user.id, request.stream(), import_format)
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+@router.get("/export", response_class=StreamingResponse)
+@limiter.limit(IMPORT_EXPORT_LIMIT)
+async def export_tasks(
+    request: Request,
+    export_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download your full task history — every task with its subtasks,
+    predictions and actuals — without paging through GET /tasks.
+
+      ?format=ndjson → one JSON task per line (default)
+      ?format=csv    → one row per task; subtasks/predictions/actuals are
+                       JSON-encoded columns
+
+    The body is streamed from a server-side cursor, so it starts arriving
+    immediately and memory stays flat however many tasks you have.
+    """
+    return StreamingResponse(
+        service.export_tasks(current_user.id, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="calibrate-tasks.{export_format}"'},
+    )
+
+
+@router.get("", response_model=TaskListResponse, response_class=ORJSONResponse)
+async def get_tasks(
+    request: Request,
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
     status: TaskStatus = Query(default=None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    after: str | None = Query(default=None),
+    include_total: bool | None = Query(default=None),
+    include: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
     """
     Get all tasks for the current user.
 
     Query params:
-      ?page=1           → page number (default 1)
-      ?page_size=20     → results per page (default 20, max 100)
-      ?status=planned   → filter by status (optional)
+      ?page=1               → page number (default 1)
+      ?page_size=20         → results per page (default 20, max 100)
+      ?status=planned       → filter by status (optional)
+      ?after=<cursor>       → cursor mode: continue from a previous next_cursor
+                              (page is ignored)
+      ?include_total=false  → skip the COUNT query (total comes back null).
+                              Defaults to true in page mode, false in cursor mode.
+      ?include=predictions,actuals → also return these per task (one extra
+                              batched query each)
 
     Example: GET /tasks?status=planned&page=1
+    Infinite scroll: GET /tasks?page_size=50, then GET /tasks?page_size=50&after=<next_cursor>
+
+    Sends an ETag; repeat the request with If-None-Match: <etag> and you get
+    304 Not Modified (empty body) until one of your tasks changes.
+    Unchanged pages are also served from the task cache (see tasks/cache.py).
     """
-    tasks, total = service.get_tasks(
-        db, current_user.id, page, page_size, status
-    )
-    return TaskListResponse(
-        tasks=tasks,
-        total=total,
-        page=page,
-        page_size=page_size
+    if include_total is None:
+        include_total = after is None
+    include = service.parse_include(include)
+
+    version = await service.get_tasks_version(db, current_user.id)
+    etag = _tasks_etag(service.task_list_key(
+        current_user.id, version, page, page_size, status, after, include_total, include
+    ))
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    body = await service.get_task_list_json(
+        db, current_user.id, version, page, page_size, status,
+        after=after, include_total=include_total, include=include
     )
+    return _json_with_etag(body, etag)
 
 
-@router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
+@router.get("/{task_id}", response_model=TaskResponse, response_class=ORJSONResponse)
+async def get_task(
+    request: Request,
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    include: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_reader)
 ):
-    """Get a single task by ID. Returns 404 if not found or not yours."""
-    return service.get_task_by_id(db, task_id, current_user.id)
+    """
+    Get a single task by ID. Returns 404 if not found or not yours.
+    Supports the same ?include=predictions,actuals and ETag handling as the
+    list route, and the same caching.
+    """
+    include = service.parse_include(include)
+    version = await service.get_task_version(db, task_id, current_user.id)
+    etag = _tasks_etag(detail_key(current_user.id, version, task_id, include))
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    body = await service.get_task_json(db, task_id, current_user.id, version, include=include)
+    return _json_with_etag(body, etag)
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int,
     payload: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -115,27 +313,27 @@ def update_task(
     PATCH /tasks/1
     {"priority": "urgent"}
     """
-    return service.update_task(db, task_id, current_user.id, payload)
+    return await service.update_task(db, task_id, current_user.id, payload)
 
 
 @router.delete("/{task_id}", status_code=204)
-def delete_task(
+async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a task and all its subtasks.
     Returns 204 No Content on success (standard REST for delete).
     """
-    service.delete_task(db, task_id, current_user.id)
+    await service.delete_task(db, task_id, current_user.id)
 
 
 @router.patch("/{task_id}/complete", response_model=TaskResponse)
-def complete_task(
+async def complete_task(
     task_id: int,
     actual_time: float = Query(description="How long it actually took (minutes)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -149,28 +347,32 @@ def complete_task(
         actual_time=actual_time,
         completed_at=datetime.utcnow()
     )
-    return service.update_task(db, task_id, current_user.id, payload)
+    return await service.update_task(db, task_id, current_user.id, payload)
 
 
 @router.patch("/{task_id}/subtasks/{subtask_id}/complete", response_model=SubtaskResponse)
-def complete_subtask(
+async def complete_subtask(
     task_id: int,
     subtask_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark a single subtask as completed."""
-    return service.complete_subtask(db, task_id, subtask_id, current_user.id)
+    return await service.complete_subtask(db, task_id, subtask_id, current_user.id)
 
 
 @router.post("/test-digest", status_code=202)
+@limiter.limit(DIGEST_LIMIT)
 async def test_digest(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_sync_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Manually trigger the daily digest email for the current user.
     Uses fastapi-mail. This is for testing the Email Digest Generator PRD requirement.
+    The digest service shares its queries with the scheduler, so it still
+    takes a sync Session — a replica one, since the digest only reads.
     """
     await generate_user_digest(db, current_user)
     return {"message": f"Digest email triggered for {current_user.email}"}
\ No newline at end of file
@@ -12,7 +12,8 @@ We have 3 schemas per resource (standard REST pattern):
   - ResponseSchema → what you GET back (includes id, timestamps)
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import inspect
 from datetime import datetime
 from typing import Optional
 from app.models.task import TaskType, TaskPriority, TaskStatus
@@ -40,6 +41,34 @@ class SubtaskResponse(BaseModel):
         from_attributes = True
 
 
+# ─── Prediction / Actual Schemas ──────────────────────────────────────────────
+
+class PredictionResponse(BaseModel):
+    id: int
+    predicted_time: float
+    confidence: Optional[float]
+    confidence_interval_low: Optional[float]
+    confidence_interval_high: Optional[float]
+    model_version: Optional[str]
+    prediction_basis: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ActualResponse(BaseModel):
+    id: int
+    actual_time: float
+    completion_date: Optional[datetime]
+    user_notes: Optional[str]
+    delay_reason: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # ─── Task Schemas ─────────────────────────────────────────────────────────────
 
 class TaskCreate(BaseModel):
@@ -96,14 +125,98 @@ class TaskResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
     subtasks: list[SubtaskResponse] = []        # Always include subtasks in response
+    predictions: Optional[list[PredictionResponse]] = None   # Only with ?include=predictions
+    actuals: Optional[list[ActualResponse]] = None           # Only with ?include=actuals
 
     class Config:
         from_attributes = True
 
+    @model_validator(mode="before")
+    @classmethod
+    def skip_unloaded_relationships(cls, data):
+        """
+        predictions/actuals are only serialized when the service eager-loaded
+        them (?include=...). Reading an unloaded relationship here would fire
+        one lazy query per task — exactly the N+1 we're avoiding — so those
+        fields stay None instead.
+        """
+        if not hasattr(data, "_sa_instance_state"):
+            return data
+        unloaded = inspect(data).unloaded
+        return {
+            name: getattr(data, name)
+            for name in cls.model_fields
+            if not (name in ("predictions", "actuals") and name in unloaded)
+        }
+
 
 class TaskListResponse(BaseModel):
-    """Paginated list of tasks."""
+    """
+    Paginated list of tasks.
+    total is None when the client skipped the count (include_total=false).
+    page is None in cursor mode. Pass next_cursor back as ?after= to get
+    the following page; it is None on the last page.
+    """
     tasks: list[TaskResponse]
-    total: int
-    page: int
-    page_size: int
\ No newline at end of file
+    total: Optional[int] = None
+    page: Optional[int] = None
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
+# ─── Bulk Schemas ─────────────────────────────────────────────────────────────
+
+BULK_MAX_ITEMS = 1000
+
+
+class TaskBulkCreate(BaseModel):
+    """POST /tasks/bulk — many tasks (with nested subtasks) in one request."""
+    tasks: list[TaskCreate] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TaskBulkUpdateItem(TaskUpdate):
+    """A TaskUpdate plus the id of the task it applies to."""
+    id: int
+
+
+class TaskBulkUpdate(BaseModel):
+    """PATCH /tasks/bulk — partial updates for many tasks in one request."""
+    tasks: list[TaskBulkUpdateItem] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    """
+    Outcome for one item of a bulk request, matched by its position (index)
+    in the request body.
+    status: "created" | "updated" | "not_found"
+    """
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+
+
+class BulkTaskResponse(BaseModel):
+    results: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+
+# ─── Import Schemas ───────────────────────────────────────────────────────────
+
+class ImportRowError(BaseModel):
+    line: int           # 1-based line in the uploaded file
+    error: str
+
+
+class ImportResponse(BaseModel):
+    """
+    Result of POST /tasks/import. Valid rows are imported even when others
+    fail; errors lists the first failures (errors_truncated says if there
+    were more than we report).
+    """
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool = False
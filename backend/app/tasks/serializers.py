@@ -0,0 +1,142 @@
+"""
+tasks/serializers.py — Fast JSON Path for Task Responses
+
+SYSTEM DESIGN CONCEPT — Trusted Data Doesn't Need Re-Validation:
+TaskResponse.model_validate(task) re-checks every field of every task and
+subtask, even though the data just came out of our own database through
+typed columns. For a 1,000-task page that's most of the request time.
+
+Here we "compile" each response schema once into a function that copies
+the schema's fields straight off the ORM object into a dict (one
+itemgetter call over the loaded values for all scalar fields), then
+encode with orjson.
+The output is the same JSON the Pydantic schema would produce — the
+schemas in tasks/schemas.py stay the single source of truth for the
+shape, they're just not used to validate on the way out.
+"""
+
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Union, get_args, get_origin
+import types
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.tasks.schemas import TaskResponse
+
+# Relationships only serialized when asked for via ?include= (None otherwise)
+OPTIONAL_RELATIONSHIPS = ("predictions", "actuals")
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson. Passes bytes/str through untouched."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode()
+        return dumps(content)
+
+
+def dumps(data: Any) -> bytes:
+    # OPT_UTC_Z: write UTC as "Z", the same as Pydantic does
+    return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+
+
+def _is_float(annotation) -> bool:
+    """float / Optional[float]."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        return float in get_args(annotation)
+    return annotation is float
+
+
+def _nested_schema(annotation) -> type[BaseModel] | None:
+    """list[X] / Optional[list[X]] where X is a schema → X, else None."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        annotation = next(a for a in get_args(annotation) if a is not type(None))
+    if get_origin(annotation) is list:
+        (item,) = get_args(annotation)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item
+    return None
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(schema: type[BaseModel], include: frozenset[str] = frozenset()) -> Callable[[Any], dict]:
+    """
+    Builds (once per schema + include set) a function: ORM object → plain dict
+    in the schema's field order. Optional relationships not in `include`
+    come out as None without being touched, so they can't lazy-load.
+    """
+    scalars, floats, nested, skipped = [], [], [], []
+    for name, field in schema.model_fields.items():
+        item_schema = _nested_schema(field.annotation)
+        if item_schema is None:
+            scalars.append(name)
+            if _is_float(field.annotation):
+                floats.append(name)
+        elif name in OPTIONAL_RELATIONSHIPS and name not in include:
+            skipped.append(name)
+        else:
+            nested.append((name, compile_serializer(item_schema)))
+
+    # Loaded column values sit in the instance __dict__; reading them there
+    # skips SQLAlchemy's attribute instrumentation. Anything missing
+    # (expired/deferred) falls back to normal attribute access.
+    from_dict = itemgetter(*scalars)
+    from_attrs = attrgetter(*scalars)
+    if len(scalars) == 1:
+        from_dict = lambda d, _get=from_dict: (_get(d),)
+        from_attrs = lambda obj, _get=from_attrs: (_get(obj),)
+
+    def serialize(obj) -> dict:
+        loaded = obj.__dict__
+        try:
+            values = from_dict(loaded)
+        except KeyError:
+            values = from_attrs(obj)
+        data = dict(zip(scalars, values))
+        # Pydantic writes a float field holding 15 as 15.0; so must we
+        for name in floats:
+            if type(data[name]) is int:
+                data[name] = float(data[name])
+        for name, serialize_item in nested:
+            items = loaded[name] if name in loaded else getattr(obj, name)
+            data[name] = [serialize_item(item) for item in items]
+        for name in skipped:
+            data[name] = None
+        return data
+
+    return serialize
+
+
+def serialize_task(task, include: tuple[str, ...] = ()) -> dict:
+    return compile_serializer(TaskResponse, frozenset(include))(task)
+
+
+def task_list_json(
+    tasks: list,
+    include: tuple[str, ...],
+    total: int | None,
+    page: int | None,
+    page_size: int,
+    next_cursor: str | None,
+) -> bytes:
+    """Same JSON as TaskListResponse(...).model_dump_json(), without validation."""
+    serialize = compile_serializer(TaskResponse, frozenset(include))
+    return dumps({
+        "tasks": [serialize(task) for task in tasks],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    })
+
+
+def task_json(task, include: tuple[str, ...] = ()) -> bytes:
+    """Same JSON as TaskResponse.model_validate(task).model_dump_json()."""
+    return dumps(serialize_task(task, include))
@@ -19,16 +19,115 @@ OWNERSHIP NOTE (from PRD):
   Person 1 will call into this service to store predictions and actuals.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from fastapi import HTTPException, status
 from datetime import datetime
+from typing import AsyncIterator
+import base64
+import csv
+import enum
+import io
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import desc, insert, update, select, func, tuple_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.db.database import AsyncSessionLocal
+from app.db.replicas import mark_write
 from app.models.task import Task, Subtask, TaskStatus
-from app.tasks.schemas import TaskCreate, TaskUpdate
+from app.models.user import User
+from app.tasks import patterns
+from app.tasks.cache import task_cache, list_key, detail_key
+from app.tasks.schemas import (
+    TaskCreate, TaskUpdate, TaskResponse, TaskBulkUpdateItem, BulkItemResult
+)
+from app.tasks.serializers import task_list_json, task_json, serialize_task, dumps
+
+
+async def get_tasks_version(db: AsyncSession, user_id: int) -> int:
+    """
+    Current version of the user's task data (a primary-key lookup).
+
+    SYSTEM DESIGN — Conditional GET:
+    The routers turn this into an ETag. If the client already holds that
+    version we can answer 304 Not Modified without running the list query
+    or building a response at all.
+    """
+    return await db.scalar(select(User.tasks_version).where(User.id == user_id)) or 0
+
+
+async def get_task_version(db: AsyncSession, task_id: int, user_id: int) -> int:
+    """
+    get_tasks_version() for GET /tasks/{id}, in the same single query, but
+    404 if the task doesn't exist or isn't the user's — a client holding
+    a current ETag must not get a 304 for a task that isn't there.
+    """
+    version = await db.scalar(
+        select(User.tasks_version)
+        .join(Task, Task.user_id == User.id)
+        .where(User.id == user_id, Task.id == task_id)
+    )
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return version
+
+
+async def bump_tasks_version(db: AsyncSession, user_id: int) -> None:
+    """
+    Marks the user's tasks as changed. Every write in this module calls it
+    before committing, so the bump lands in the same transaction as the
+    change — a client can never see new data under an old version.
+    The increment happens in SQL, so concurrent writers can't lose a bump.
+    It also pins the user's reads to the primary for a few seconds
+    (read-your-writes, see db/replicas.py).
+    """
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(tasks_version=User.tasks_version + 1)
+    )
+    mark_write(user_id)
+
+
+# Relationships a client may ask for with ?include=. Subtasks are always loaded.
+INCLUDABLE_RELATIONSHIPS = {
+    "predictions": Task.predictions,
+    "actuals": Task.actuals,
+}
 
 
-def create_task(db: Session, user_id: int, payload: TaskCreate) -> Task:
+def task_load_options(include: tuple[str, ...] = ()) -> list:
+    """
+    Loader options for queries that return Tasks to the client.
+
+    SYSTEM DESIGN — N+1 Queries:
+    TaskResponse serializes task.subtasks. With default lazy loading, a page
+    of 100 tasks fires 1 query for the tasks + 100 for their subtasks.
+    selectinload batches them instead: one extra
+    `SELECT ... WHERE task_id IN (...)` per relationship, however big the page.
+    """
+    options = [selectinload(Task.subtasks)]
+    for name in include:
+        options.append(selectinload(INCLUDABLE_RELATIONSHIPS[name]))
+    return options
+
+
+def parse_include(include: str | None) -> tuple[str, ...]:
+    """Turns ?include=predictions,actuals into a validated tuple of names."""
+    if not include:
+        return ()
+    names = tuple(dict.fromkeys(n.strip() for n in include.split(",") if n.strip()))
+    unknown = [n for n in names if n not in INCLUDABLE_RELATIONSHIPS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(unknown)}. "
+                   f"Allowed: {', '.join(INCLUDABLE_RELATIONSHIPS)}"
+        )
+    return names
+
+
+async def create_task(db: AsyncSession, user_id: int, payload: TaskCreate) -> Task:
     """
     Create a task and its subtasks in a single DB transaction.
 
@@ -52,7 +151,7 @@ def create_task(db: Session, user_id: int, payload: TaskCreate) -> Task:
         pessimistic_time=payload.pessimistic_time,
     )
     db.add(task)
-    db.flush()  # Gets task.id from DB without committing yet
+    await db.flush()  # Gets task.id from DB without committing yet
 
     # Create subtasks linked to this task
     for subtask_data in payload.subtasks:
@@ -64,47 +163,226 @@ def create_task(db: Session, user_id: int, payload: TaskCreate) -> Task:
         )
         db.add(subtask)
 
-    db.commit()
-    db.refresh(task)
-    return task
+    await bump_tasks_version(db, user_id)
+    await db.commit()
+    # Re-read with subtasks eager-loaded — async sessions can't lazy-load
+    # them later while the response is being serialized.
+    return await get_task_by_id(db, task.id, user_id)
+
+
+def encode_cursor(task: Task) -> str:
+    """
+    Builds the opaque `after` cursor that points just past this task.
+    The cursor is the (created_at, id) sort key, base64-encoded so clients
+    treat it as a token instead of something to construct by hand.
+    """
+    raw = json.dumps([task.created_at.isoformat(), task.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Reverses encode_cursor(). Raises 400 on anything we didn't issue."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def insert_tasks(db: AsyncSession, user_id: int, payloads: list[TaskCreate]) -> list[int]:
+    """
+    Inserts tasks and their subtasks without committing; returns the new
+    task ids in input order.
+
+    SYSTEM DESIGN — Round Trips:
+    create_task() costs a flush per task, an INSERT per subtask, a commit
+    and a refresh. For an import of 2,000 tasks that's thousands of round
+    trips. Here we issue exactly two statements:
+      1. One multi-row INSERT INTO tasks ... RETURNING id (SQLAlchemy batches
+         the rows into as few statements as the driver allows)
+      2. One executemany INSERT INTO subtasks for every subtask of every task
+    sort_by_parameter_order=True guarantees the returned ids line up with
+    the input rows, so we can attach subtasks without re-querying.
+    """
+    task_rows = [
+        {
+            "user_id": user_id,
+            **payload.model_dump(exclude={"subtasks"}),
+        }
+        for payload in payloads
+    ]
+    task_ids = (await db.scalars(
+        insert(Task).returning(Task.id, sort_by_parameter_order=True),
+        task_rows,
+    )).all()
+
+    subtask_rows = [
+        {"task_id": task_id, **subtask.model_dump()}
+        for task_id, payload in zip(task_ids, payloads)
+        for subtask in payload.subtasks
+    ]
+    if subtask_rows:
+        await db.execute(insert(Subtask), subtask_rows)
+
+    return task_ids
+
+
+async def create_tasks_bulk(db: AsyncSession, user_id: int, payloads: list[TaskCreate]) -> list[BulkItemResult]:
+    """Create many tasks (and their subtasks) in one transaction — see insert_tasks()."""
+    task_ids = await insert_tasks(db, user_id, payloads)
+    await bump_tasks_version(db, user_id)
+    await db.commit()
+
+    return [
+        BulkItemResult(index=index, id=task_id, status="created")
+        for index, task_id in enumerate(task_ids)
+    ]
+
+
+async def update_tasks_bulk(db: AsyncSession, user_id: int, items: list[TaskBulkUpdateItem]) -> list[BulkItemResult]:
+    """
+    Apply many partial updates in one transaction.
+
+    Ownership is checked with a single SELECT over all requested ids;
+    items pointing at missing/foreign tasks are reported as "not_found"
+    and skipped, the rest go out as one executemany UPDATE keyed by id.
+    Same PATCH semantics as update_task(): only fields sent are changed,
+    and items are applied in order — an id sent twice sees its earlier
+    item's changes, so a task completes (and is recorded) at most once.
+    """
+    requested_ids = {item.id for item in items}
+    owned = {row.id: row._asdict() for row in await db.execute(
+        select(Task.id, Task.completed_at, Task.status, Task.task_type, Task.estimated_time, Task.actual_time).where(
+            Task.id.in_(requested_ids),
+            Task.user_id == user_id         # Critical: ownership check
+        )
+    )}
+
+    results, rows, completions = [], [], []
+    for index, item in enumerate(items):
+        if item.id not in owned:
+            results.append(BulkItemResult(index=index, id=item.id, status="not_found", detail="Task not found"))
+            continue
+
+        updates = item.model_dump(exclude_unset=True)
+        updates["id"] = item.id
+        current = owned[item.id]
+        # Auto-set completed_at when status changes to completed
+        if updates.get("status") == TaskStatus.completed and not current["completed_at"]:
+            updates["completed_at"] = datetime.utcnow()
+        if updates.get("status") == TaskStatus.completed and current["status"] != TaskStatus.completed:
+            completions.append({**current, **updates})
+        owned[item.id] = {**current, **updates}
+
+        rows.append(updates)
+        results.append(BulkItemResult(index=index, id=item.id, status="updated"))
+
+    if rows:
+        await db.execute(update(Task), rows)     # ORM bulk UPDATE by primary key
+        # One upsert per completion: several may hit the same pattern row
+        for task in completions:
+            await patterns.record_completion(db, user_id, task["task_type"], task["estimated_time"], task["actual_time"])
+        await bump_tasks_version(db, user_id)
+        await db.commit()
+
+    return results
+
+
+def task_filter_query(user_id: int, status: TaskStatus = None) -> Select:
+    """SELECT of one user's tasks, optionally narrowed to a status."""
+    query = select(Task).where(Task.user_id == user_id)
+
+    # Optional status filter (e.g. only show planned tasks)
+    if status:
+        query = query.where(Task.status == status)
+    return query
+
+
+def task_page_query(
+    user_id: int,
+    status: TaskStatus = None,
+    after: tuple[datetime, int] | None = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> Select:
+    """
+    SELECT for one page of a user's tasks, newest first.
+
+    Matches the (user_id, created_at, id) and (user_id, status, created_at, id)
+    indexes: the DB walks the index backwards from the cursor position and
+    stops after `limit` rows, no sort step needed.
+    Kept separate from get_tasks() so tests can EXPLAIN the exact statement.
+    """
+    # Newest first; id breaks ties between tasks created in the same instant
+    query = task_filter_query(user_id, status).order_by(desc(Task.created_at), desc(Task.id))
+
+    if after:
+        # Row-value comparison so the DB can seek straight into the index
+        query = query.where(tuple_(Task.created_at, Task.id) < tuple_(*after))
+    else:
+        query = query.offset(offset)     # Skip previous pages
+
+    return query.limit(limit)
 
 
-def get_tasks(
-    db: Session,
+async def get_tasks(
+    db: AsyncSession,
     user_id: int,
     page: int = 1,
     page_size: int = 20,
     status: TaskStatus = None,
-) -> tuple[list[Task], int]:
+    after: str | None = None,
+    include_total: bool = True,
+    include: tuple[str, ...] = (),
+) -> tuple[list[Task], int | None, str | None]:
     """
     Get all tasks for a user with optional filtering and pagination.
 
     SYSTEM DESIGN — Pagination:
     Never return ALL tasks at once — that breaks with 1000+ tasks.
-    Pagination (page/page_size) limits DB load and response size.
-    We return total count alongside results so the frontend can
-    show "Page 1 of 10" style UI.
-    """
-    query = db.query(Task).filter(Task.user_id == user_id)
+    Two modes are supported:
+      - Page mode (page/page_size): OFFSET-based, simple "Page 1 of 10" UI.
+        The DB still has to walk and discard every skipped row, so deep
+        pages get slower the further you go.
+      - Cursor mode (after=<next_cursor>): keyset pagination on
+        (created_at, id). The DB seeks straight to the cursor position,
+        so page 500 costs the same as page 1.
 
-    # Optional status filter (e.g. only show planned tasks)
-    if status:
-        query = query.filter(Task.status == status)
+    The total count is a separate full COUNT(*) over the user's tasks,
+    so it is only run when include_total is True.
 
-    total = query.count()
+    Subtasks (and any `include` relationships) are batch-loaded, so a page
+    costs the same number of queries whatever its size.
+
+    Returns (tasks, total, next_cursor). next_cursor is None on the last page.
+    """
+    total = None
+    if include_total:
+        total = await db.scalar(
+            select(func.count()).select_from(task_filter_query(user_id, status).subquery())
+        )
 
-    tasks = (
-        query
-        .order_by(desc(Task.created_at))        # Newest first
-        .offset((page - 1) * page_size)         # Skip previous pages
-        .limit(page_size)                        # Take only this page
-        .all()
+    # Fetch one extra row to find out whether another page exists
+    query = task_page_query(
+        user_id, status,
+        after=decode_cursor(after) if after else None,
+        offset=(page - 1) * page_size,
+        limit=page_size + 1,
     )
+    tasks = (await db.scalars(query.options(*task_load_options(include)))).all()
+    next_cursor = None
+    if len(tasks) > page_size:
+        tasks = tasks[:page_size]
+        next_cursor = encode_cursor(tasks[-1])
 
-    return tasks, total
+    return tasks, total, next_cursor
 
 
-def get_task_by_id(db: Session, task_id: int, user_id: int) -> Task:
+async def get_task_by_id(db: AsyncSession, task_id: int, user_id: int, include: tuple[str, ...] = ()) -> Task:
     """
     Get a single task — enforces ownership.
 
@@ -112,11 +390,19 @@ def get_task_by_id(db: Session, task_id: int, user_id: int) -> Task:
     We filter by BOTH task_id AND user_id.
     This prevents user A from accessing user B's tasks
     by guessing task IDs (IDOR — Insecure Direct Object Reference).
+
+    populate_existing makes this also work as a "reload" after a commit:
+    an object already in the session gets fresh columns and relationships.
     """
-    task = db.query(Task).filter(
-        Task.id == task_id,
-        Task.user_id == user_id         # Critical: ownership check
-    ).first()
+    task = await db.scalar(
+        select(Task)
+        .options(*task_load_options(include))
+        .where(
+            Task.id == task_id,
+            Task.user_id == user_id         # Critical: ownership check
+        )
+        .execution_options(populate_existing=True)
+    )
 
     if not task:
         raise HTTPException(
@@ -126,7 +412,141 @@ def get_task_by_id(db: Session, task_id: int, user_id: int) -> Task:
     return task
 
 
-def update_task(db: Session, task_id: int, user_id: int, payload: TaskUpdate) -> Task:
+def task_list_key(
+    user_id: int, version: int, page: int, page_size: int, status: TaskStatus | None,
+    after: str | None, include_total: bool, include: tuple[str, ...],
+) -> str:
+    """The task cache key for one list page (GET /tasks builds its ETag from it too)."""
+    return list_key(
+        user_id, version, page=page, page_size=page_size, status=status and status.value,
+        after=after, include_total=include_total, include=",".join(include),
+    )
+
+
+async def get_task_list_json(
+    db: AsyncSession,
+    user_id: int,
+    version: int,
+    page: int = 1,
+    page_size: int = 20,
+    status: TaskStatus = None,
+    after: str | None = None,
+    include_total: bool = True,
+    include: tuple[str, ...] = (),
+) -> str:
+    """
+    One serialized TaskListResponse page, read through the task cache.
+
+    SYSTEM DESIGN — Read-Through Cache:
+    The dashboard polls the same page hundreds of times a minute. We cache
+    the final JSON (not ORM objects), so a hit skips the queries AND the
+    serialization. Misses use the fast path in tasks/serializers.py.
+    `version` is the caller's get_tasks_version(); it's part of the key,
+    so any write makes older entries unreachable.
+    """
+    key = task_list_key(user_id, version, page, page_size, status, after, include_total, include)
+    body = task_cache.get(key)
+    if body is not None:
+        return body
+
+    tasks, total, next_cursor = await get_tasks(
+        db, user_id, page, page_size, status,
+        after=after, include_total=include_total, include=include
+    )
+    body = task_list_json(
+        tasks, include,
+        total=total,
+        page=None if after else page,
+        page_size=page_size,
+        next_cursor=next_cursor
+    ).decode()
+    task_cache.set(key, body)
+    return body
+
+
+async def get_task_json(
+    db: AsyncSession, task_id: int, user_id: int, version: int, include: tuple[str, ...] = ()
+) -> str:
+    """Serialized TaskResponse for one task, read through the task cache."""
+    key = detail_key(user_id, version, task_id, include)
+    body = task_cache.get(key)
+    if body is not None:
+        return body
+
+    task = await get_task_by_id(db, task_id, user_id, include=include)
+    body = task_json(task, include).decode()
+    task_cache.set(key, body)
+    return body
+
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_INCLUDE = ("predictions", "actuals")
+EXPORT_CSV_COLUMNS = list(TaskResponse.model_fields)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return dumps(value).decode()     # nested subtasks/predictions/actuals as JSON
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def export_tasks(user_id: int, export_format: str = "ndjson") -> AsyncIterator[bytes]:
+    """
+    Streams every task the user owns (with subtasks, predictions and actuals)
+    as NDJSON lines or CSV rows.
+
+    SYSTEM DESIGN — Constant-Memory Export:
+    A user can have 100k tasks, so we never hold them all:
+      - stream_scalars + yield_per uses a server-side cursor and hands us
+        EXPORT_BATCH_SIZE rows at a time
+      - selectinload fetches each batch's children in one query per
+        relationship
+      - each batch is serialized and yielded to the client; nothing else
+        keeps a reference to its rows (the identity map only holds weak
+        references), so they're freed before the next batch arrives
+    The first bytes go out as soon as the first batch is read.
+
+    Opens its own session: the response body is produced after the route
+    function has returned, so it can't borrow the request's session.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(
+            select(Task)
+            .where(Task.user_id == user_id)
+            .order_by(Task.id)
+            .options(*task_load_options(EXPORT_INCLUDE))
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+        async for batch in result.partitions():
+            if export_format == "csv":
+                for task in batch:
+                    row = serialize_task(task, EXPORT_INCLUDE)
+                    writer.writerow([_csv_value(row[column]) for column in EXPORT_CSV_COLUMNS])
+                chunk = buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = b"".join(dumps(serialize_task(task, EXPORT_INCLUDE)) + b"\n" for task in batch)
+
+            yield chunk
+
+
+async def update_task(db: AsyncSession, task_id: int, user_id: int, payload: TaskUpdate) -> Task:
     """
     Partial update — only updates fields that were actually sent.
 
@@ -136,7 +556,8 @@ def update_task(db: Session, task_id: int, user_id: int, payload: TaskUpdate) ->
     This means PATCH /tasks/1 {"title": "new"} only changes title,
     leaving all other fields untouched.
     """
-    task = get_task_by_id(db, task_id, user_id)
+    task = await get_task_by_id(db, task_id, user_id)
+    was_completed = task.status == TaskStatus.completed
 
     updates = payload.model_dump(exclude_unset=True)
 
@@ -147,34 +568,40 @@ def update_task(db: Session, task_id: int, user_id: int, payload: TaskUpdate) ->
     for field, value in updates.items():
         setattr(task, field, value)
 
-    db.commit()
-    db.refresh(task)
-    return task
+    # Newly completed: learn from it, in this same transaction
+    if task.status == TaskStatus.completed and not was_completed:
+        await patterns.record_completion(db, user_id, task.task_type, task.estimated_time, task.actual_time)
+
+    await bump_tasks_version(db, user_id)
+    await db.commit()
+    return await get_task_by_id(db, task_id, user_id)
 
 
-def delete_task(db: Session, task_id: int, user_id: int) -> None:
+async def delete_task(db: AsyncSession, task_id: int, user_id: int) -> None:
     """
     Delete a task and all its subtasks.
-    Subtasks are deleted automatically via cascade="all, delete-orphan"
-    set in the Task model relationship — no manual cleanup needed.
+    Subtasks, predictions and actuals are removed by the ON DELETE CASCADE
+    foreign keys (passive_deletes=True on the Task relationships), so we
+    don't have to load them just to delete them.
     """
-    task = get_task_by_id(db, task_id, user_id)
-    db.delete(task)
-    db.commit()
+    task = await get_task_by_id(db, task_id, user_id)
+    await db.delete(task)
+    await bump_tasks_version(db, user_id)
+    await db.commit()
 
 
-def complete_subtask(db: Session, task_id: int, subtask_id: int, user_id: int) -> Subtask:
+async def complete_subtask(db: AsyncSession, task_id: int, subtask_id: int, user_id: int) -> Subtask:
     """
     Mark a subtask as completed.
     Verifies parent task ownership before touching the subtask.
     """
     # Verify user owns the parent task first
-    get_task_by_id(db, task_id, user_id)
+    await get_task_by_id(db, task_id, user_id)
 
-    subtask = db.query(Subtask).filter(
+    subtask = await db.scalar(select(Subtask).where(
         Subtask.id == subtask_id,
         Subtask.task_id == task_id
-    ).first()
+    ))
 
     if not subtask:
         raise HTTPException(
@@ -184,6 +611,7 @@ def complete_subtask(db: Session, task_id: int, subtask_id: int, user_id: int) -
 
     subtask.is_completed = True
     subtask.completed_at = datetime.utcnow()
-    db.commit()
-    db.refresh(subtask)
+    await bump_tasks_version(db, user_id)
+    await db.commit()
+    await db.refresh(subtask)
     return subtask
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Benchmark: building the nightly digests one user at a time (2 queries per
+user) vs build_digests() over keyset chunks of 1,000 users (2 queries per
+chunk), at 100k users with 5 tasks each.
+
+The per-user path is timed on a sample and extrapolated.
+
+Run from backend/ (SQLite by default; to benchmark Postgres, point
+BENCH_DATABASE_URL at a scratch database — all its tables are dropped):
+    python benchmarks/benchmark_digest_batch.py [users]
+"""
+from datetime import datetime, timedelta
+from time import perf_counter
+import os
+import random
+import sys
+import tempfile
+
+# Never DATABASE_URL: this script drops every table of the database it runs on
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/calibrate-digest-bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text  # noqa: E402
+import pytz  # noqa: E402
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.models import User, Task, TaskStatus  # noqa: E402
+from app.services.digest_service import build_digests, iter_digest_recipients  # noqa: E402
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+TASKS_PER_USER = 5
+PER_USER_SAMPLE = 2_000
+TIMEZONES = ["UTC", "America/New_York", "Europe/Berlin", "Asia/Tokyo", "Australia/Sydney"]
+
+
+def seed():
+    rng = random.Random(7)
+    now = datetime.now(pytz.utc)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for first in range(1, USERS + 1, 10_000):
+            ids = range(first, min(first + 10_000, USERS + 1))
+            conn.execute(insert(User), [
+                {"id": i, "email": f"user{i}@calibrate.app", "hashed_password": "x",
+                 "timezone": rng.choice(TIMEZONES), "notifications_enabled": rng.random() > 0.1}
+                for i in ids
+            ])
+            conn.execute(insert(Task), [
+                {"user_id": i, "title": f"Task {n}", "status": status, "estimated_time": 30,
+                 "completed_at": now - timedelta(hours=rng.randint(1, 72)) if status == TaskStatus.completed else None,
+                 "deadline": now - timedelta(hours=rng.randint(-48, 48))}
+                for i in ids
+                for n, status in enumerate(rng.choices(list(TaskStatus), k=TASKS_PER_USER))
+            ])
+        conn.execute(text("ANALYZE"))
+
+
+def per_user(sample: int) -> float:
+    db = SessionLocal()
+    start = perf_counter()
+    done = 0
+    for users in iter_digest_recipients(db):
+        for user in users:
+            build_digests(db, [user])
+            done += 1
+            if done == sample:
+                elapsed = perf_counter() - start
+                db.close()
+                return elapsed / sample
+    db.close()
+    return (perf_counter() - start) / max(done, 1)
+
+
+def batched() -> tuple[float, int]:
+    db = SessionLocal()
+    start = perf_counter()
+    built = 0
+    for users in iter_digest_recipients(db):
+        built += len(build_digests(db, users))
+    elapsed = perf_counter() - start
+    db.close()
+    return elapsed, built
+
+
+def main():
+    print(f"seeding {USERS:,} users x {TASKS_PER_USER} tasks ...")
+    seed()
+
+    per_user_seconds = per_user(PER_USER_SAMPLE)
+    batch_seconds, recipients = batched()
+    per_user_total = per_user_seconds * recipients
+
+    print(f"{recipients:,} recipients")
+    print(f"{'per user':>10}: {per_user_total:8.1f} s  ({2 * recipients:,} queries, extrapolated from {PER_USER_SAMPLE:,})")
+    print(f"{'batched':>10}: {batch_seconds:8.1f} s  ({2 * -(-recipients // 1000):,} digest queries)")
+    print(f"speedup {per_user_total / batch_seconds:.1f}x")
+
+    Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
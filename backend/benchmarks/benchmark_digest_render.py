@@ -0,0 +1,86 @@
+"""
+Benchmark: rendering 100k digest emails (HTML + plain text) with the
+precompiled templates (digest_service.DIGEST_HTML / DIGEST_TEXT), next to
+what it would cost to parse and compile the templates for every user.
+
+For scale: benchmark_digest_batch.py builds a digest's data in roughly
+0.4 ms per user, and one SMTP send over a pooled connection takes a
+millisecond or more — rendering should be a small fraction of either.
+
+Run from backend/:
+    python benchmarks/benchmark_digest_render.py [digests]
+"""
+from datetime import date
+from time import perf_counter
+import os
+import random
+import sys
+import tempfile
+
+# app.db needs a DATABASE_URL at import time; nothing here touches it
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/calibrate-bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import User  # noqa: E402
+from app.services import digest_service  # noqa: E402
+from app.services.digest_service import UserDigest, render_digest_html, render_digest_text  # noqa: E402
+
+DIGESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+UNCOMPILED_SAMPLE = 2_000
+
+
+class Row:
+    """Stands in for the (user_id, title, actual_time, estimated_time) rows build_digests returns."""
+
+    def __init__(self, title: str, actual_time: float | None, estimated_time: float | None):
+        self.title = title
+        self.actual_time = actual_time
+        self.estimated_time = estimated_time
+
+
+def make_digests(n: int) -> list[UserDigest]:
+    rng = random.Random(7)
+    return [
+        UserDigest(
+            User(id=i, email=f"user{i}@calibrate.app", full_name=f"User {i}"),
+            date(2026, 3, 1),
+            [Row(f"Task {j} & <notes>", rng.choice([None, 25, 90]), 30) for j in range(rng.randint(0, 5))],
+            [Row(f"Late {j}", None, rng.choice([15, 60])) for j in range(rng.randint(0, 3))],
+        )
+        for i in range(n)
+    ]
+
+
+def precompiled(digests: list[UserDigest]) -> float:
+    start = perf_counter()
+    for digest in digests:
+        render_digest_html(digest)
+        render_digest_text(digest)
+    return perf_counter() - start
+
+
+def parsed_per_user(digests: list[UserDigest]) -> float:
+    env = digest_service._templates
+    html_source, _, _ = env.loader.get_source(env, "digest.html")
+    text_source, _, _ = env.loader.get_source(env, "digest.txt")
+    start = perf_counter()
+    for digest in digests:
+        env.from_string(html_source).render(digest=digest)
+        env.from_string(text_source).render(digest=digest)
+    return perf_counter() - start
+
+
+def main():
+    digests = make_digests(DIGESTS)
+
+    total = precompiled(digests)
+    per_user = parsed_per_user(digests[:UNCOMPILED_SAMPLE]) / UNCOMPILED_SAMPLE
+
+    print(f"{DIGESTS:,} digests, HTML + plain text")
+    print(f"{'precompiled':>16}: {total:7.2f} s  ({total / DIGESTS * 1e6:6.1f} us per digest)")
+    print(f"{'parsed per user':>16}: {per_user * DIGESTS:7.2f} s  ({per_user * 1e6:6.1f} us per digest, "
+          f"extrapolated from {UNCOMPILED_SAMPLE:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: a login storm vs task-read latency.
+
+Fires LOGINS concurrent logins while another client keeps reading
+GET /tasks, once with bcrypt run inline in the handler (the old
+behaviour) and once on the password process pool (app/auth/passwords.py).
+Reports login throughput and read latency percentiles for each.
+
+Run from backend/:
+    python benchmarks/benchmark_login_storm.py
+"""
+from statistics import quantiles
+from time import perf_counter
+import asyncio
+import os
+import sys
+import tempfile
+
+DB_PATH = f"{tempfile.gettempdir()}/calibrate-login-bench.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from app.auth import passwords, utils  # noqa: E402
+from app.db.database import Base, engine  # noqa: E402
+from app.limiter import limiter  # noqa: E402
+from app.main import app  # noqa: E402
+
+LOGINS = 64
+CREDENTIALS = {"email": "bench@calibrate.app", "password": "correct horse"}
+
+
+async def inline_verify(plain_password, hashed_password):
+    return utils.verify_password(plain_password, hashed_password)
+
+
+async def storm(client: httpx.AsyncClient, headers: dict) -> dict:
+    read_latencies = []
+    done = asyncio.Event()
+
+    async def reader():
+        while not done.is_set():
+            start = perf_counter()
+            await client.get("/tasks", headers=headers)
+            read_latencies.append((perf_counter() - start) * 1000)
+            await asyncio.sleep(0)
+
+    async def login():
+        response = await client.post("/auth/login", json=CREDENTIALS)
+        return response.status_code
+
+    reading = asyncio.create_task(reader())
+    start = perf_counter()
+    codes = await asyncio.gather(*(login() for _ in range(LOGINS)))
+    elapsed = perf_counter() - start
+    done.set()
+    await reading
+
+    p50, p95 = (quantiles(read_latencies, n=20, method="inclusive")[i] for i in (9, 18))
+    return {
+        "logins/s": len([c for c in codes if c == 200]) / elapsed,
+        "shed (503)": codes.count(503),
+        "reads": len(read_latencies),
+        "read p50 ms": p50,
+        "read p95 ms": p95,
+        "read max ms": max(read_latencies),
+    }
+
+
+async def main():
+    limiter.enabled = False
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/auth/register", json=CREDENTIALS)
+        token = (await client.post("/auth/login", json=CREDENTIALS)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        await client.post("/tasks/bulk", json={"tasks": [{"title": f"Task {i}"} for i in range(50)]}, headers=headers)
+
+        pooled_verify = passwords.verify_password
+        results = {}
+        passwords.verify_password = inline_verify
+        results["inline"] = await storm(client, headers)
+        passwords.verify_password = pooled_verify
+        results["pool"] = await storm(client, headers)
+
+    passwords.shutdown_password_pool()
+    Base.metadata.drop_all(bind=engine)
+
+    print(f"{LOGINS} concurrent logins, pool workers={passwords.PASSWORD_POOL_WORKERS}, "
+          f"queue limit={passwords.PASSWORD_QUEUE_LIMIT}")
+    print(f"{'':>8}" + "".join(f"{k:>13}" for k in results["inline"]))
+    for mode, row in results.items():
+        print(f"{mode:>8}" + "".join(f"{v:>13.1f}" for v in row.values()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark: rebuilding every UserPattern from history with the vectorized
+rebuild (app/tasks/pattern_rebuild.py) vs replaying each completion
+through the online upsert (app/tasks/patterns.py), at 1M completed tasks
+(10k users x 100) by default, extrapolated to 50M.
+
+The replay is timed on a sample and extrapolated.
+
+Run from backend/ (SQLite by default; to benchmark Postgres, point
+BENCH_DATABASE_URL at a scratch database — all its tables are dropped):
+    python benchmarks/benchmark_pattern_rebuild.py [tasks] [workers]
+"""
+from datetime import datetime, timedelta
+from time import perf_counter
+import os
+import random
+import sys
+import tempfile
+
+# Never DATABASE_URL: this script drops every table of the database it runs on
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/calibrate-patterns-bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+from app.db.database import Base, engine, SessionLocal  # noqa: E402
+from app.models import User, Task, TaskStatus, TaskType  # noqa: E402
+from app.tasks.pattern_rebuild import rebuild_all  # noqa: E402
+from app.tasks.patterns import observation, pattern_upsert  # noqa: E402
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+TASKS_PER_USER = 100
+REPLAY_SAMPLE = 20_000
+TARGET = 50_000_000
+
+
+def seed():
+    rng = random.Random(7)
+    users = TASKS // TASKS_PER_USER
+    start = datetime(2026, 1, 1)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@calibrate.app", "hashed_password": "x"} for i in range(1, users + 1)
+        ])
+        for first in range(1, users + 1, 1_000):
+            conn.execute(insert(Task), [
+                {"user_id": i, "title": "t", "task_type": rng.choice(list(TaskType)),
+                 "status": TaskStatus.completed, "estimated_time": (estimate := rng.uniform(10, 240)),
+                 "actual_time": estimate * rng.lognormvariate(0.1, 0.4),
+                 "completed_at": start + timedelta(hours=n)}
+                for i in range(first, min(first + 1_000, users + 1))
+                for n in range(TASKS_PER_USER)
+            ])
+        conn.execute(text("ANALYZE"))
+
+
+def replay(sample: int) -> float:
+    """Seconds per completion when every task goes through the online upsert."""
+    db = SessionLocal()
+    rows = db.execute(
+        select(Task.user_id, Task.task_type, Task.estimated_time, Task.actual_time).limit(sample)
+    ).all()
+    dialect = db.get_bind().dialect.name
+    start = perf_counter()
+    for user_id, task_type, estimate, actual in rows:
+        db.execute(pattern_upsert(dialect, user_id, task_type.value, observation(estimate, actual)))
+    db.commit()
+    elapsed = perf_counter() - start
+    db.close()
+    return elapsed / len(rows)
+
+
+def main():
+    print(f"seeding {TASKS:,} completed tasks ...")
+    seed()
+
+    per_task = replay(REPLAY_SAMPLE)
+    stats = rebuild_all(workers=WORKERS)
+    rebuild_per_task = stats["seconds"] / stats["tasks"]
+
+    print(f"{stats['tasks']:,} tasks -> {stats['patterns']:,} patterns in {stats['ranges']} ranges"
+          f" ({WORKERS or 'no'} worker processes)")
+    print(f"{'replay':>10}: {per_task * stats['tasks']:8.1f} s  "
+          f"(extrapolated from {REPLAY_SAMPLE:,}; {per_task * TARGET / 3600:.1f} h at {TARGET // 1_000_000}M)")
+    print(f"{'rebuild':>10}: {stats['seconds']:8.1f} s  "
+          f"({rebuild_per_task * TARGET / 60:.1f} min at {TARGET // 1_000_000}M)")
+    print(f"speedup {per_task / rebuild_per_task:.1f}x")
+
+    Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
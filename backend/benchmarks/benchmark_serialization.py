@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: Pydantic response validation vs the fast serializer
+(app/tasks/serializers.py) for GET /tasks pages of 20, 100 and 1,000 tasks,
+each with 5 subtasks.
+
+Run from backend/:
+    python benchmarks/benchmark_serialization.py
+"""
+from datetime import datetime, timezone
+import os
+import sys
+import tempfile
+import timeit
+
+# app.db needs a DATABASE_URL at import time; nothing here touches it
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/calibrate-bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Task, Subtask, TaskType, TaskPriority, TaskStatus  # noqa: E402
+from app.tasks.schemas import TaskListResponse  # noqa: E402
+from app.tasks.serializers import task_list_json  # noqa: E402
+
+PAGE_SIZES = (20, 100, 1000)
+SUBTASKS_PER_TASK = 5
+
+
+def make_tasks(n: int) -> list[Task]:
+    """Fully-populated rows, the way they come back from a query."""
+    now = datetime.now(timezone.utc)
+    tasks = []
+    for i in range(n):
+        task = Task(
+            id=i, user_id=1, title=f"Task {i}", description="Write the quarterly report draft",
+            task_type=TaskType.analytical, priority=TaskPriority.high, status=TaskStatus.planned,
+            estimated_time=120.0, optimistic_time=90.0, realistic_time=120.0, pessimistic_time=200.0,
+            actual_time=None, deadline=now, scheduled_date=now, completed_at=None,
+            created_at=now, updated_at=now,
+        )
+        task.subtasks = [
+            Subtask(id=i * 10 + j, description=f"Step {j}", estimated_time=20.0, order=j,
+                    is_completed=False, is_implicit=False, created_at=now, completed_at=None)
+            for j in range(SUBTASKS_PER_TASK)
+        ]
+        tasks.append(task)
+    return tasks
+
+
+def pydantic_path(tasks):
+    return TaskListResponse(tasks=tasks, total=len(tasks), page=1, page_size=len(tasks)).model_dump_json()
+
+
+def fast_path(tasks):
+    return task_list_json(tasks, (), total=len(tasks), page=1, page_size=len(tasks), next_cursor=None)
+
+
+def main():
+    print(f"{'tasks':>6} {'pydantic (ms)':>14} {'fast (ms)':>10} {'speedup':>8}")
+    for n in PAGE_SIZES:
+        tasks = make_tasks(n)
+        runs = max(5, 2000 // n)
+        slow = min(timeit.repeat(lambda: pydantic_path(tasks), number=runs, repeat=5)) / runs * 1000
+        fast = min(timeit.repeat(lambda: fast_path(tasks), number=runs, repeat=5)) / runs * 1000
+        print(f"{n:>6} {slow:>14.3f} {fast:>10.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Micro-benchmark: per-request auth overhead of decode_access_token with
+and without the verified-token cache (app/auth/utils.py).
+
+Run from backend/:
+    python benchmarks/benchmark_token_cache.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+# app.db needs a DATABASE_URL at import time; nothing here touches it
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/calibrate-bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth import utils  # noqa: E402
+
+RUNS = 20_000
+
+
+def uncached(token):
+    utils._verified_tokens.clear()
+    return utils.decode_access_token(token)
+
+
+def main():
+    token = utils.create_access_token({"sub": "1"})
+    utils.decode_access_token(token)
+
+    cold = min(timeit.repeat(lambda: uncached(token), number=RUNS, repeat=3)) / RUNS * 1e6
+    warm = min(timeit.repeat(lambda: utils.decode_access_token(token), number=RUNS, repeat=3)) / RUNS * 1e6
+
+    print(f"{'':>10} {'µs/request':>11}")
+    print(f"{'verify':>10} {cold:>11.2f}")
+    print(f"{'cached':>10} {warm:>11.2f}")
+    print(f"speedup {cold / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite file before anything imports app.db.
+# Set TEST_DATABASE_URL to run the suite against a scratch Postgres instead
+# (tables are dropped after every test — never point it at real data).
+_db_dir = tempfile.mkdtemp(prefix="calibrate-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+# Tests drive the scheduler and job queue themselves (JobWorker.run_once, BackgroundRunner)
+os.environ["SCHEDULER_MODE"] = "off"
+os.environ["METRICS_TOKEN"] = "test-metrics-token"
+
+# Add backend root to path so we can import app modules (same as alembic/env.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.db.database import Base, engine, SessionLocal
+from app.main import app
+from app.limiter import limiter
+from app.models import User
+from app.auth.utils import create_access_token
+from app.tasks.cache import task_cache
+from app.auth.cache import user_cache
+
+limiter.enabled = False
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Fresh schema (and empty caches — ids restart) for every test."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    task_cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One client (and so one event loop) for the whole run: pooled async
+    # connections are bound to the loop that opened them.
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="test@calibrate.app", hashed_password="x", full_name="Test User",
+                preferences={"timezone": "UTC", "notifications_enabled": True})
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(data={"sub": str(user.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def metrics_headers():
+    return {"Authorization": f"Bearer {os.environ['METRICS_TOKEN']}"}
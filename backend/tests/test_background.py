@@ -0,0 +1,96 @@
+import asyncio
+import socket
+import statistics
+from datetime import timedelta
+from time import perf_counter
+
+from sqlalchemy import insert
+
+from app.background import BackgroundRunner
+from app.db.database import engine
+from app.models import Task, TaskStatus, User
+from app.scheduler import enqueue_digests
+from app.services import job_queue
+from app.services.digest_service import yesterday_window
+from app.services.job_worker import JobWorker
+
+DIGEST_USERS = 2000
+
+
+def _p99(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100, method="inclusive")[98]
+
+
+def test_digest_batch_does_not_stall_the_api(client, db, user, auth_headers, monkeypatch):
+    from tests.test_mail_delivery import Sink, Controller    # skips without aiosmtpd
+
+    _, start, _ = yesterday_window("UTC")
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@calibrate.app", "hashed_password": "x"}
+            for i in range(1000, 1000 + DIGEST_USERS)
+        ])
+        conn.execute(insert(Task), [
+            {"user_id": i, "title": f"task {n}", "status": TaskStatus.completed,
+             "completed_at": start + timedelta(hours=n), "actual_time": 30}
+            for i in range(1000, 1000 + DIGEST_USERS) for n in range(3)
+        ])
+    enqueue_digests(["UTC"])
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setenv("MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setenv("MAIL_PORT", str(port))
+    monkeypatch.setenv("USE_CREDENTIALS", "False")
+    monkeypatch.setenv("MAIL_STARTTLS", "False")
+
+    def timed_request() -> float:
+        started = perf_counter()
+        assert client.get("/tasks", headers=auth_headers).status_code == 200
+        return perf_counter() - started
+
+    baseline = [timed_request() for _ in range(100)]
+
+    runner = BackgroundRunner("thread", JobWorker(kinds=["digest"], poll_seconds=0.05), with_scheduler=False)
+    runner.start()
+    during = []
+    try:
+        while job_queue.queue_stats(db)["digest"].get("succeeded", 0) < DIGEST_USERS + 1:
+            during.append(timed_request())
+    finally:
+        asyncio.run(runner.stop())
+        controller.stop()
+
+    assert len(sink.delivered) == DIGEST_USERS + 1
+    assert len(during) >= 50                      # the requests really overlapped the batch
+    # A job blocking the request loop would stall requests for the length of
+    # a whole batch (hundreds of ms); on its own loop only the GIL is shared.
+    assert _p99(during) < _p99(baseline) + 0.1
+
+
+def test_metrics_only_report_a_worker_running_in_this_process(client, metrics_headers, monkeypatch):
+    worker = JobWorker(kinds=["digest"])
+    monkeypatch.setattr("app.scheduler.last_digest_delivery", {"sent": 3})
+
+    assert BackgroundRunner("thread", worker).stats() == {
+        "scheduler_mode": "thread", "job_worker": worker.stats(), "digest_delivery": {"sent": 3},
+    }
+    assert BackgroundRunner("process", worker).stats() == {
+        "scheduler_mode": "process", "job_worker": None, "digest_delivery": None,
+    }
+
+    metrics = client.get("/metrics", headers=metrics_headers).json()       # the test app runs with SCHEDULER_MODE=off
+    assert metrics["scheduler_mode"] == "off" and metrics["job_worker"] is None
+
+
+def test_metrics_need_the_metrics_token(client, auth_headers, monkeypatch):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=auth_headers).status_code == 401    # a user token isn't enough
+
+    monkeypatch.setattr("app.main.METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
@@ -0,0 +1,32 @@
+def test_bulk_create_returns_ids_in_request_order(client, user, auth_headers):
+    body = {"tasks": [
+        {"title": f"Task {i}", "subtasks": [{"description": "a"}, {"description": "b", "order": 1}]}
+        for i in range(5)
+    ]}
+    response = client.post("/tasks/bulk", json=body, headers=auth_headers)
+
+    assert response.status_code == 201
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == list(range(5))
+    for i, result in enumerate(results):
+        task = client.get(f"/tasks/{result['id']}", headers=auth_headers).json()
+        assert task["title"] == f"Task {i}"
+        assert len(task["subtasks"]) == 2
+
+
+def test_bulk_update_reports_per_item_results(client, user, auth_headers):
+    created = client.post("/tasks/bulk", json={"tasks": [{"title": "a"}, {"title": "b"}]},
+                          headers=auth_headers).json()["results"]
+    first, second = created[0]["id"], created[1]["id"]
+
+    response = client.patch("/tasks/bulk", json={"tasks": [
+        {"id": first, "status": "completed"},
+        {"id": 9999, "title": "not mine"},
+        {"id": second, "title": "renamed"},
+    ]}, headers=auth_headers)
+
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["updated", "not_found", "updated"]
+    assert body["succeeded"] == 2 and body["failed"] == 1
+    assert client.get(f"/tasks/{first}", headers=auth_headers).json()["completed_at"] is not None
+    assert client.get(f"/tasks/{second}", headers=auth_headers).json()["title"] == "renamed"
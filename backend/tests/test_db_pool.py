@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.db.database import engine
+from app.db.pool import instrumented_pool, pool_settings_from_env, pool_stats, sweep_idle_connections
+
+
+def test_metrics_report_pool_checkouts(client, user, auth_headers, metrics_headers):
+    client.get("/tasks", headers=auth_headers)
+
+    stats = client.get("/metrics", headers=metrics_headers).json()["db_pool"]["async"]
+    assert stats["checkouts"] >= 1
+    assert sum(stats["checkout_histogram"].values()) == stats["checkouts"]
+    assert {"size", "in_use", "idle", "overflow", "timeouts"} <= stats.keys()
+
+
+def test_exhausted_pool_counts_timeouts():
+    tiny = create_engine(engine.url, poolclass=instrumented_pool(QueuePool),
+                         pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = tiny.connect()
+    with pytest.raises(exc.TimeoutError):
+        tiny.connect()
+
+    stats = pool_stats(tiny.pool)
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 1 and stats["overflow"] == 0
+
+    held.close()
+    with tiny.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    tiny.dispose()
+    assert pool_stats(tiny.pool)["checkouts"] == 2     # metrics survive dispose()
+
+
+def test_background_validation_turns_pre_ping_off(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    assert pool_settings_from_env()["pool_pre_ping"] is True
+
+    monkeypatch.setenv("DB_POOL_VALIDATION_INTERVAL", "30")
+    settings = pool_settings_from_env()
+    assert settings["pool_pre_ping"] is False
+    assert settings["pool_size"] == 3
+
+
+def test_sweep_visits_every_engine(tmp_path):
+    # stands in for a primary plus a replica: both must be validated
+    engines = [create_engine(f"sqlite:///{tmp_path}/{name}.db", poolclass=instrumented_pool(QueuePool))
+               for name in ("primary", "replica")]
+    for e in engines:
+        e.connect().close()
+
+    asyncio.run(sweep_idle_connections([], engines))
+
+    assert [pool_stats(e.pool)["checkouts"] for e in engines] == [2, 2]
+    for e in engines:
+        e.dispose()
+
+
+def test_metrics_report_replica_pools(client, metrics_headers):
+    assert client.get("/metrics", headers=metrics_headers).json()["db_pool"]["replicas"] == []
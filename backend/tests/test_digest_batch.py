@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytz
+
+from sqlalchemy import event
+
+from app.db.database import engine
+from app.models import User, Task, TaskStatus
+from app.services import digest_service
+from app.services.digest_service import (
+    UserDigest, build_digests, render_digest_html, render_digest_text, yesterday_window
+)
+
+
+def test_yesterday_window_follows_the_users_timezone():
+    now = pytz.utc.localize(pytz.datetime.datetime(2026, 3, 10, 2, 0))    # still the 9th in New York
+    day, start, end = yesterday_window("America/New_York", now)
+    assert str(day) == "2026-03-08"
+    assert start == pytz.utc.localize(pytz.datetime.datetime(2026, 3, 8, 5, 0))   # EST midnight
+    assert end - start < timedelta(days=1)                                          # DST starts on the 8th
+
+
+def test_batch_digest_matches_each_users_window_in_two_queries(db):
+    users = [
+        User(email="utc@calibrate.app", hashed_password="x", preferences={"timezone": "UTC"}),
+        User(email="tokyo@calibrate.app", hashed_password="x", full_name="Aki",
+             preferences={"timezone": "Asia/Tokyo"}),
+        User(email="idle@calibrate.app", hashed_password="x"),
+    ]
+    db.add_all(users)
+    db.flush()
+    for user in users[:2]:
+        _, start, end = yesterday_window(user.timezone)
+        db.add_all([
+            Task(user_id=user.id, title="inside", status=TaskStatus.completed,
+                 completed_at=start + timedelta(hours=1), actual_time=30),
+            Task(user_id=user.id, title="before", status=TaskStatus.completed,
+                 completed_at=start - timedelta(hours=1), actual_time=30),
+            Task(user_id=user.id, title="late", status=TaskStatus.planned,
+                 deadline=end - timedelta(hours=2), estimated_time=60),
+            Task(user_id=user.id, title="not due", status=TaskStatus.planned,
+                 deadline=end + timedelta(days=2)),
+        ])
+    db.commit()
+    for user in users:
+        db.refresh(user)    # as loaded by the recipient query
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        digests = build_digests(db, users)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 2
+    assert [d.user for d in digests] == users
+    for digest in digests[:2]:
+        assert [t.title for t in digest.completed] == ["inside"]
+        assert [t.title for t in digest.overdue] == ["late"]
+        assert digest.total_completed_time == 30
+    assert digests[2].completed == [] and digests[2].overdue == []
+
+    html = render_digest_html(digests[1])
+    assert "Hello Aki" in html and "inside" in html and "before" not in html
+
+
+def test_digest_html_is_escaped_and_the_text_part_is_not():
+    digest = UserDigest(
+        User(email="a@calibrate.app", full_name="Ana"), date(2026, 3, 1),
+        completed=[SimpleNamespace(title="<script>x</script> & notes", actual_time=90, estimated_time=None)],
+        overdue=[],
+    )
+
+    html, text = render_digest_html(digest), render_digest_text(digest)
+
+    assert "&lt;script&gt;x&lt;/script&gt; &amp; notes" in html and "<script>" not in html
+    assert "Sunday, March 01" in html and "1h 30min" in html and "No overdue tasks" in html
+    assert "- <script>x</script> & notes (1h 30min)" in text and "<li>" not in text
+
+
+def test_a_bad_timezone_does_not_stop_the_chunk(db):
+    users = [User(email=f"u{i}@calibrate.app", hashed_password="x") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    # Written around the model's validation, like rows from before it existed
+    users[1].timezone = "Mars/Olympus"
+
+    digests = build_digests(db, users)
+
+    assert [d.user for d in digests] == users
+    assert digests[1].day == digests[0].day                 # fell back to UTC
+
+
+def test_test_digest_queries_run_off_the_event_loop(db, user, monkeypatch):
+    threads, sent = [], []
+
+    def fake_build(db, users):
+        threads.append(threading.get_ident())
+        return [users[0].id]
+
+    async def fake_send(digest):
+        sent.append(digest)
+
+    monkeypatch.setattr(digest_service, "build_digests", fake_build)
+    monkeypatch.setattr(digest_service, "send_digest", fake_send)
+    asyncio.run(digest_service.generate_user_digest(db, user))
+
+    assert sent == [user.id]
+    assert threads != [threading.get_ident()]
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytz
+from sqlalchemy import insert
+
+from app.db.database import engine
+from app.models import User
+from app.services.digest_service import iter_digest_recipients, timezones_due
+
+
+def test_recipients_are_filtered_in_sql_and_chunked(db):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@calibrate.app", "hashed_password": "x",
+             "is_active": i % 5 != 0, "notifications_enabled": i % 3 != 0}
+            for i in range(1, 31)
+        ])
+
+    chunks = [[u.id for u in users] for users in iter_digest_recipients(db, chunk_size=7)]
+
+    expected = [i for i in range(1, 31) if i % 5 != 0 and i % 3 != 0]
+    assert sum(chunks, []) == expected
+    assert max(len(c) for c in chunks) == 7
+
+
+def test_preference_changes_update_the_columns(client, db, user, auth_headers):
+    client.patch("/auth/preferences", json={"preferences": {"notifications_enabled": False, "timezone": "Europe/Paris"}},
+                 headers=auth_headers)
+
+    db.expire_all()
+    refreshed = db.get(User, user.id)
+    assert refreshed.notifications_enabled is False
+    assert refreshed.timezone == "Europe/Paris"
+
+
+def test_only_timezones_at_the_send_hour_are_due():
+    now = datetime(2026, 1, 15, 14, 7, tzinfo=pytz.utc)      # 09:07 in New York, 23:07 in Tokyo
+
+    due = timezones_due(now, send_hour=9)
+
+    assert "America/New_York" in due and "America/Lima" in due
+    assert "Asia/Tokyo" not in due and "UTC" not in due
+    assert "Asia/Kathmandu" not in due                        # UTC+5:45, due at 03:15 UTC
+    assert "Asia/Kathmandu" in timezones_due(datetime(2026, 1, 15, 3, 20, tzinfo=pytz.utc), send_hour=9)
+
+
+def test_recipients_can_be_limited_to_due_timezones(db):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@calibrate.app", "hashed_password": "x", "timezone": tz}
+            for i, tz in enumerate(["UTC", "Asia/Tokyo", "America/New_York", "Asia/Tokyo", "UTC"], start=1)
+        ])
+
+    chunks = list(iter_digest_recipients(db, chunk_size=1, timezones=["Asia/Tokyo", "America/New_York"]))
+
+    assert [[u.id for u in users] for users in chunks] == [[2], [4], [3]]
+
+
+def test_timezones_are_stored_under_their_canonical_name(client, db, user, auth_headers):
+    response = client.patch("/auth/preferences", json={"preferences": {"timezone": "europe/paris"}},
+                            headers=auth_headers)
+    assert response.json()["preferences"]["timezone"] == "Europe/Paris"
+
+    # 09:00 in Paris: the user is in the due shard and gets their digest
+    due = timezones_due(datetime(2026, 1, 15, 8, 0, tzinfo=pytz.utc), send_hour=9)
+    assert [u.id for users in iter_digest_recipients(db, timezones=due) for u in users] == [user.id]
+
+
+def test_unknown_timezones_are_rejected(client, db, user, auth_headers):
+    response = client.patch("/auth/preferences", json={"preferences": {"timezone": "Mars/Olympus"}},
+                            headers=auth_headers)
+
+    assert response.status_code == 422
+    db.expire_all()
+    assert db.get(User, user.id).timezone == "UTC"
+
+
+def test_notifications_enabled_strings_are_read_as_booleans(client, db, user, auth_headers):
+    response = client.patch("/auth/preferences", json={"preferences": {"notifications_enabled": "false"}},
+                            headers=auth_headers)
+    assert response.json()["preferences"]["notifications_enabled"] is False
+    db.expire_all()
+    assert db.get(User, user.id).notifications_enabled is False
+    assert list(iter_digest_recipients(db)) == []
+
+    response = client.patch("/auth/preferences", json={"preferences": {"notifications_enabled": "sometimes"}},
+                            headers=auth_headers)
+    assert response.status_code == 422
+
+    # Written around the schema, e.g. by a script
+    assert User(preferences={"notifications_enabled": "no"}).notifications_enabled is False
@@ -0,0 +1,66 @@
+from app.models import Actual, Prediction
+from tests.test_query_counts import count_queries
+
+
+def test_list_answers_304_until_a_write(client, user, auth_headers):
+    first = client.get("/tasks", headers=auth_headers)
+    etag = first.headers["etag"]
+
+    with count_queries() as statements:
+        cached = client.get("/tasks", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert len(statements) == 1     # just the version (user is cached), no task queries
+
+    client.post("/tasks", json={"title": "new"}, headers=auth_headers)
+
+    fresh = client.get("/tasks", headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert len(fresh.json()["tasks"]) == 1
+
+
+def test_detail_etag_changes_when_a_subtask_completes(client, user, auth_headers):
+    task = client.post("/tasks", json={"title": "t", "subtasks": [{"description": "s"}]},
+                       headers=auth_headers).json()
+    etag = client.get(f"/tasks/{task['id']}", headers=auth_headers).headers["etag"]
+    assert client.get(f"/tasks/{task['id']}",
+                      headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    client.patch(f"/tasks/{task['id']}/subtasks/{task['subtasks'][0]['id']}/complete", headers=auth_headers)
+
+    response = client.get(f"/tasks/{task['id']}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["subtasks"][0]["is_completed"] is True
+
+
+def test_detail_etag_is_per_task_and_include(client, db, user, auth_headers):
+    task = client.post("/tasks", json={"title": "t"}, headers=auth_headers).json()
+    etag = client.get(f"/tasks/{task['id']}", headers=auth_headers).headers["etag"]
+
+    missing = client.get(f"/tasks/{task['id'] + 1}", headers={**auth_headers, "If-None-Match": etag})
+    assert missing.status_code == 404
+    other_variant = client.get(f"/tasks/{task['id']}?include=predictions",
+                               headers={**auth_headers, "If-None-Match": etag})
+    assert other_variant.status_code == 200
+    list_etag = client.get("/tasks", headers=auth_headers).headers["etag"]
+    assert list_etag != etag
+    assert client.get("/tasks?status=planned", headers={**auth_headers, "If-None-Match": list_etag}).status_code == 200
+
+
+def test_prediction_and_actual_writes_change_the_etag(client, db, user, auth_headers):
+    task = client.post("/tasks", json={"title": "t"}, headers=auth_headers).json()
+    url = f"/tasks/{task['id']}?include=predictions,actuals"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+
+    db.add(Prediction(task_id=task["id"], predicted_time=45))      # as the prediction engine would
+    db.commit()
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [p["predicted_time"] for p in response.json()["predictions"]] == [45]
+
+    etag = response.headers["etag"]
+    db.add(Actual(task_id=task["id"], actual_time=50))
+    db.commit()
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json()["actuals"]) == 1
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+
+from app.models import Task, Subtask, Prediction
+from app.tasks import service
+
+
+def _seed(db, user, n):
+    for i in range(n):
+        task = Task(user_id=user.id, title=f"Task {i}")
+        task.subtasks = [Subtask(description="step")]
+        task.predictions = [Prediction(predicted_time=30)]
+        db.add(task)
+    db.commit()
+
+
+def test_ndjson_export_streams_every_task_with_children(client, db, user, auth_headers, monkeypatch):
+    monkeypatch.setattr(service, "EXPORT_BATCH_SIZE", 7)     # several partitions
+    _seed(db, user, 20)
+
+    response = client.get("/tasks/export", headers=auth_headers)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["title"] for r in rows] == [f"Task {i}" for i in range(20)]
+    assert rows[0]["subtasks"][0]["description"] == "step"
+    assert rows[0]["predictions"][0]["predicted_time"] == 30
+    assert rows[0]["actuals"] == []
+
+
+def test_csv_export_has_header_and_one_row_per_task(client, db, user, auth_headers):
+    _seed(db, user, 3)
+
+    response = client.get("/tasks/export?format=csv", headers=auth_headers)
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert json.loads(rows[0]["subtasks"])[0]["description"] == "step"
+
+
+def test_empty_csv_export_still_has_header(client, user, auth_headers):
+    response = client.get("/tasks/export?format=csv", headers=auth_headers)
+    assert response.text.startswith("id,user_id,title")
@@ -0,0 +1,100 @@
+import json
+
+from sqlalchemy import select
+
+from app.models import Task, Subtask
+from app.tasks import importer
+
+
+def _ndjson(rows):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in rows).encode()
+
+
+def test_ndjson_import_loads_valid_rows_and_reports_bad_ones(client, db, user, auth_headers, monkeypatch):
+    monkeypatch.setattr(importer, "IMPORT_CHUNK_SIZE", 3)      # several chunks
+    rows = [{"title": f"Task {i}", "estimated_time": 30} for i in range(10)]
+    rows[2] = "{not json"
+    rows[5] = {"estimated_time": 10}                            # missing title
+    rows[7]["subtasks"] = [{"description": "step", "estimated_time": 5}]
+
+    response = client.post("/tasks/import", content=_ndjson(rows), headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 8
+    assert body["failed"] == 2
+    assert [e["line"] for e in body["errors"]] == [3, 6]
+    assert "title" in body["errors"][1]["error"]
+
+    titles = db.scalars(select(Task.title).where(Task.user_id == user.id).order_by(Task.id)).all()
+    assert len(titles) == 8
+    assert db.scalars(select(Subtask.description)).all() == ["step"]
+
+
+def test_csv_import_round_trips_an_export(client, db, user, auth_headers):
+    db.add(Task(user_id=user.id, title="Original", estimated_time=45, subtasks=[Subtask(description="step")]))
+    db.commit()
+    exported = client.get("/tasks/export?format=csv", headers=auth_headers).content
+
+    response = client.post(
+        "/tasks/import", content=exported,
+        headers={**auth_headers, "Content-Type": "text/csv"},
+    )
+
+    assert response.json()["imported"] == 1
+    copies = db.scalars(select(Task).where(Task.title == "Original")).all()
+    assert len(copies) == 2
+    assert [s.description for s in copies[1].subtasks] == ["step"]
+
+
+def test_import_bumps_etag(client, auth_headers):
+    etag = client.get("/tasks", headers=auth_headers).headers["etag"]
+    client.post("/tasks/import", content=_ndjson([{"title": "New"}]), headers=auth_headers)
+    assert client.get("/tasks", headers=auth_headers).headers["etag"] != etag
+
+
+def test_csv_import_keeps_multi_line_cells_together(client, db, user, auth_headers):
+    db.add(Task(user_id=user.id, title="Notes", description="first line\nsecond, \"quoted\" line\n\nlast"))
+    db.commit()
+    exported = client.get("/tasks/export?format=csv", headers=auth_headers).content
+    bad = b'"unterminated,1\n'
+
+    response = client.post(
+        "/tasks/import", content=exported + b"no columns\n" + bad,
+        headers={**auth_headers, "Content-Type": "text/csv"},
+    )
+
+    body = response.json()
+    assert body["imported"] == 1
+    assert [e["line"] for e in body["errors"]] == [6, 7]      # header + a 4-line record come first
+    copies = db.scalars(select(Task).where(Task.title == "Notes")).all()
+    assert [t.description for t in copies] == ["first line\nsecond, \"quoted\" line\n\nlast"] * 2
+
+
+def test_csv_import_gives_up_on_a_quote_left_open(client, db, user, auth_headers, monkeypatch):
+    monkeypatch.setattr(importer, "MAX_CSV_RECORD_LINES", 3)
+    upload = b'title,description\n"stray,x\na\nb\nc,d\nAfter,ok\n'
+
+    response = client.post("/tasks/import", content=upload, headers={**auth_headers, "Content-Type": "text/csv"})
+
+    body = response.json()
+    assert body["imported"] == 2 and [e["line"] for e in body["errors"]] == [2]
+    assert db.scalars(select(Task.title).where(Task.user_id == user.id).order_by(Task.id)).all() == ["c", "After"]
+
+
+def test_import_reports_oversized_lines_without_buffering_them(client, db, user, auth_headers, monkeypatch):
+    monkeypatch.setattr(importer, "MAX_LINE_LENGTH", 50)
+    chunks = [b'{"title": "a"}\n', b"x" * 40, b"x" * 40, b"x" * 40 + b'\n{"title": "b"}\n', b"y" * 60]
+
+    response = client.post("/tasks/import", content=iter(chunks), headers=auth_headers)
+
+    body = response.json()
+    assert body["imported"] == 2 and [e["line"] for e in body["errors"]] == [2, 4]
+    assert "longer than 50" in body["errors"][0]["error"]
+
+    upload = b'title,description\n"c,' + b"z" * 60 + b'\nd,ok\n'
+    response = client.post("/tasks/import", content=upload, headers={**auth_headers, "Content-Type": "text/csv"})
+
+    body = response.json()
+    assert body["imported"] == 1 and [e["line"] for e in body["errors"]] == [2]
+    assert db.scalars(select(Task.title).where(Task.user_id == user.id).order_by(Task.id)).all() == ["a", "b", "d"]
@@ -0,0 +1,122 @@
+import asyncio
+import socket
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from app.models.job import Job, JobStatus
+from app.scheduler import enqueue_digests
+from app.services import job_queue
+from app.services.job_worker import JOB_HANDLERS, JobWorker
+
+
+def _enqueue(db, count: int, kind: str = "test"):
+    job_queue.enqueue(db, kind, [{"payload": {"n": i}, "dedupe_key": f"{kind}:{i}"} for i in range(count)])
+    db.commit()
+
+
+def _make_due(db):
+    db.execute(update(Job).values(run_at=job_queue.utcnow()))
+    db.commit()
+
+
+def test_enqueue_ignores_duplicate_keys(db):
+    _enqueue(db, 3)
+    _enqueue(db, 5)
+
+    assert job_queue.queue_stats(db) == {"test": {"queued": 5}}
+
+
+def test_concurrent_claims_get_disjoint_batches(db):
+    _enqueue(db, 10)
+
+    first = job_queue.claim(db, "worker-a", ["test"], 4, 60)
+    second = job_queue.claim(db, "worker-b", ["test"], 4, 60)
+    third = job_queue.claim(db, "worker-c", ["test"], 4, 60)
+
+    ids = [job.id for job in first + second + third]
+    assert len(ids) == len(set(ids)) == 10
+    assert {job.locked_by for job in first} == {"worker-a"}
+    assert all(job.attempts == 1 for job in first)
+
+
+def test_expired_lease_is_reclaimed_and_the_old_worker_is_fenced_off(db):
+    _enqueue(db, 1)
+    (stale,) = job_queue.claim(db, "crashed", ["test"], 10, lease_seconds=-1)   # lease already over
+
+    (reclaimed,) = job_queue.claim(db, "healthy", ["test"], 10, 60)
+    assert reclaimed.id == stale.id and reclaimed.attempts == 2
+
+    assert job_queue.complete(db, "crashed", stale) is False
+    assert job_queue.complete(db, "healthy", reclaimed) is True
+    db.commit()
+    assert job_queue.queue_stats(db) == {"test": {"succeeded": 1}}
+
+
+def test_failures_back_off_then_give_up(db):
+    _enqueue(db, 1)
+
+    for attempt in range(1, 4):
+        (job,) = job_queue.claim(db, "worker", ["test"], 10, 60)
+        assert job.attempts == attempt
+        assert job_queue.fail(db, "worker", job, f"boom {attempt}")
+        db.commit()
+        assert job_queue.claim(db, "worker", ["test"], 10, 60) == []     # backing off
+        _make_due(db)
+
+    job = db.scalars(select(Job)).one()
+    assert job.status == JobStatus.failed and job.last_error == "boom 3"
+
+
+def test_worker_records_each_jobs_outcome(db, monkeypatch):
+    async def handler(jobs):
+        return [None if job.payload["n"] % 2 == 0 else "odd" for job in jobs]
+    monkeypatch.setitem(JOB_HANDLERS, "test", handler)
+    _enqueue(db, 4)
+    worker = JobWorker(kinds=["test"], batch_size=10)
+
+    assert asyncio.run(worker.run_once()) == 4
+
+    assert job_queue.queue_stats(db) == {"test": {"succeeded": 2, "queued": 2}}
+    assert worker.stats()["succeeded"] == 2 and worker.stats()["failed"] == 2
+
+
+def test_digest_jobs_are_enqueued_once_and_delivered(db, user, monkeypatch):
+    from tests.test_mail_delivery import Sink, Controller    # skips without aiosmtpd
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        monkeypatch.setenv("MAIL_SERVER", "127.0.0.1")
+        monkeypatch.setenv("MAIL_PORT", str(port))
+        monkeypatch.setenv("USE_CREDENTIALS", "False")
+        monkeypatch.setenv("MAIL_STARTTLS", "False")
+
+        # Every uvicorn worker's scheduler enqueues the same slot
+        assert enqueue_digests(["UTC"]) == 1
+        assert enqueue_digests(["UTC"]) == 1
+        assert job_queue.queue_stats(db) == {"digest": {"queued": 1}}
+
+        asyncio.run(JobWorker(kinds=["digest"]).run_once())
+    finally:
+        controller.stop()
+
+    assert sink.delivered == [user.email]
+    assert job_queue.queue_stats(db) == {"digest": {"succeeded": 1}}
+
+
+def test_finished_jobs_are_purged_after_retention(db):
+    _enqueue(db, 5)
+    old, recent = job_queue.utcnow() - timedelta(days=30), job_queue.utcnow() - timedelta(hours=1)
+    db.execute(update(Job).where(Job.id.in_([1, 2])).values(status=JobStatus.succeeded, finished_at=old))
+    db.execute(update(Job).where(Job.id == 3).values(status=JobStatus.failed, finished_at=old))
+    db.execute(update(Job).where(Job.id == 4).values(status=JobStatus.succeeded, finished_at=recent))
+    db.commit()
+
+    assert job_queue.purge_finished(db, older_than=timedelta(days=7), batch_size=2) == 3
+
+    assert db.scalars(select(Job.id).order_by(Job.id)).all() == [4, 5]
@@ -0,0 +1,119 @@
+import asyncio
+import socket
+
+import pytest
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+from app.services.mail_delivery import MailDeliveryEngine, SMTPSettings  # noqa: E402
+
+
+class Sink:
+    """aiosmtpd handler: accepts mail, or answers with a scripted reply per recipient."""
+
+    def __init__(self, replies: dict[str, list[str]] | None = None):
+        self.replies = replies or {}
+        self.delivered: list[str] = []
+        self.sessions: set[int] = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        scripted = self.replies.get(address)
+        if scripted:
+            return scripted.pop(0)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_sink():
+    def start(handler: Sink):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        started.append(controller)
+        return SMTPSettings(hostname="127.0.0.1", port=port)
+
+    started = []
+    yield start
+    for controller in started:
+        controller.stop()
+
+
+def _run(engine: MailDeliveryEngine, recipients: list[str]) -> list[bool]:
+    """Sends one message per recipient; returns whether each was delivered."""
+    async def main():
+        async with engine:
+            delivered = [await engine.submit(to, "Your digest", "<p>hello</p>", text="hello")
+                         for to in recipients]
+        return [future.result() for future in delivered]
+    return asyncio.run(main())
+
+
+def test_messages_share_a_few_persistent_connections(smtp_sink):
+    sink = Sink()
+    engine = MailDeliveryEngine(smtp_sink(sink), connections=3, queue_size=5)
+    recipients = [f"user{i}@calibrate.app" for i in range(60)]
+
+    _run(engine, recipients)
+
+    assert sorted(sink.delivered) == sorted(recipients)
+    stats = engine.stats()
+    assert stats["sent"] == 60 and stats["failed"] == 0
+    assert stats["connections_opened"] <= 3
+    assert len(sink.sessions) <= 3
+    assert stats["messages_per_second"] > 0
+
+
+def test_transient_failures_are_retried_and_permanent_ones_are_not(smtp_sink):
+    sink = Sink(replies={
+        "flaky@calibrate.app": ["451 Try again later"],
+        "gone@calibrate.app": ["550 No such user", "550 No such user"],
+    })
+    engine = MailDeliveryEngine(smtp_sink(sink), connections=1, backoff_seconds=0.01)
+
+    delivered = _run(engine, ["flaky@calibrate.app", "gone@calibrate.app", "ok@calibrate.app"])
+
+    assert delivered == [True, False, True]
+    assert sorted(sink.delivered) == ["flaky@calibrate.app", "ok@calibrate.app"]
+    stats = engine.stats()
+    assert (stats["sent"], stats["failed"], stats["retried"]) == (2, 1, 1)
+
+
+def test_unreachable_server_gives_up_after_max_attempts():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]      # nothing listening here
+    engine = MailDeliveryEngine(SMTPSettings(hostname="127.0.0.1", port=port, timeout=1),
+                                connections=1, max_attempts=2, backoff_seconds=0.01)
+
+    _run(engine, ["user@calibrate.app"])
+
+    stats = engine.stats()
+    assert (stats["sent"], stats["failed"], stats["retried"]) == (0, 1, 1)
+
+
+def test_an_unexpected_error_fails_only_its_own_message(smtp_sink, monkeypatch):
+    import aiosmtplib
+    send_message = aiosmtplib.SMTP.send_message
+
+    async def broken_for_one(self, message, *args, **kwargs):
+        if message["To"] == "broken@calibrate.app":
+            raise UnicodeEncodeError("ascii", "é", 0, 1, "not SMTP's problem")
+        return await send_message(self, message, *args, **kwargs)
+
+    monkeypatch.setattr(aiosmtplib.SMTP, "send_message", broken_for_one)
+    sink = Sink()
+    engine = MailDeliveryEngine(smtp_sink(sink), connections=1)
+
+    delivered = _run(engine, ["broken@calibrate.app", "ok@calibrate.app", "also-ok@calibrate.app"])
+
+    assert delivered == [False, True, True]      # the worker survived, every future resolved
+    assert engine.stats()["failed"] == 1
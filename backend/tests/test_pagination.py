@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from app.models import Task
+
+
+def _seed(db, user, n):
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    # Pairs share a created_at so the id tie-breaker is exercised
+    for i in range(n):
+        db.add(Task(user_id=user.id, title=f"Task {i}", created_at=base + timedelta(minutes=i // 2)))
+    db.commit()
+
+
+def test_cursor_pages_cover_every_task_once(client, db, user, auth_headers):
+    _seed(db, user, 25)
+
+    seen, cursor = [], None
+    while True:
+        params = {"page_size": 10}
+        if cursor:
+            params["after"] = cursor
+        body = client.get("/tasks", params=params, headers=auth_headers).json()
+        if cursor:
+            assert body["total"] is None     # no COUNT in cursor mode
+        seen += [t["id"] for t in body["tasks"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+
+
+def test_page_mode_keeps_total_and_can_skip_it(client, db, user, auth_headers):
+    _seed(db, user, 5)
+
+    body = client.get("/tasks", params={"page_size": 2}, headers=auth_headers).json()
+    assert body["total"] == 5
+    assert body["page"] == 1
+    assert body["next_cursor"] is not None
+
+    body = client.get("/tasks", params={"include_total": False}, headers=auth_headers).json()
+    assert body["total"] is None
+    assert len(body["tasks"]) == 5
+    assert body["next_cursor"] is None
+
+
+def test_invalid_cursor_is_rejected(client, user, auth_headers):
+    response = client.get("/tasks", params={"after": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_cursor_pages_of_tasks_created_through_the_api(client, user, auth_headers):
+    # created_at comes from the column default here, not from the test
+    created = [client.post("/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"]
+               for i in range(6)]
+
+    seen, cursor = [], None
+    for _ in range(len(created)):
+        params = {"page_size": 2, **({"after": cursor} if cursor else {})}
+        body = client.get("/tasks", params=params, headers=auth_headers).json()
+        seen += [t["id"] for t in body["tasks"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == created[::-1]
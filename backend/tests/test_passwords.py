@@ -0,0 +1,19 @@
+from app.auth import passwords
+
+CREDENTIALS = {"email": "new@calibrate.app", "password": "correct horse"}
+
+
+def test_register_and_login_hash_on_the_pool(client):
+    assert client.post("/auth/register", json=CREDENTIALS).status_code == 201
+
+    assert client.post("/auth/login", json=CREDENTIALS).json()["access_token"]
+    assert client.post("/auth/login", json={**CREDENTIALS, "password": "wrong"}).status_code == 401
+
+
+def test_login_is_shed_with_503_when_the_pool_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_QUEUE_LIMIT", 0)
+
+    response = client.post("/auth/register", json=CREDENTIALS)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(passwords.RETRY_AFTER_SECONDS)
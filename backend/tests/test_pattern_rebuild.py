@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+pytest.importorskip("numpy")
+
+from app.db.database import engine  # noqa: E402
+from app.models import Actual, Prediction, Task, TaskStatus, TaskType, User, UserPattern  # noqa: E402
+from app.tasks.pattern_rebuild import rebuild_all  # noqa: E402
+
+STATS = ("total_tasks_completed", "systematic_bias", "bias_m2", "avg_accuracy",
+         "avg_actual_time", "avg_estimated_time", "calibration_factor", "decay_weight")
+
+
+def _patterns(db) -> dict:
+    db.expire_all()
+    return {
+        (p.user_id, p.task_type): tuple(getattr(p, name) for name in STATS)
+        for p in db.scalars(select(UserPattern))
+    }
+
+
+def _assert_close(actual: dict, expected: dict):
+    assert actual.keys() == expected.keys()
+    for key in expected:
+        assert actual[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+
+
+def test_rebuild_reproduces_the_online_patterns(client, db, user, auth_headers):
+    history = [("analytical", 60, 90), ("creative", 30, 30), ("analytical", 120, 100),
+               ("analytical", 45, 80), ("creative", 20, 50), ("unknown", 10, 12)]
+    for task_type, estimate, actual in history:
+        task = client.post("/tasks", json={"title": "t", "task_type": task_type, "estimated_time": estimate},
+                           headers=auth_headers).json()
+        client.patch(f"/tasks/{task['id']}/complete?actual_time={actual}", headers=auth_headers)
+    # Give the completions distinct times, in the order they happened
+    for offset, task_id in enumerate(db.scalars(select(Task.id).order_by(Task.id))):
+        db.execute(update(Task).where(Task.id == task_id).values(
+            completed_at=datetime(2026, 3, 1) + timedelta(minutes=offset)))
+    db.commit()
+    online = _patterns(db)
+
+    db.execute(update(UserPattern).values(calibration_factor=7.0, total_tasks_completed=99))
+    db.commit()
+    stats = rebuild_all(range_size=2)
+
+    assert stats["tasks"] == len(history) and stats["patterns"] == 3
+    _assert_close(_patterns(db), online)
+
+
+def test_rebuild_and_online_path_count_the_same_tasks(client, db, user, auth_headers):
+    # Tasks missing an estimate or an actual count on neither path, even
+    # when prediction/actual rows could fill the gap
+    for estimate, actual in [(60, 90), (None, 40), (30, None), (20, 25)]:
+        body = {"title": "t", "task_type": "creative"}
+        if estimate is not None:
+            body["estimated_time"] = estimate
+        task = client.post("/tasks", json=body, headers=auth_headers).json()
+        db.add_all([Prediction(task_id=task["id"], predicted_time=50), Actual(task_id=task["id"], actual_time=70)])
+        db.commit()
+        query = f"?actual_time={actual}" if actual is not None else ""
+        client.patch(f"/tasks/{task['id']}/complete{query}", headers=auth_headers)
+    db.add(Task(user_id=user.id, title="still open", task_type=TaskType.creative,
+                status=TaskStatus.planned, estimated_time=10, actual_time=99))
+    db.commit()
+    online = _patterns(db)
+
+    db.execute(delete(UserPattern))
+    db.commit()
+    rebuild_all()
+
+    assert online[(user.id, "creative")][0] == 2
+    _assert_close(_patterns(db), online)
+
+
+def test_process_pool_rebuild_matches_in_process(db):
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": i, "email": f"u{i}@calibrate.app", "hashed_password": "x"}
+                                    for i in range(1, 21)])
+        conn.execute(insert(Task), [
+            {"user_id": i, "title": "t", "task_type": list(TaskType)[n % 3], "status": TaskStatus.completed,
+             "estimated_time": 30 + n, "actual_time": 20 + 7 * n % 50,
+             "completed_at": datetime(2026, 3, 1) + timedelta(hours=n)}
+            for i in range(1, 21) for n in range(12)
+        ])
+
+    rebuild_all(range_size=5)
+    in_process = _patterns(db)
+    db.execute(delete(UserPattern))
+    db.commit()
+    stats = rebuild_all(range_size=5, workers=2)
+
+    assert stats["ranges"] == 4
+    _assert_close(_patterns(db), in_process)
+
+
+def test_rebuild_deletes_patterns_left_without_history(client, db, user, auth_headers):
+    for task_type in ("analytical", "creative"):
+        task = client.post("/tasks", json={"title": "t", "task_type": task_type, "estimated_time": 30},
+                           headers=auth_headers).json()
+        client.patch(f"/tasks/{task['id']}/complete?actual_time=45", headers=auth_headers)
+    db.add(UserPattern(user_id=user.id, task_type="administrative", total_tasks_completed=5, calibration_factor=3.0))
+    db.execute(delete(Task).where(Task.task_type == TaskType.creative))
+    db.commit()
+
+    stats = rebuild_all()
+
+    assert stats["patterns"] == 1 and stats["deleted"] == 2
+    assert list(_patterns(db)) == [(user.id, "analytical")]
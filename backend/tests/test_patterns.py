@@ -0,0 +1,75 @@
+import statistics
+
+from sqlalchemy import select
+
+from app.models import UserPattern
+from app.tasks.patterns import DECAY
+
+
+def _complete(client, auth_headers, estimate, actual, task_type="analytical"):
+    task = client.post("/tasks", json={"title": "t", "task_type": task_type, "estimated_time": estimate},
+                       headers=auth_headers).json()
+    response = client.patch(f"/tasks/{task['id']}/complete?actual_time={actual}", headers=auth_headers)
+    assert response.status_code == 200
+    return task
+
+
+def test_completions_update_the_pattern_incrementally(client, db, user, auth_headers):
+    history = [(60, 90), (30, 30), (120, 100), (45, 80)]
+    for estimate, actual in history:
+        _complete(client, auth_headers, estimate, actual)
+    _complete(client, auth_headers, 60, 60, task_type="creative")
+    _complete(client, auth_headers, None, 60)                       # no estimate: doesn't count
+
+    pattern = db.scalars(select(UserPattern).where(UserPattern.task_type == "analytical")).one()
+
+    biases = [(a - e) / e for e, a in history]
+    assert pattern.total_tasks_completed == 4
+    assert abs(pattern.systematic_bias - statistics.mean(biases)) < 1e-9
+    assert abs(pattern.bias_variance - statistics.variance(biases)) < 1e-9
+    assert abs(pattern.avg_accuracy - statistics.mean(min(e, a) / max(e, a) for e, a in history)) < 1e-9
+    assert abs(pattern.avg_actual_time - statistics.mean(a for _, a in history)) < 1e-9
+    assert abs(pattern.avg_estimated_time - statistics.mean(e for e, _ in history)) < 1e-9
+
+    weights = [DECAY ** age for age in range(len(history) - 1, -1, -1)]    # newest weighs 1
+    ratios = [a / e for e, a in history]
+    assert abs(pattern.calibration_factor - sum(w * r for w, r in zip(weights, ratios)) / sum(weights)) < 1e-9
+    assert abs(pattern.decay_weight - sum(weights)) < 1e-9
+
+    assert db.scalars(select(UserPattern.task_type)).all() == ["analytical", "creative"]
+
+
+def test_a_task_only_counts_the_first_time_it_completes(client, db, user, auth_headers):
+    task = _complete(client, auth_headers, 60, 90)
+    client.patch(f"/tasks/{task['id']}/complete?actual_time=120", headers=auth_headers)
+    client.patch("/tasks/bulk", json={"tasks": [{"id": task["id"], "status": "completed"}]}, headers=auth_headers)
+
+    assert db.scalars(select(UserPattern.total_tasks_completed)).one() == 1
+
+
+def test_a_task_sent_twice_in_one_bulk_update_completes_once(client, db, user, auth_headers):
+    task = client.post("/tasks", json={"title": "t", "estimated_time": 60}, headers=auth_headers).json()
+
+    response = client.patch("/tasks/bulk", json={"tasks": [
+        {"id": task["id"], "status": "completed", "actual_time": 90},
+        {"id": task["id"], "status": "completed", "actual_time": 90},
+    ]}, headers=auth_headers)
+
+    assert [r["status"] for r in response.json()["results"]] == ["updated", "updated"]
+    assert db.scalars(select(UserPattern.total_tasks_completed)).one() == 1
+
+
+def test_bulk_completions_update_the_pattern(client, db, user, auth_headers):
+    created = client.post("/tasks/bulk", json={"tasks": [{"title": "a", "estimated_time": 60},
+                                                         {"title": "b", "estimated_time": 30}]},
+                          headers=auth_headers).json()
+    ids = [item["id"] for item in created["results"]]
+
+    client.patch("/tasks/bulk", json={"tasks": [
+        {"id": ids[0], "status": "completed", "actual_time": 90},
+        {"id": ids[1], "status": "completed", "actual_time": 30},
+    ]}, headers=auth_headers)
+
+    pattern = db.scalars(select(UserPattern)).one()
+    assert pattern.task_type == "unknown" and pattern.total_tasks_completed == 2
+    assert abs(pattern.systematic_bias - 0.25) < 1e-9
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.db.database import async_engine
+from app.models import Task, Subtask, Prediction, Actual
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _seed(db, user, n):
+    for i in range(n):
+        task = Task(user_id=user.id, title=f"Task {i}")
+        task.subtasks = [Subtask(description=f"Step {j}") for j in range(3)]
+        task.predictions = [Prediction(predicted_time=30)]
+        task.actuals = [Actual(actual_time=45)]
+        db.add(task)
+    db.commit()
+
+
+@pytest.fixture
+def warm_user(client, auth_headers):
+    """Puts the user in the user cache, so counts below exclude the user lookup."""
+    client.get("/auth/me", headers=auth_headers)
+
+
+# tasks_version + COUNT + tasks + subtasks,
+# then one more per included relationship
+@pytest.mark.parametrize("include,expected", [
+    (None, 4),
+    ("predictions", 5),
+    ("predictions,actuals", 6),
+])
+def test_task_list_query_count_is_independent_of_page_size(client, db, user, auth_headers, warm_user, include, expected):
+    _seed(db, user, 100)
+
+    for page_size in (1, 10, 100):
+        params = {"page_size": page_size}
+        if include:
+            params["include"] = include
+        with count_queries() as statements:
+            response = client.get("/tasks", params=params, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()["tasks"]) == page_size
+        assert len(statements) == expected, statements
+
+
+def test_task_detail_includes_relationships_only_on_request(client, db, user, auth_headers, warm_user):
+    _seed(db, user, 1)
+    task_id = db.query(Task.id).scalar()
+
+    with count_queries() as statements:
+        body = client.get(f"/tasks/{task_id}", headers=auth_headers).json()
+    assert len(statements) == 3     # tasks_version + task + subtasks
+    assert len(body["subtasks"]) == 3
+    assert body["predictions"] is None and body["actuals"] is None
+
+    body = client.get(f"/tasks/{task_id}?include=predictions,actuals", headers=auth_headers).json()
+    assert body["predictions"][0]["predicted_time"] == 30
+    assert body["actuals"][0]["actual_time"] == 45
+
+
+def test_unknown_include_is_rejected(client, user, auth_headers):
+    response = client.get("/tasks", params={"include": "secrets"}, headers=auth_headers)
+    assert response.status_code == 400
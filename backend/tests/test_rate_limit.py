@@ -0,0 +1,94 @@
+import sys
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from limits.storage import MemoryStorage
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+
+from app.auth.utils import create_access_token
+from app.limiter import build_limiter, limiter, rate_limit_key, DIGEST_LIMIT
+from app.models import User
+
+
+@pytest.fixture
+def rate_limits(monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", True)
+    limiter.reset()
+    yield
+    limiter.reset()
+
+
+def _request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("10.0.0.1", 1234),
+    })
+
+
+def test_key_is_the_user_id_with_a_valid_token_else_the_ip(auth_headers, user):
+    assert rate_limit_key(_request(auth_headers)) == f"user:{user.id}"
+    assert rate_limit_key(_request({"Authorization": "Bearer garbage"})) == "ip:10.0.0.1"
+    assert rate_limit_key(_request({})) == "ip:10.0.0.1"
+
+
+def test_digest_quota_is_per_user(client, db, user, auth_headers, rate_limits, monkeypatch):
+    sent = []
+
+    async def fake_digest(db, user):
+        sent.append(user.id)
+
+    monkeypatch.setattr(sys.modules["app.tasks.router"], "generate_user_digest", fake_digest)
+    quota = int(DIGEST_LIMIT.split("/")[0])
+
+    codes = [client.post("/tasks/test-digest", headers=auth_headers).status_code for _ in range(quota + 1)]
+    assert codes == [202] * quota + [429]
+
+    # Same client address, different user: separate bucket
+    colleague = User(email="colleague@calibrate.app", hashed_password="x")
+    db.add(colleague)
+    db.commit()
+    colleague_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(colleague.id)})}"}
+    assert client.post("/tasks/test-digest", headers=colleague_headers).status_code == 202
+
+
+class SharedMemoryStorage(MemoryStorage):
+    """shared-memory://: every instance sees the same counters, like workers pointed at one Redis."""
+    STORAGE_SCHEME = ["shared-memory"]
+    state: dict = {}
+
+    def __init__(self, uri: str | None = None, **options):
+        super().__init__(uri, **options)
+        for name in ("storage", "locks", "expirations", "events"):
+            setattr(self, name, self.state.setdefault(name, getattr(self, name)))
+
+
+def _worker_app() -> TestClient:
+    """One uvicorn worker's view: its own Limiter, built from the app's configuration."""
+    worker_limiter = build_limiter("shared-memory://")
+    app = FastAPI()
+    app.state.limiter = worker_limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/limited")
+    @worker_limiter.limit("3/minute")
+    def limited(request: Request):
+        return {}
+
+    return TestClient(app)
+
+
+def test_workers_sharing_storage_enforce_one_limit_per_user(user, auth_headers):
+    SharedMemoryStorage.state.clear()
+    workers = [_worker_app(), _worker_app()]
+
+    codes = [workers[n % 2].get("/limited", headers=auth_headers).status_code for n in range(4)]
+    assert codes == [200, 200, 200, 429]
+    assert workers[0].get("/limited", headers=auth_headers).status_code == 429
+
+    # Another user still has their own, untouched quota on both workers
+    other = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id + 1)})}"}
+    assert [w.get("/limited", headers=other).status_code for w in workers] == [200, 200]
+
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import database, replicas
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """A "replica" that is really the test database, with its own engine so we can see its traffic."""
+    engine = create_async_engine(database.ASYNC_DATABASE_URL)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocals", [async_sessionmaker(bind=engine, expire_on_commit=False)])
+    replicas.recent_writers.clear()
+    yield statements
+    replicas.recent_writers.clear()
+
+
+def test_reads_go_to_the_replica(client, user, auth_headers, replica):
+    assert client.get("/tasks", headers=auth_headers).status_code == 200
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    assert any("FROM tasks" in s for s in replica)
+
+
+def test_writer_reads_from_the_primary_until_the_window_passes(client, user, auth_headers, replica):
+    client.post("/tasks", json={"title": "just added"}, headers=auth_headers)
+
+    assert client.get("/tasks", headers=auth_headers).json()["tasks"][0]["title"] == "just added"
+    assert replica == []
+
+    replicas.recent_writers.clear()     # window over
+    client.get("/tasks", headers=auth_headers)
+    assert replica != []
+
+
+def test_without_replicas_reads_use_the_primary():
+    assert replicas.read_session_factory(user_id=1) is database.AsyncSessionLocal
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+import json
+
+from app.models import Task, Subtask, Prediction, Actual, TaskType
+from app.tasks.schemas import TaskResponse, TaskListResponse
+from app.tasks.serializers import task_json, task_list_json
+
+
+def _task(id):
+    now = datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    task = Task(id=id, user_id=1, title=f"Task {id}", description=None, task_type=TaskType.creative,
+                priority="high", status="planned", estimated_time=90.0, created_at=now, deadline=now)
+    task.subtasks = [Subtask(id=id * 10 + j, description="step", estimated_time=15, order=j,
+                             is_completed=False, is_implicit=j == 0, created_at=now) for j in range(3)]
+    task.predictions = [Prediction(id=id, predicted_time=30.5, confidence=0.8, created_at=now)]
+    task.actuals = [Actual(id=id, actual_time=45.0, completion_date=now, created_at=now)]
+    return task
+
+
+def test_fast_path_matches_pydantic_output():
+    # Byte for byte: parsing both first would hide 15 vs 15.0 (subtask estimated_time is an int here)
+    task = _task(1)
+    expected = TaskResponse.model_validate(task).model_dump_json().encode()
+    assert task_json(task, ("predictions", "actuals")) == expected
+
+
+def test_fast_path_leaves_unrequested_relationships_null():
+    body = json.loads(task_json(_task(1)))
+    assert body["predictions"] is None and body["actuals"] is None
+    assert len(body["subtasks"]) == 3
+
+
+def test_fast_list_matches_pydantic_output():
+    tasks = [_task(i) for i in range(1, 4)]
+    expected = TaskListResponse(tasks=tasks, total=3, page=1, page_size=20, next_cursor="abc").model_dump_json()
+    actual = task_list_json(tasks, ("predictions", "actuals"), total=3, page=1, page_size=20, next_cursor="abc")
+    assert actual == expected.encode()
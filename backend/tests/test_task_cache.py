@@ -0,0 +1,69 @@
+from app.cache import LRUCache, RedisCache, TieredCache
+from app.tasks.cache import task_cache
+from tests.test_query_counts import count_queries
+
+
+class LocalRedis:
+    """Dict-backed stand-in for a redis.Redis client."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_repeat_reads_are_served_from_cache_until_a_write(client, user, auth_headers):
+    client.post("/tasks", json={"title": "first"}, headers=auth_headers)
+    misses = task_cache.misses
+
+    client.get("/tasks", headers=auth_headers)
+    with count_queries() as statements:
+        cached = client.get("/tasks", headers=auth_headers)
+    assert len(statements) == 1     # version only (user is cached too)
+    assert task_cache.misses == misses + 1
+    assert [t["title"] for t in cached.json()["tasks"]] == ["first"]
+
+    task_id = cached.json()["tasks"][0]["id"]
+    client.patch(f"/tasks/{task_id}", json={"title": "renamed"}, headers=auth_headers)
+
+    assert client.get("/tasks", headers=auth_headers).json()["tasks"][0]["title"] == "renamed"
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).json()["title"] == "renamed"
+
+
+def test_delete_invalidates_cached_detail(client, user, auth_headers):
+    task_id = client.post("/tasks", json={"title": "t"}, headers=auth_headers).json()["id"]
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 200
+
+    client.delete(f"/tasks/{task_id}", headers=auth_headers)
+
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 404
+
+
+def test_shared_backend_serves_other_workers():
+    redis = LocalRedis()
+    worker_a = TieredCache("a", LRUCache(), shared=RedisCache(redis))
+    worker_b = TieredCache("b", LRUCache(), shared=RedisCache(redis))
+
+    worker_a.set("k", '{"tasks": []}')
+
+    assert worker_b.get("k") == '{"tasks": []}'
+    assert worker_b.stats()["shared_hits"] == 1
+
+
+def test_lru_evicts_oldest_and_expires_entries():
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
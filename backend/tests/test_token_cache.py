@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+
+from app.auth import utils
+
+
+def _count_decodes(monkeypatch):
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(utils.jwt, "decode", counting_decode)
+    return calls
+
+
+def test_repeated_token_is_verified_once(monkeypatch):
+    calls = _count_decodes(monkeypatch)
+    token = utils.create_access_token({"sub": "41"})
+
+    for _ in range(5):
+        assert utils.decode_access_token(token)["sub"] == "41"
+    assert len(calls) == 1
+
+
+def test_cached_token_is_not_served_after_exp(monkeypatch):
+    calls = _count_decodes(monkeypatch)
+    exp = datetime.now(timezone.utc) + timedelta(minutes=5)
+    token = jwt.encode({"sub": "42", "exp": exp}, utils.SECRET_KEY, algorithm=utils.ALGORITHM)
+    assert utils.decode_access_token(token) is not None
+
+    later = exp.timestamp() + 1
+    monkeypatch.setattr(utils.time, "time", lambda: later)
+    utils.decode_access_token(token)
+
+    assert len(calls) == 2      # past exp: verified again, not served from the cache
+
+
+def test_tampered_token_is_rejected(client, auth_headers):
+    token = auth_headers["Authorization"].removeprefix("Bearer ")
+    client.get("/auth/me", headers=auth_headers)
+
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {token[:-2]}xx"})
+    assert response.status_code == 401
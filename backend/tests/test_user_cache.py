@@ -0,0 +1,40 @@
+from app.auth.cache import user_cache, user_key
+from app.models import User
+from tests.test_query_counts import count_queries
+
+
+def test_repeat_requests_skip_the_user_query(client, user, auth_headers):
+    client.get("/auth/me", headers=auth_headers)
+
+    with count_queries() as statements:
+        response = client.get("/auth/me", headers=auth_headers)
+
+    assert response.json()["email"] == user.email
+    assert statements == []
+    assert "hashed_password" not in user_cache.get(user_key(user.id))
+
+
+def test_preferences_change_is_visible_immediately(client, user, auth_headers):
+    client.get("/auth/me", headers=auth_headers)
+
+    client.patch("/auth/preferences", json={"preferences": {"timezone": "Asia/Tokyo"}}, headers=auth_headers)
+
+    assert client.get("/auth/me", headers=auth_headers).json()["preferences"]["timezone"] == "Asia/Tokyo"
+
+
+def test_deactivated_user_is_rejected_right_away(client, db, user, auth_headers):
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+
+    db.get(User, user.id).is_active = False
+    db.commit()
+
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_metrics_report_user_cache_hit_rate(client, user, auth_headers, metrics_headers):
+    client.get("/auth/me", headers=auth_headers)
+    client.get("/auth/me", headers=auth_headers)
+
+    stats = client.get("/metrics", headers=metrics_headers).json()["user_cache"]
+    assert stats["hits"] >= 1 and stats["misses"] >= 1
+    assert stats["hit_rate"] is not None